@@ -1,92 +1,41 @@
 import streamlit as st
-# Update these imports
-from zowe.core_for_zowe_sdk import ProfileManager
-from zowe.zosmf_for_zowe_sdk import Zosmf
 import logging
 import os
-from datetime import datetime, timedelta
-from pathlib import Path
-from utils.auth_utils import init_session_state
+import secrets
+from datetime import timedelta
+from utils.logging_utils import setup_logging
+from utils.auth_utils import (cleanup_session, get_connection_pool, init_session_state, release_connection, save_session,
+                              token_connection)
+from utils.cert_utils import load_certificate
+from utils.metrics_utils import LOCAL_HOST, get_metrics
 from utils.security_utils import SecureProfileManager
 from typing import Dict
-import json
 
-# Configure logging
-def setup_logging():
-    """Setup logging configuration"""
-    log_dir = "logs"
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    
-    # Create a timestamp for the log file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join(log_dir, f"zowe_auth_{timestamp}.log")
-    
-    # Configure logging format and level
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
-        ]
-    )
-    
-    # Suppress excessive logging from urllib3
-    logging.getLogger('urllib3').setLevel(logging.WARNING)
-    
-    return logging.getLogger(__name__)
-
-# Initialize logger
-logger = setup_logging()
+# Initialize logging once per process
+setup_logging()
+logger = logging.getLogger(__name__)
 
 def validate_cert(cert_path):
-    """Validate certificate format and convert if necessary"""
+    """Validate certificate format and convert if necessary
+
+    Processing is memoized per file version, so repeated logins only stat
+    the certificate.
+    """
     if not cert_path:
         logger.debug("No certificate path provided")
         return None
-        
-    cert_file = Path(cert_path)
-    if not cert_file.exists():
-        logger.error(f"Certificate file not found: {cert_path}")
-        raise ValueError(f"Certificate file not found: {cert_path}")
-    
-    logger.info(f"Processing certificate: {cert_path}")
     
-    # If it's already .pem, return as is
-    if cert_file.suffix.lower() == '.pem':
-        logger.debug("Certificate is already in PEM format")
-        return str(cert_file)
-    
-    # For .cer files, try to determine format and convert if needed
-    if cert_file.suffix.lower() == '.cer':
-        try:
-            logger.debug("Attempting to process .cer certificate")
-            # Try reading as text/PEM format
-            with open(cert_file, 'r') as f:
-                content = f.read()
-            if '-----BEGIN CERTIFICATE-----' in content:
-                logger.info("Certificate is in PEM format, converting extension")
-                new_path = str(cert_file.with_suffix('.pem'))
-                with open(new_path, 'w') as f:
-                    f.write(content)
-                return new_path
-            else:
-                logger.info("Certificate appears to be in DER format, converting to PEM")
-                new_path = str(cert_file.with_suffix('.pem'))
-                os.system(f'openssl x509 -inform DER -in "{cert_path}" -out "{new_path}"')
-                return new_path
-        except Exception as e:
-            logger.error(f"Failed to process certificate: {str(e)}", exc_info=True)
-            raise ValueError(f"Failed to process certificate: {str(e)}")
-    
-    logger.error("Unsupported certificate format")
-    raise ValueError("Unsupported certificate format. Please provide .cer or .pem file")
+    try:
+        return load_certificate(cert_path)["path"]
+    except ValueError as e:
+        logger.error(str(e))
+        raise
 
+@st.cache_resource
 def get_mainframe_hosts() -> Dict[str, str]:
-    """Get mainframe hosts from Streamlit secrets"""
+    """Get mainframe hosts from Streamlit secrets, read once per process"""
     try:
-        return st.secrets["mainframe_hosts"]
+        return dict(st.secrets["mainframe_hosts"])
     except Exception as e:
         logger.warning(f"Failed to load hosts from secrets: {e}")
         # Fallback to default hosts if secrets not configured
@@ -128,7 +77,50 @@ def get_certificate_path():
     logger.debug("No certificate path found in environment")
     return None
 
+def get_zosmf_port():
+    """Get the z/OSMF HTTPS port from environment variable, 443 if unset"""
+    return int(os.getenv('ZOWE_ZOSMF_PORT', '443'))
+
+@st.cache_resource
+def get_saved_profiles():
+    """Names of the profiles already written to disk by this process"""
+    return set()
+
+def persist_profile(profile_manager, profile_name, host, userid, cert_path):
+    """Write the zosmf profile to zowe.config.json once per process, if enabled
+
+    Sessions authenticate with an in-memory token, so the profile is only a
+    convenience for other Zowe clients and never holds the password.
+    """
+    try:
+        persist = st.secrets["profiles"]["persist"]
+    except Exception:
+        persist = False
+    saved_profiles = get_saved_profiles()
+    if not persist or profile_name in saved_profiles:
+        return
+    
+    properties = {
+        "host": host,
+        "port": get_zosmf_port(),
+        "user": userid,
+        "rejectUnauthorized": True
+    }
+    if cert_path:
+        properties["certFile"] = cert_path
+    
+    logger.debug(f"Saving profile: {profile_name}")
+    profile_manager.set_profile(f"profiles.{profile_name}", {"type": "zosmf", "properties": properties})
+    profile_manager.set_property("defaults.zosmf", profile_name)
+    with get_metrics().timed(LOCAL_HOST, "profile.save"):
+        profile_manager.save()
+    saved_profiles.add(profile_name)
+
 def authenticate_mainframe(userid, password, host):
+    # The SDK modules take a while to import and are only needed once the user logs in
+    from zowe.core_for_zowe_sdk import ProfileManager
+    from zowe.zosmf_for_zowe_sdk import Zosmf
+    
     logger.info(f"Attempting authentication for user {userid} to host {host}")
     try:
         # Get certificate from environment
@@ -142,12 +134,11 @@ def authenticate_mainframe(userid, password, host):
         profile_name = f"zosmf_profile_{userid.lower()}"
         logger.debug(f"Setting up profile: {profile_name}")
         
-        # Create connection dictionary
+        # Create connection dictionary, the password is only sent once to get a token
         connection = {
             "host": host,
-            "port": 443,
+            "port": get_zosmf_port(),
             "user": userid,
-            "password": password,
             "protocol": "https",
             "reject_unauthorized": True
         }
@@ -156,52 +147,42 @@ def authenticate_mainframe(userid, password, host):
             logger.debug(f"Adding certificate to connection")
             connection["cert_file"] = cert_path
         
-        # Test z/OSMF connection first
+        # Log in once and test the z/OSMF connection with the token
         logger.info("Testing z/OSMF connection")
+        token = None
         try:
-            zosmf = Zosmf(connection)
+            token = get_connection_pool().get(connection).login(userid, password)
+            zosmf = get_connection_pool().get(token_connection(connection, token)).api(Zosmf)
             zosmf_info = zosmf.get_info()
         except Exception as e:
+            # Only this login's session; the login session itself may be in use by another login of the user
+            if token:
+                get_connection_pool().release(token_connection(connection, token))
             logger.error(f"Z/OSMF connection test failed: {str(e)}")
             raise ValueError(f"Connection failed: {str(e)}")
         
-        # If connection successful, save the profile
-        # Set the base profile properties
-        profile_manager.set_property("profiles.base.properties.host", host)
-        profile_manager.set_property("profiles.base.properties.port", 443)
-        profile_manager.set_property("profiles.base.properties.protocol", "https")
-        profile_manager.set_property("profiles.base.properties.rejectUnauthorized", True)
-        
-        # Set the zosmf profile properties
-        profile_manager.set_property(f"profiles.{profile_name}.type", "zosmf")
-        profile_manager.set_property(f"profiles.{profile_name}.properties.host", host)
-        profile_manager.set_property(f"profiles.{profile_name}.properties.port", 443)
-        profile_manager.set_property(f"profiles.{profile_name}.properties.user", userid)
-        profile_manager.set_property(f"profiles.{profile_name}.properties.password", password)
-        profile_manager.set_property(f"profiles.{profile_name}.properties.rejectUnauthorized", True)
-        
-        if cert_path:
-            profile_manager.set_property(f"profiles.{profile_name}.properties.certFile", cert_path)
-        
-        # Set as default profile
-        profile_manager.set_property("defaults.zosmf", profile_name)
-        
-        # Save profile to disk
-        logger.debug("Saving profile")
-        profile_manager.save()
+        # If connection successful, optionally save the profile
+        persist_profile(profile_manager, profile_name, host, userid, cert_path)
         
         # Create secure wrapper
         secure_profile = SecureProfileManager(profile_manager)
         
+        # Store the token for the lifetime of the session, readable by every replica
+        session_id = secrets.token_urlsafe(16)
+        save_session(session_id, connection, token, profile_name, secure_profile.creation_time,
+                     secure_profile.expiry_duration)
+        
         # Store in session state
         st.session_state.auth_success = True
         st.session_state.secure_profile = secure_profile
-        st.session_state.auth_time = datetime.now()
+        st.session_state.auth_time = secure_profile.creation_time
         st.session_state.profile_name = profile_name
         st.session_state.connection = connection  # Store connection for reuse
+        st.session_state.session_id = session_id
         
-        logger.info(f"Successfully connected to z/OSMF version: {zosmf_info.get('zosmf_version', 'unknown')}")
-        return True, f"Successfully connected to z/OSMF! Server version: {zosmf_info.get('zosmf_version', 'unknown')}"
+        zosmf_version = getattr(zosmf_info, 'zosmf_version', None) or 'unknown'
+        logger.info(f"Successfully connected to z/OSMF version: {zosmf_version}")
+        return True, f"Successfully connected to z/OSMF! Server version: {zosmf_version}"
         
     except Exception as e:
         st.session_state.auth_success = False
@@ -227,9 +208,8 @@ def main():
     if st.session_state.auth_success and hasattr(st.session_state, 'secure_profile'):
         if st.session_state.secure_profile.is_expired():
             st.warning("Session expired. Please login again.")
-            st.session_state.auth_success = False
-            st.session_state.secure_profile.cleanup()
-            st.session_state.secure_profile = None
+            # Log out and release the pooled connection, as the logout button does
+            cleanup_session()
             st.rerun()
     
     # Show logout button if already authenticated
@@ -239,6 +219,7 @@ def main():
             try:
                 if hasattr(st.session_state, 'secure_profile') and st.session_state.secure_profile:
                     st.session_state.secure_profile.cleanup()
+                release_connection()
                 if hasattr(st.session_state, 'profile_name'):
                     # Clean up profile file
                     profile_path = os.path.join(os.path.expanduser("~"), ".zowe", "profiles", f"{st.session_state.profile_name}.yaml")
@@ -248,7 +229,7 @@ def main():
                 logger.error(f"Logout cleanup failed: {str(e)}")
             finally:
                 # Clear session state
-                for key in ['auth_success', 'secure_profile', 'current_host', 'profile_name', 'auth_time', 'connection']:
+                for key in ['auth_success', 'secure_profile', 'current_host', 'profile_name', 'auth_time', 'connection', 'session_id', 'session_key']:
                     if key in st.session_state:
                         del st.session_state[key]
             st.rerun()
@@ -0,0 +1,536 @@
+"""Local stand-in for the z/OSMF REST API, for benchmarks
+
+Serves the endpoints the app uses: info, authenticate, dataset and
+member list, create, read (text, binary and record mode, record ranges,
+ETags, gzip, search) and write, job submit and status, and spool file
+list and records. Jobs do not run; callers drive them through
+``MockZosmf.jobs``. Latency, per-connection bandwidth, error responses and
+dropped connections can be injected; injected faults come from a seeded
+random generator, so a run with the same seed sees the same faults in
+the same order.
+"""
+import base64
+import datetime
+import gzip
+import hashlib
+import http.server
+import ipaddress
+import json
+import os
+import random
+import re
+import secrets
+import ssl
+import tempfile
+import threading
+import time
+import zlib
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+
+from utils.codec_utils import VARIABLE_FORMATS, encode_text
+
+# Bytes written per socket send, also the granularity of bandwidth pacing
+SEND_BLOCK = 64 * 1024
+
+DEFAULT_MAX_ITEMS = 1000
+
+
+class _Dataset:
+    def __init__(self, name, data, recfm='FB', lrecl=80):
+        self.name = name
+        self.recfm = recfm
+        self.lrecl = lrecl
+        self.encoded = {}
+        # ISPF modification level of a member, counting the writes after the first
+        self.modifications = -1
+        self.set_data(data)
+
+    def set_data(self, data, data_type='text'):
+        self.modifications += 1
+        self.data = bytes(data)
+        self.data_type = data_type
+        self.etag = hashlib.sha256(self.data).hexdigest()[:16]
+        self.encoded.clear()
+        self._line_starts = None
+
+    def records(self, start, count):
+        """Bytes of ``count`` text records from record ``start``"""
+        if self._line_starts is None:
+            ends = np.flatnonzero(np.frombuffer(self.data, dtype=np.uint8) == 0x0A) + 1
+            self._line_starts = np.concatenate(([0], ends))
+        starts = self._line_starts
+        first = min(start, len(starts) - 1)
+        last = min(start + count, len(starts) - 1)
+        return self.data[int(starts[first]):int(starts[last])] if last > first else b''
+
+    def content(self, data_type):
+        """The dataset as z/OSMF would send it for an X-IBM-Data-Type"""
+        if data_type == 'text' or self.data_type != 'text':
+            return self.data
+        if data_type not in self.encoded:
+            recfm = self.recfm if data_type == 'binary' else 'VB'
+            lrecl = self.lrecl if recfm not in VARIABLE_FORMATS else self.lrecl + 4
+            self.encoded[data_type] = encode_text(self.data.decode('utf-8'), recfm, lrecl)
+        return self.encoded[data_type]
+
+
+class _Job:
+    """A submitted job; its spool output and end are set by the caller"""
+
+    def __init__(self, number, jcl):
+        match = re.match(r'//(\S+)\s+JOB\b', jcl)
+        self.jobname = match.group(1) if match else 'MOCKJOB'
+        self.jobid = f"JOB{number:05d}"
+        self.correlator = f"J{number:07d}MOCK"
+        self.jcl = jcl
+        self.status = 'INPUT'
+        self.retcode = None
+        # Spool file id -> (ddname, stepname, records)
+        self.spool = {}
+        self.lock = threading.Lock()
+
+    def write(self, ddname, text, stepname='STEP1'):
+        """Append records to the spool file ``ddname``, starting the job"""
+        with self.lock:
+            self.status = 'ACTIVE'
+            for name, _, records in self.spool.values():
+                if name == ddname:
+                    break
+            else:
+                records = []
+                self.spool[len(self.spool) + 1] = (ddname, stepname, records)
+            records.extend(text.splitlines())
+
+    def end(self, retcode='CC 0000'):
+        with self.lock:
+            self.status = 'OUTPUT'
+            self.retcode = retcode
+
+    def describe(self):
+        with self.lock:
+            return {'jobname': self.jobname, 'jobid': self.jobid, 'job-correlator': self.correlator,
+                    'owner': 'IBMUSER', 'type': 'JOB', 'status': self.status, 'retcode': self.retcode}
+
+
+class MockZosmf:
+    """Threaded HTTPS server answering like z/OSMF
+
+    ``latency`` seconds pass before every response, bodies are sent at
+    most at ``bandwidth`` bytes per second per connection, ``error_rate``
+    of the requests get a 503 and ``disconnect_rate`` of the downloads
+    are cut off part way through the body. Without ``search_support`` the
+    search parameters are ignored, like on an older z/OSMF, and without
+    ``gzip_uploads`` gzip-encoded request bodies are refused with a 415.
+    """
+
+    def __init__(self, latency=0.0, bandwidth=None, error_rate=0.0, disconnect_rate=0.0, gzip_responses=False,
+                 seed=0, password=None, search_support=True, gzip_uploads=True):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.disconnect_rate = disconnect_rate
+        self.gzip_responses = gzip_responses
+        self.password = password
+        self.search_support = search_support
+        self.gzip_uploads = gzip_uploads
+        self.datasets = {}
+        self.jobs = {}
+        self.requests = 0
+        self.faults = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._directory = tempfile.mkdtemp(prefix='mock_zosmf_')
+        self._server = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    @property
+    def ca_file(self):
+        return os.path.join(self._directory, 'cert.pem')
+
+    def add_dataset(self, name, data=b'', recfm='FB', lrecl=80):
+        with self._lock:
+            self.datasets[name.upper()] = _Dataset(name.upper(), data, recfm, lrecl)
+
+    def draw(self):
+        """Next number of the seeded fault generator"""
+        with self._lock:
+            return self._random.random()
+
+    def start(self, host='127.0.0.1', port=0):
+        """Serve on a daemon thread with a fresh self-signed certificate"""
+        key_file = os.path.join(self._directory, 'key.pem')
+        _write_certificate(host, self.ca_file, key_file)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(self.ca_file, key_file)
+
+        handler = type('Handler', (_Handler,), {'mock': self})
+        self._server = http.server.ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        # Handshakes happen on the handler threads, not the accept loop
+        self._server.socket = context.wrap_socket(self._server.socket, server_side=True,
+                                                  do_handshake_on_connect=False)
+        # A short poll interval lets stop() return quickly
+        threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, name='mock-zosmf',
+                         daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def _write_certificate(host, cert_file, key_file):
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, host)])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=5))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName('localhost'),
+                                                    x509.IPAddress(ipaddress.ip_address('127.0.0.1'))]),
+                       critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    with open(cert_file, 'wb') as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_file, 'wb') as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+
+
+def _dslevel_pattern(dslevel):
+    """Regex of a DSLEVEL filter: ``*`` within one qualifier, ``**`` across them"""
+    parts = re.split(r'(\*\*|\*|%)', dslevel.upper())
+    wildcards = {'**': '.*', '*': '[^.]*', '%': '[^.]'}
+    return re.compile(''.join(wildcards.get(part, re.escape(part)) for part in parts) + '$')
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    mock = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            self.request.do_handshake()
+        except (ssl.SSLError, OSError):
+            return
+        super().handle()
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        mock = self.mock
+        body = self._read_body()
+        with mock._lock:
+            mock.requests += 1
+        if mock.latency:
+            time.sleep(mock.latency)
+        if mock.error_rate and mock.draw() < mock.error_rate:
+            with mock._lock:
+                mock.faults += 1
+            return self._send_json(503, {'rc': 8, 'reason': 0, 'message': 'Injected failure'})
+        if body is None:
+            return self._send_json(415, {'message': 'Content-Encoding gzip is not supported'})
+
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/')
+        query = parse_qs(url.query)
+        if path == '/zosmf/services/authenticate':
+            return self._authenticate(method)
+        if 'Authorization' not in self.headers and 'Cookie' not in self.headers:
+            return self._send_json(401, {'message': 'Not authenticated'})
+        if path == '/zosmf/info' and method == 'GET':
+            return self._send_json(200, {'zosmf_version': '29', 'zosmf_full_version': '29.0',
+                                         'zos_version': '04.29.00', 'api_version': '1',
+                                         'zosmf_hostname': 'mock', 'zosmf_port': str(self.server.server_address[1]),
+                                         'plugins': []})
+        if path.startswith('/zosmf/restjobs/jobs'):
+            # The SDK sends 'jobname/jobid' and 'correlator/files' as one encoded path segment
+            return self._jobs(method, unquote(path)[len('/zosmf/restjobs/jobs'):], body)
+        if path == '/zosmf/restfiles/ds' and method == 'GET':
+            return self._list(query)
+        match = re.fullmatch(r'/zosmf/restfiles/ds/([^/]+)/member', path)
+        if match and method == 'GET':
+            return self._members(unquote(match.group(1)).upper(), query)
+        match = re.fullmatch(r'/zosmf/restfiles/ds/([^/]+)', path)
+        if match:
+            name = unquote(match.group(1)).upper()
+            if method == 'GET':
+                return self._read(name, query)
+            if method == 'PUT':
+                return self._write(name, body)
+            if method == 'POST':
+                return self._create(name, body)
+        self._send_json(404, {'message': f'No mock for {method} {path}'})
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+            body = b''.join(parts)
+        else:
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.headers.get('Content-Encoding', '').lower() == 'gzip':
+            # None tells the dispatcher to refuse the request
+            body = gzip.decompress(body) if self.mock.gzip_uploads else None
+        return body
+
+    def _authenticate(self, method):
+        if method == 'DELETE':
+            return self._send_empty(204)
+        if 'Authorization' not in self.headers:
+            return self._send_json(401, {'message': 'Credentials required'})
+        if self.mock.password is not None:
+            _, _, password = base64.b64decode(self.headers['Authorization'].split()[-1]).decode().partition(':')
+            if password != self.mock.password:
+                return self._send_json(401, {'message': 'Invalid credentials'})
+        self.send_response(200)
+        self.send_header('Set-Cookie', f'jwtToken={secrets.token_hex(16)}; Path=/; Secure; HttpOnly')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def _list(self, query):
+        pattern = _dslevel_pattern(unquote(query.get('dslevel', [''])[0]))
+        start = unquote(query.get('start', [''])[0]).upper()
+        max_items = int(self.headers.get('X-IBM-Max-Items') or DEFAULT_MAX_ITEMS) or len(self.mock.datasets)
+        with self.mock._lock:
+            # Members are stored as 'PDS(MEMBER)'; the PDS is listed once, with the attributes of a member
+            by_name = {}
+            for key, dataset in self.mock.datasets.items():
+                by_name.setdefault(key.split('(', 1)[0], (dataset, '(' in key))
+            names = sorted(name for name in by_name if pattern.match(name) and name >= start)
+            datasets = [(name, *by_name[name]) for name in names]
+        page = datasets[:max_items]
+        if self.headers.get('X-IBM-Attributes', '').startswith('base'):
+            items = [{'dsname': name, 'dsorg': 'PO' if partitioned else 'PS', 'recfm': ds.recfm,
+                      'lrecl': str(ds.lrecl), 'blksz': str(ds.lrecl * 340), 'vol': 'MOCK01'}
+                     for name, ds, partitioned in page]
+        else:
+            items = [{'dsname': name} for name, _, _ in page]
+        self._send_json(200, {'items': items, 'returnedRows': len(items), 'totalRows': len(datasets),
+                              'moreRows': len(datasets) > len(page), 'JSONversion': 1})
+
+    def _members(self, name, query):
+        """Members of a PDS, stored as datasets named 'PDS(MEMBER)'"""
+        start = unquote(query.get('start', [''])[0]).upper()
+        max_items = int(self.headers.get('X-IBM-Max-Items') or DEFAULT_MAX_ITEMS) or len(self.mock.datasets)
+        prefix = name + '('
+        with self.mock._lock:
+            if name in self.mock.datasets:
+                return self._send_json(400, {'category': 4, 'rc': 8, 'reason': 0,
+                                             'message': f'{name} is not a partitioned data set'})
+            members = sorted(key[len(prefix):-1] for key in self.mock.datasets
+                             if key.startswith(prefix) and key[len(prefix):-1] >= start)
+        if not members and not start:
+            return self._send_json(404, {'message': f'Data set {name} not found'})
+        page = members[:max_items]
+        with self.mock._lock:
+            modifications = {member: self.mock.datasets[f"{prefix}{member})"].modifications for member in page}
+        items = [{'member': member, 'vers': 1, 'mod': modifications[member], 'm4date': '2024/01/01',
+                  'mtime': '00:00', 'msec': '00', 'mnorc': 0} for member in page]
+        self._send_json(200, {'items': items, 'returnedRows': len(items), 'moreRows': len(members) > len(page),
+                              'JSONversion': 1})
+
+    def _search(self, dataset, query):
+        """Records from the first match of ``search``/``research`` at or after the requested record"""
+        flags = re.IGNORECASE if query.get('insensitive', ['true'])[0] == 'true' else 0
+        if 'research' in query:
+            pattern = re.compile(query['research'][0], flags)
+        else:
+            pattern = re.compile(re.escape(query['search'][0]), flags)
+        record_range = self.headers.get('X-IBM-Record-Range')
+        start = int(re.split(r'[,-]', record_range)[0]) if record_range else 0
+        count = int(query.get('maxreturnsize', ['100'])[0])
+        lines = dataset.data.decode('utf-8', errors='replace').split('\n')
+        for number in range(start, len(lines)):
+            if pattern.search(lines[number]):
+                data = '\n'.join(lines[number:number + count]).encode() + b'\n'
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; charset=UTF-8')
+                self.send_header('X-IBM-Record-Range', f'{number},{min(count, len(lines) - number)}')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+        self._send_empty(200)
+
+    def _jobs(self, method, path, body):
+        mock = self.mock
+        if not path and method == 'PUT':
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                name = re.fullmatch(r"//'(.+)'", json.loads(body)['file']).group(1).upper()
+                dataset = mock.datasets.get(name)
+                if dataset is None:
+                    return self._send_json(404, {'message': f'Data set {name} not found'})
+                body = dataset.data
+            with mock._lock:
+                job = _Job(len(mock.jobs) + 1, body.decode('utf-8'))
+                mock.jobs[job.jobid] = job
+            return self._send_json(201, job.describe())
+        with mock._lock:
+            jobs = list(mock.jobs.values())
+        parts = path.strip('/').split('/')
+        if parts[1:2] == ['files'] and method == 'GET':
+            for job in jobs:
+                if job.correlator == parts[0]:
+                    with job.lock:
+                        spool = {file_id: (ddname, stepname, list(records))
+                                 for file_id, (ddname, stepname, records) in job.spool.items()}
+                    if len(parts) == 2:
+                        return self._send_json(200, [
+                            {'id': file_id, 'ddname': ddname, 'stepname': stepname, 'record-count': len(records),
+                             'jobname': job.jobname, 'jobid': job.jobid, 'job-correlator': job.correlator}
+                            for file_id, (ddname, stepname, records) in spool.items()])
+                    if len(parts) == 4 and parts[3] == 'records' and int(parts[2]) in spool:
+                        records = spool[int(parts[2])][2]
+                        start, count = (int(value) for value in
+                                        self.headers.get('X-IBM-Record-Range', f'0,{len(records)}').split(','))
+                        data = ''.join(f"{record}\n" for record in records[start:start + count]).encode()
+                        self.send_response(200)
+                        self.send_header('Content-Type', 'text/plain; charset=UTF-8')
+                        self.send_header('Content-Length', str(len(data)))
+                        self.end_headers()
+                        self.wfile.write(data)
+                        return
+        elif len(parts) == 2 and method == 'GET':
+            for job in jobs:
+                if (job.jobname, job.jobid) == tuple(parts):
+                    return self._send_json(200, job.describe())
+        self._send_json(404, {'message': f'No job for {method} {path}'})
+
+    def _create(self, name, body):
+        options = json.loads(body or b'{}')
+        with self.mock._lock:
+            if name in self.mock.datasets:
+                return self._send_json(500, {'category': 1, 'rc': 4, 'reason': 13,
+                                             'message': 'Data set already exists'})
+            self.mock.datasets[name] = _Dataset(name, b'', options.get('recfm', 'FB'),
+                                                int(options.get('lrecl') or 80))
+        self._send_empty(201)
+
+    def _write(self, name, body):
+        with self.mock._lock:
+            dataset = self.mock.datasets.get(name)
+            pds = name.split('(', 1)[0] + '('
+            if dataset is None and '(' in name and any(key.startswith(pds) for key in self.mock.datasets):
+                # Writing a new member of an existing PDS creates it
+                dataset = self.mock.datasets[name] = _Dataset(name, b'')
+        if dataset is None:
+            return self._send_json(404, {'message': f'Data set {name} not found'})
+        dataset.set_data(body, self.headers.get('X-IBM-Data-Type', 'text').split(';')[0])
+        self._send_empty(204)
+
+    def _read(self, name, query):
+        dataset = self.mock.datasets.get(name)
+        if dataset is None:
+            return self._send_json(404, {'message': f'Data set {name} not found'})
+        if self.mock.search_support and ('search' in query or 'research' in query):
+            return self._search(dataset, query)
+        if self.headers.get('If-None-Match') == dataset.etag:
+            self.send_response(304)
+            self.send_header('ETag', dataset.etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        data_type = self.headers.get('X-IBM-Data-Type', 'text').split(';')[0]
+        record_range = self.headers.get('X-IBM-Record-Range')
+        if record_range and data_type == 'text':
+            start, count = (int(value) for value in record_range.split(','))
+            data = dataset.records(start, count)
+        else:
+            data = dataset.content(data_type)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=UTF-8' if data_type == 'text'
+                         else 'application/octet-stream')
+        self.send_header('ETag', dataset.etag)
+        compress = self.mock.gzip_responses and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if compress:
+            self.send_header('Content-Encoding', 'gzip')
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        cut = None
+        if self.mock.disconnect_rate and data and self.mock.draw() < self.mock.disconnect_rate:
+            with self.mock._lock:
+                self.mock.faults += 1
+            cut = int(self.mock.draw() * len(data))
+        self._send_paced(data, compress, cut)
+
+    def _send_paced(self, data, compress, cut=None):
+        """Write a body at most at the configured bandwidth, optionally dropping the connection at ``cut``"""
+        bandwidth = self.mock.bandwidth
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        start = time.monotonic()
+        sent = 0
+        view = memoryview(data)
+        for offset in range(0, len(view), SEND_BLOCK):
+            if cut is not None and offset >= cut:
+                self.close_connection = True
+                self.connection.close()
+                return
+            block = view[offset:offset + SEND_BLOCK]
+            if compressor:
+                block = compressor.compress(block)
+                if block:
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(block), block))
+            else:
+                self.wfile.write(block)
+            sent += len(block)
+            if bandwidth:
+                delay = start + sent / bandwidth - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        if compressor:
+            block = compressor.flush()
+            self.wfile.write(b'%x\r\n%s\r\n0\r\n\r\n' % (len(block), block))
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
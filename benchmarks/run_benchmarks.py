@@ -0,0 +1,321 @@
+"""Benchmarks of the login, download and upload paths against a mock z/OSMF
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --sizes 1,16,64 --concurrency 1,4,8 --latency-ms 20
+
+Every case runs in a fresh process, so its peak RSS is its own. Results
+are printed as a table and written as JSON; with ``--baseline`` the run
+fails when throughput or p95 latency regressed beyond ``--tolerance``.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.mock_zosmf import MockZosmf
+
+SCENARIOS = ('auth', 'download', 'download-binary', 'upload')
+
+HOST = '127.0.0.1'
+USER = 'BENCH'
+PASSWORD = 'bench'
+LRECL = 80
+
+# Logins per worker in the auth scenario
+AUTH_CALLS_PER_WORKER = 10
+
+SETUP_LOGIN_ATTEMPTS = 10
+
+RESULTS_DIR = Path('benchmarks/results')
+
+
+def dataset_text(size_mb, seed):
+    """Deterministic FB 80 text of about ``size_mb`` MB, one record per line"""
+    records = max(1, size_mb * 1024 * 1024 // (LRECL + 1))
+    rows = np.random.default_rng(seed).integers(ord('A'), ord('Z') + 1, size=(records, LRECL + 1), dtype=np.uint8)
+    rows[:, LRECL] = ord('\n')
+    return rows.tobytes()
+
+
+def text_dataset_name(size_mb):
+    return f"BENCH.TEXT.S{size_mb}M"
+
+
+def upload_dataset_name(worker):
+    return f"BENCH.UPLOAD.W{worker}"
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def _peak_rss_mb():
+    """Peak resident memory of this process
+
+    On Linux ru_maxrss also covers the parent the process was forked from,
+    VmHWM starts over at exec, so it is preferred where available.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_case(case):
+    """Run one case in this (fresh) process and return its measurements"""
+    os.chdir(case['workdir'])
+    os.environ.pop('ZOWE_CERTIFICATE_PATH', None)
+    # Outside ``streamlit run`` every session state access warns
+    from streamlit import logger as streamlit_logger
+    streamlit_logger.set_log_level(logging.ERROR)
+    logging.disable(logging.CRITICAL)
+    import Home
+    import streamlit as st
+    from zowe.zos_files_for_zowe_sdk import Datasets
+    from utils.auth_utils import get_or_create_connection
+    from utils.codec_utils import decode_file, decoded_path
+    from utils.resume_utils import resumable_download, resumable_upload, with_retries
+    from utils.transfer_utils import get_record_format, stream_binary_download
+
+    errors = []
+    # Log in for the transfers; injected faults may hit the login too
+    for _ in range(SETUP_LOGIN_ATTEMPTS):
+        success, message = Home.authenticate_mainframe(USER, PASSWORD, HOST)
+        if success:
+            break
+        errors.append(message.splitlines()[0].strip())
+    else:
+        raise RuntimeError(message)
+    connection = get_or_create_connection()
+
+    scenario = case['scenario']
+    dataset_name = text_dataset_name(case['size_mb'])
+    payload = dataset_text(case['size_mb'], case['seed']) if scenario == 'upload' else None
+
+    def work(worker):
+        """One unit of the scenario; returns (bytes, seconds of each call)"""
+        output_path = os.path.join(case['workdir'], f"{scenario}_{worker}.out")
+        if scenario == 'auth':
+            timings = []
+            for _ in range(AUTH_CALLS_PER_WORKER):
+                start = time.perf_counter()
+                success, message = Home.authenticate_mainframe(USER, PASSWORD, HOST)
+                if success:
+                    timings.append(time.perf_counter() - start)
+                else:
+                    errors.append(message.splitlines()[0].strip())
+            return 0, timings
+        datasets_api = connection.api(Datasets)
+        start = time.perf_counter()
+        if scenario == 'download':
+            result = resumable_download(datasets_api, HOST, dataset_name, output_path,
+                                        checkpoint_dir=os.path.join(case['workdir'], '.transfers'))
+            size = result['bytes']
+        elif scenario == 'download-binary':
+            recfm, lrecl = get_record_format(datasets_api, dataset_name)
+            result = with_retries(lambda: stream_binary_download(datasets_api, dataset_name, output_path),
+                                  f"Download of {dataset_name}")
+            decode_file(output_path, decoded_path(output_path, 'IBM-1047'), recfm, lrecl)
+            size = result['bytes']
+        else:
+            result = resumable_upload(datasets_api, upload_dataset_name(worker), payload)
+            size = result['bytes']
+        return size, [time.perf_counter() - start]
+
+    results = [None] * case['concurrency']
+
+    def run_worker(worker):
+        try:
+            results[worker] = work(worker)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}".strip())
+            results[worker] = (0, [])
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run_worker, args=(worker,)) for worker in range(case['concurrency'])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    st.session_state.clear()
+
+    return {
+        'bytes': sum(size for size, _ in results),
+        'seconds': wall,
+        'latencies': [seconds for _, timings in results for seconds in timings],
+        'errors': errors,
+        'peak_rss_mb': _peak_rss_mb()
+    }
+
+
+def _summarize(case, runs):
+    latencies = [seconds for run in runs for seconds in run['latencies']]
+    throughputs = [run['bytes'] / (1024 * 1024) / run['seconds'] for run in runs if run['seconds']]
+    rss = [run['peak_rss_mb'] for run in runs if run['peak_rss_mb'] is not None]
+    return {
+        'scenario': case['scenario'],
+        'size_mb': case['size_mb'] if case['scenario'] != 'auth' else None,
+        'concurrency': case['concurrency'],
+        'runs': len(runs),
+        'calls': len(latencies),
+        'errors': sum(len(run['errors']) for run in runs),
+        'mb_per_second': round(statistics.median(throughputs), 2) if throughputs else 0.0,
+        'calls_per_second': round(statistics.median(len(run['latencies']) / run['seconds'] for run in runs), 2),
+        'p50_ms': round(_percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(_percentile(latencies, 95) * 1000, 1),
+        'max_ms': round(max(latencies) * 1000, 1) if latencies else 0.0,
+        'peak_rss_mb': round(max(rss), 1) if rss else None,
+        'first_error': next((error for run in runs for error in run['errors']), None)
+    }
+
+
+def _case_key(result):
+    return f"{result['scenario']}/{result['size_mb']}/{result['concurrency']}"
+
+
+def compare(results, baseline, tolerance):
+    """Cases slower than the baseline by more than ``tolerance``, as messages"""
+    previous = {_case_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results:
+        before = previous.get(_case_key(result))
+        if before is None:
+            continue
+        if before['mb_per_second'] and result['mb_per_second'] < before['mb_per_second'] * (1 - tolerance):
+            regressions.append(f"{_case_key(result)}: {result['mb_per_second']} MB/s, "
+                               f"baseline {before['mb_per_second']} MB/s")
+        if before['p95_ms'] and result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{_case_key(result)}: p95 {result['p95_ms']} ms, baseline {before['p95_ms']} ms")
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _print_table(results):
+    columns = ('scenario', 'size_mb', 'concurrency', 'calls', 'errors', 'mb_per_second', 'calls_per_second',
+               'p50_ms', 'p95_ms', 'max_ms', 'peak_rss_mb')
+    widths = [max(len(column), *(len(str(result[column])) for result in results)) for column in columns]
+    print('  '.join(column.rjust(width) for column, width in zip(columns, widths)))
+    for result in results:
+        print('  '.join(str(result[column]).rjust(width) for column, width in zip(columns, widths)))
+
+
+def _integers(text):
+    return [int(value) for value in text.split(',') if value]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated subset of ' +
+                        ', '.join(SCENARIOS))
+    parser.add_argument('--sizes', type=_integers, default=[1, 16, 64], help='Dataset sizes in MB')
+    parser.add_argument('--concurrency', type=_integers, default=[1, 4, 8], help='Parallel transfers per case')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Mock server latency per request')
+    parser.add_argument('--bandwidth-mbps', type=float, default=0.0,
+                        help='Mock server bandwidth per connection in MB/s, 0 for unlimited')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    parser.add_argument('--disconnect-rate', type=float, default=0.0,
+                        help='Fraction of downloads cut off part way through')
+    parser.add_argument('--gzip', action='store_true', help='Mock server compresses downloads')
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the data and the injected faults')
+    parser.add_argument('--output', type=Path, help='JSON report path, under benchmarks/results by default')
+    parser.add_argument('--baseline', type=Path, help='Earlier JSON report to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='Allowed regression against the baseline')
+    args = parser.parse_args(argv)
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(',') if scenario.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    mock = MockZosmf(latency=args.latency_ms / 1000, bandwidth=args.bandwidth_mbps * 1024 * 1024 or None,
+                     error_rate=args.error_rate, disconnect_rate=args.disconnect_rate, gzip_responses=args.gzip,
+                     seed=args.seed, password=PASSWORD).start(HOST)
+    for size_mb in args.sizes:
+        mock.add_dataset(text_dataset_name(size_mb), dataset_text(size_mb, args.seed))
+    for worker in range(max(args.concurrency)):
+        mock.add_dataset(upload_dataset_name(worker))
+
+    # Inherited by the case processes: trust the mock's certificate, talk to its port
+    os.environ['REQUESTS_CA_BUNDLE'] = mock.ca_file
+    os.environ['ZOWE_ZOSMF_PORT'] = str(mock.port)
+
+    cases = []
+    for scenario in scenarios:
+        for size_mb in ([None] if scenario == 'auth' else args.sizes):
+            for concurrency in args.concurrency:
+                cases.append({'scenario': scenario, 'size_mb': size_mb, 'concurrency': concurrency,
+                              'seed': args.seed})
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory(prefix='zowe_bench_') as workdir:
+        for case in cases:
+            runs = []
+            for _ in range(args.repeat):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    runs.append(executor.submit(run_case, {**case, 'workdir': workdir}).result())
+            results.append(_summarize(case, runs))
+            print(f"{_case_key(results[-1])}: {results[-1]['mb_per_second']} MB/s, "
+                  f"p95 {results[-1]['p95_ms']} ms, {results[-1]['errors']} errors", file=sys.stderr)
+    mock.stop()
+
+    print()
+    _print_table(results)
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'parameters': {key: (str(value) if isinstance(value, Path) else value) for key, value in vars(args).items()},
+        'server': {'requests': mock.requests, 'injected_faults': mock.faults},
+        'results': results
+    }
+    output = args.output or RESULTS_DIR / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nReport written to {output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Startup benchmark of Home.py and certificate processing
+
+Run from the repository root:
+
+    python -m benchmarks.startup_benchmark --repeat 5 --reruns 20
+
+Each repeat starts a fresh interpreter and measures starting Streamlit's
+test harness, the first run of Home.py (the cold start a user waits for on
+first page load) and its later reruns, less the harness's own per-run
+overhead measured on an empty script. Certificate processing is timed
+cold and memoized on a generated DER ``.cer``, next to the ``openssl``
+conversion it replaced when that is installed. Results are printed and
+written as JSON; with ``--baseline`` the run fails when a timing regressed
+beyond ``--tolerance``.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.mock_zosmf import _write_certificate
+from benchmarks.run_benchmarks import RESULTS_DIR, _git_revision
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Lower is better for every metric reported
+METRICS = ('harness_import_ms', 'cold_start_ms', 'rerun_ms', 'cert_cold_ms', 'cert_cached_ms')
+
+_CHILD = """
+import json, sys, time
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner
+
+# The server compiles a script once and reuses the bytecode; the harness recompiles every run unless shared
+shared_cache = ScriptCache()
+app_test.ScriptCache = local_script_runner.ScriptCache = lambda: shared_cache
+
+def timed_runs(app, count):
+    times = []
+    for _ in range(count):
+        began = time.perf_counter()
+        app.run()
+        times.append(time.perf_counter() - began)
+    return sorted(times)[len(times) // 2]
+
+start = time.perf_counter()
+# An empty script pays the harness start-up and gives its per-run overhead, subtracted below
+blank = AppTest.from_file(sys.argv[2], default_timeout=60)
+blank.run()
+harness = time.perf_counter() - start
+overhead = timed_runs(blank, int(sys.argv[3]))
+app = AppTest.from_file(sys.argv[1], default_timeout=60)
+began = time.perf_counter()
+app.run()
+first = time.perf_counter() - began
+if app.exception:
+    raise SystemExit(str(app.exception[0].value))
+rerun = timed_runs(app, int(sys.argv[3]))
+print(json.dumps({'harness_import_ms': harness * 1000, 'cold_start_ms': max(0.0, first - overhead) * 1000,
+                  'rerun_ms': max(0.0, rerun - overhead) * 1000}))
+"""
+
+
+def _workdir():
+    """Scratch directory with the example secrets, so logs and profiles stay out of the repository"""
+    workdir = Path(tempfile.mkdtemp(prefix='zowe-startup-'))
+    (workdir / '.streamlit').mkdir()
+    shutil.copy(REPO_ROOT / '.streamlit' / 'secrets.example.toml', workdir / '.streamlit' / 'secrets.toml')
+    return workdir
+
+
+def _der_certificate(directory):
+    """A self-signed certificate written as DER with a .cer extension"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives.serialization import Encoding
+
+    pem_file, key_file = directory / 'server.pem', directory / 'server.key'
+    _write_certificate('127.0.0.1', str(pem_file), str(key_file))
+    certificate = x509.load_pem_x509_certificate(pem_file.read_bytes())
+    cer_file = directory / 'server.cer'
+    cer_file.write_bytes(certificate.public_bytes(Encoding.DER))
+    pem_file.unlink()
+    return cer_file
+
+
+def run_startup(workdir, cert_file, reruns):
+    """Cold start and rerun timings of Home.py in a fresh interpreter"""
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT), ZOWE_CERTIFICATE_PATH=str(cert_file))
+    blank = workdir / 'blank.py'
+    blank.write_text('')
+    result = subprocess.run([sys.executable, '-c', _CHILD, str(REPO_ROOT / 'Home.py'), str(blank), str(reruns)],
+                            cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run_certificate(directory, calls=1000):
+    """Cold and memoized certificate processing, and the openssl call it replaced"""
+    from utils.cert_utils import load_certificate
+
+    cert_file = _der_certificate(directory)
+    start = time.perf_counter()
+    load_certificate(cert_file)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(calls):
+        load_certificate(cert_file)
+    result = {'cert_cold_ms': cold * 1000, 'cert_cached_ms': (time.perf_counter() - start) / calls * 1000}
+    if shutil.which('openssl'):
+        start = time.perf_counter()
+        os.system(f'openssl x509 -inform DER -in "{cert_file}" -out "{directory / "openssl.pem"}"')
+        result['openssl_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def compare(result, baseline, tolerance):
+    """Metrics slower than the baseline by more than ``tolerance``"""
+    regressions = []
+    for metric in METRICS:
+        before, after = baseline.get(metric), result.get(metric)
+        # Sub-millisecond timings are too noisy to compare
+        if before and after and before >= 1.0 and after > before * (1 + tolerance):
+            regressions.append(f"{metric}: {before:.1f}ms -> {after:.1f}ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters started')
+    parser.add_argument('--reruns', type=int, default=20, help='Reruns of Home.py per interpreter')
+    parser.add_argument('--output', type=Path, help='JSON report path, under benchmarks/results by default')
+    parser.add_argument('--baseline', type=Path, help='Earlier JSON report to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed regression against the baseline')
+    args = parser.parse_args(argv)
+
+    workdir = _workdir()
+    try:
+        cert_file = _der_certificate(workdir)
+        runs = [run_startup(workdir, cert_file, args.reruns) for _ in range(args.repeat)]
+        result = {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+        result.update(run_certificate(workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for metric, value in result.items():
+        print(f"{metric:<20} {value:10.3f}")
+
+    report = {'created': datetime.now().isoformat(timespec='seconds'), 'revision': _git_revision(),
+              'python': platform.python_version(), 'repeat': args.repeat, 'reruns': args.reruns,
+              'result': result}
+    output = args.output or RESULTS_DIR / f"startup-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Report written to {output}")
+
+    if args.baseline:
+        regressions = compare(result, json.loads(args.baseline.read_text())['result'], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
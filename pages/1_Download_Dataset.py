@@ -1,41 +1,314 @@
 import streamlit as st
 from zowe.zos_files_for_zowe_sdk import Datasets
 from utils.auth_utils import get_or_create_connection
+from utils.transfer_utils import (describe_compression, format_bytes, get_record_format, get_transfer_config,
+                                  read_preview, stream_binary_download)
+from utils.codec_utils import CODE_PAGES, FIXED_FORMATS, VARIABLE_FORMATS, decode_file, decoded_path
+from utils.queue_utils import download_task, get_transfer_manager
+from utils.resume_utils import resumable_download, with_retries
+from utils.batch_utils import download_batch, resolve_dataset_names
+from utils.catalog_utils import dataset_picker
+from utils.pds_utils import download_members
+from utils.sync_utils import get_sync_index
+from utils.cache_utils import get_content_cache
+from utils.copybook_utils import PREVIEW_PAGE_ROWS, count_rows, extract_columns, parse_copybook, read_page
 import logging
 import os
+import time
 
 st.title("Download Dataset")
 
 # Get authenticated connection
-profile_manager = get_or_create_connection()
+connection = get_or_create_connection()
+
+# Complete dataset names from the cached catalog instead of typing them exactly
+dataset_picker(connection, "download_dataset_name")
 
 # Create form for dataset download
 with st.form("download_form"):
-    dataset_name = st.text_input("Dataset Name (e.g., 'USERID.DATA.SET')")
+    dataset_name = st.text_input("Dataset Name (e.g., 'USERID.DATA.SET')", key="download_dataset_name")
     download_path = st.text_input("Local Download Path", "downloaded_dataset.txt")
+    transfer_mode = st.radio("Transfer Mode",
+                             options=["Text", "Binary (records)"],
+                             horizontal=True,
+                             help="Binary keeps packed-decimal and other binary fields intact "
+                                  "and decodes the records locally")
+    code_page = st.selectbox("Code Page", options=CODE_PAGES, help="Used to decode binary transfers")
+    use_cache = st.checkbox("Use shared cache", value=True,
+                            help="Reuse a cached copy if z/OSMF confirms it is unchanged (text mode)")
+    run_in_background = st.checkbox("Run in background",
+                                    help="Queue the download and follow it on the Transfers page")
     
     submit = st.form_submit_button("Download Dataset")
     
-    if submit:
+    if submit and run_in_background:
+        try:
+            os.makedirs(os.path.dirname(download_path) if os.path.dirname(download_path) else '.', exist_ok=True)
+            task = download_task(connection, dataset_name, download_path, st.session_state.current_host,
+                                 binary=transfer_mode != "Text", code_page=code_page,
+                                 cache=get_content_cache() if use_cache and transfer_mode == "Text" else None)
+            job = get_transfer_manager().submit(st.session_state.session_id, 'download', dataset_name,
+                                                download_path, st.session_state.current_host, task)
+            st.success(f"Download of {dataset_name} queued as transfer {job.id}, follow it on the Transfers page")
+        except Exception as e:
+            st.error(f"Failed to queue download: {str(e)}")
+            logging.error(f"Queueing dataset download failed: {str(e)}", exc_info=True)
+    elif submit:
         try:
-            datasets_api = Datasets(profile_manager)
+            datasets_api = connection.api(Datasets)
+            
+            # Create directory if it doesn't exist
+            os.makedirs(os.path.dirname(download_path) if os.path.dirname(download_path) else '.', exist_ok=True)
+            
+            progress_bar = st.progress(0.0, text="Starting download...")
+            
+            def show_progress(bytes_written, records, total_bytes):
+                """Update the progress bar from the streaming download"""
+                label = f"{format_bytes(bytes_written)} / {records:,} records"
+                if total_bytes:
+                    progress_bar.progress(min(bytes_written / total_bytes, 1.0), text=label)
+                else:
+                    progress_bar.progress(0.0, text=f"{label} received")
+            
+            def show_raw_progress(bytes_written, total_bytes):
+                """Update the progress bar from the binary download"""
+                label = f"{format_bytes(bytes_written)} of raw records"
+                progress_bar.progress(min(bytes_written / total_bytes, 1.0) if total_bytes else 0.0, text=label)
+            
+            preview_path = download_path
+            if transfer_mode == "Text":
+                # Stream the dataset to disk chunk by chunk
+                if use_cache:
+                    result = with_retries(lambda: get_content_cache().fetch(datasets_api, st.session_state.current_host,
+                                                                            dataset_name, download_path,
+                                                                            progress_callback=show_progress),
+                                          f"Download of {dataset_name}")
+                else:
+                    # Streamed download, resumes from its checkpoint after a failure
+                    result = resumable_download(datasets_api, st.session_state.current_host, dataset_name,
+                                                download_path, progress_callback=show_progress)
+                    if result['resumed_from']:
+                        st.info(f"Resumed an interrupted download at record {result['resumed_from']:,}")
+                if result.get('cache_hit'):
+                    progress_bar.progress(1.0, text=f"{format_bytes(result['bytes'])} served from cache")
+                    st.success(f"Dataset unchanged, copied from cache to {download_path}")
+                else:
+                    progress_bar.progress(1.0, text=f"{format_bytes(result['bytes'])} / {result['records']:,} records")
+                    st.success(f"Dataset downloaded successfully to {download_path}")
+                    if describe_compression(result):
+                        st.caption(describe_compression(result))
+            else:
+                # Fetch the raw records and decode them locally
+                recfm, lrecl = get_record_format(datasets_api, dataset_name)
+                result = with_retries(lambda: stream_binary_download(
+                    datasets_api, dataset_name, download_path,
+                    data_type='record' if recfm in VARIABLE_FORMATS else 'binary',
+                    progress_callback=show_raw_progress
+                ), f"Download of {dataset_name}")
+                progress_bar.progress(1.0, text=f"{format_bytes(result['bytes'])} of {recfm} records")
+                if describe_compression(result):
+                    st.caption(describe_compression(result))
+                if recfm in FIXED_FORMATS + VARIABLE_FORMATS:
+                    preview_path = decoded_path(download_path, code_page)
+                    decoded = decode_file(download_path, preview_path, recfm, lrecl, code_page)
+                    st.session_state.raw_download = {'path': download_path, 'recfm': recfm, 'lrecl': lrecl,
+                                                     'code_page': code_page}
+                    st.success(f"Raw records saved to {download_path}, {decoded['records']:,} records "
+                               f"decoded to {preview_path} in {decoded['seconds']:.2f}s")
+                else:
+                    preview_path = None
+                    st.success(f"Raw RECFM={recfm} content saved to {download_path}, it is not decoded")
+            
+            # Show a bounded preview of the downloaded content
+            try:
+                if preview_path:
+                    head, tail, truncated = read_preview(preview_path)
+                    st.text_area("Dataset Preview", head, height=300)
+                    if truncated:
+                        st.caption("Preview shows the first and last records only")
+                        st.text_area("Dataset Preview (end)", tail, height=150)
+            except UnicodeDecodeError:
+                st.warning("Unable to preview binary content, try the binary transfer mode")
+                    
+        except Exception as e:
+            st.error(f"Failed to download dataset: {str(e)}")
+            logging.error(f"Dataset download failed: {str(e)}", exc_info=True)
+
+# Shared cache effectiveness
+cache_stats = get_content_cache().stats()
+hits_col, misses_col, saved_col, size_col = st.columns(4)
+hits_col.metric("Cache Hits", f"{cache_stats['hits']:,}")
+misses_col.metric("Cache Misses", f"{cache_stats['misses']:,}")
+saved_col.metric("Bytes Saved", format_bytes(cache_stats['bytes_saved']))
+size_col.metric("Cache Size", format_bytes(cache_stats['size']), f"{cache_stats['entries']:,} entries",
+                delta_color="off")
+
+# Decode raw fixed-length records into typed columns with a COBOL copybook
+st.subheader("Extract Columns with Copybook")
+raw_download = st.session_state.get('raw_download', {})
+
+with st.form("copybook_form"):
+    raw_path = st.text_input("Raw Record File",
+                             raw_download.get('path', ''),
+                             help="A dataset downloaded in binary mode")
+    copybook_file = st.file_uploader("COBOL Copybook", type=["cpy", "cbl", "cob", "txt"])
+    copybook_text = st.text_area("Or paste the copybook")
+    copybook_code_page = st.selectbox("Code Page",
+                                      options=CODE_PAGES,
+                                      index=CODE_PAGES.index(raw_download.get('code_page', CODE_PAGES[0])),
+                                      key="copybook_code_page")
+    record_length = st.number_input("Logical Record Length",
+                                    min_value=0,
+                                    value=raw_download.get('lrecl') or 0,
+                                    help="0 uses the copybook record length")
+    columnar_path = st.text_input("Output File", "extracted.parquet",
+                                  help="Written as Arrow IPC for .arrow/.feather, Parquet otherwise")
+    
+    copybook_submit = st.form_submit_button("Extract Columns")
+    
+    if copybook_submit:
+        try:
+            source = copybook_file.getvalue().decode('utf-8') if copybook_file is not None else copybook_text
+            layout = parse_copybook(source)
+            with st.expander(f"Record layout: {len(layout.fields)} fields, {layout.record_length} bytes"):
+                st.dataframe([field.summary() for field in layout.fields], use_container_width=True)
+            
+            extract_progress = st.progress(0.0, text="Decoding records...")
+            
+            def show_extract_progress(records_done, total_records):
+                """Update the progress bar from the batched extraction"""
+                extract_progress.progress(records_done / total_records if total_records else 1.0,
+                                          text=f"{records_done:,} of {total_records:,} records")
+            
+            result = extract_columns(raw_path, layout, columnar_path, code_page=copybook_code_page,
+                                     lrecl=record_length or None, progress_callback=show_extract_progress)
+            extract_progress.progress(1.0, text=f"{result['records']:,} records")
+            st.session_state.columnar_output = columnar_path
+            st.success(f"Extracted {result['records']:,} records to {columnar_path} in {result['seconds']:.2f}s")
             
-            with st.spinner('Downloading dataset...'):
-                # Create directory if it doesn't exist
-                os.makedirs(os.path.dirname(download_path) if os.path.dirname(download_path) else '.', exist_ok=True)
+        except Exception as e:
+            st.error(f"Failed to extract columns: {str(e)}")
+            logging.error(f"Copybook extraction failed: {str(e)}", exc_info=True)
+
+# Paginated preview of the extracted columns
+columnar_output = st.session_state.get('columnar_output')
+if columnar_output and os.path.exists(columnar_output):
+    try:
+        total_rows = count_rows(columnar_output)
+        page_count = max(1, -(-total_rows // PREVIEW_PAGE_ROWS))
+        page = st.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, value=1)
+        st.dataframe(read_page(columnar_output, page - 1), use_container_width=True)
+        first_row = (page - 1) * PREVIEW_PAGE_ROWS
+        st.caption(f"Rows {first_row + 1:,} to {min(first_row + PREVIEW_PAGE_ROWS, total_rows):,} "
+                   f"of {total_rows:,} in {columnar_output}")
+    except Exception as e:
+        st.error(f"Failed to read {columnar_output}: {str(e)}")
+        logging.error(f"Columnar preview failed: {str(e)}", exc_info=True)
+
+# Batch download of several datasets or DSN patterns
+st.subheader("Batch Download")
+transfer_config = get_transfer_config()
+
+with st.form("batch_download_form"):
+    dataset_entries = st.text_area("Dataset Names or Patterns (one per line, e.g., 'USERID.PROD.**')")
+    target_dir = st.text_input("Local Target Directory", "downloads")
+    max_workers = st.number_input("Parallel Downloads",
+                                  min_value=1,
+                                  max_value=64,
+                                  value=transfer_config["max_workers"],
+                                  help="Number of datasets downloaded at the same time")
+    sync = st.checkbox("Sync: skip datasets unchanged since the last download",
+                       help="Uses the ETag recorded in the local sync index")
+    batch_in_background = st.checkbox("Run in background",
+                                      key="batch_in_background",
+                                      help="Queue one transfer per dataset and follow them on the Transfers page")
+    
+    batch_submit = st.form_submit_button("Download Datasets")
+    
+    if batch_submit:
+        try:
+            datasets_api = connection.api(Datasets)
+            
+            with st.spinner('Resolving dataset names...'):
+                dataset_names = resolve_dataset_names(datasets_api, dataset_entries.splitlines())
+            
+            if not dataset_names:
+                st.warning("No datasets matched")
+            elif batch_in_background:
+                os.makedirs(target_dir, exist_ok=True)
+                for name in dataset_names:
+                    output_path = os.path.join(target_dir, f"{name}.txt")
+                    get_transfer_manager().submit(st.session_state.session_id, 'download', name, output_path,
+                                                  st.session_state.current_host,
+                                                  download_task(connection, name, output_path,
+                                                                st.session_state.current_host))
+                st.success(f"Queued {len(dataset_names)} downloads, follow them on the Transfers page")
+            else:
+                st.info(f"Downloading {len(dataset_names)} datasets")
+                summary = st.empty()
+                table = st.empty()
+                start = time.monotonic()
                 
-                # Download the dataset
-                datasets_api.download(dataset_name, download_path)
-                st.success(f"Dataset downloaded successfully to {download_path}")
+                for rows in download_batch(lambda: connection.api(Datasets), dataset_names, target_dir,
+                                           st.session_state.current_host,
+                                           max_workers=max_workers,
+                                           index=get_sync_index() if sync else None):
+                    finished = sum(row['status'] in ('done', 'skipped', 'failed') for row in rows)
+                    total_bytes = sum(row['bytes'] for row in rows)
+                    summary.progress(finished / len(rows),
+                                     text=f"{finished} of {len(rows)} datasets, {format_bytes(total_bytes)}")
+                    table.dataframe(rows, use_container_width=True)
                 
-                # Show preview of downloaded content
-                try:
-                    with open(download_path, 'r') as f:
-                        content = f.read()
-                        st.text_area("Dataset Preview", content, height=300)
-                except UnicodeDecodeError:
-                    st.warning("Unable to preview binary content")
+                failed = [row for row in rows if row['status'] == 'failed']
+                elapsed = time.monotonic() - start
+                skipped = sum(row['status'] == 'skipped' for row in rows)
+                if failed:
+                    st.error(f"{len(failed)} of {len(rows)} datasets failed")
+                else:
+                    st.success(f"Downloaded {len(rows) - skipped} datasets ({format_bytes(total_bytes)}) "
+                               f"to {target_dir} in {elapsed:.1f}s, {skipped} unchanged datasets skipped")
                     
         except Exception as e:
-            st.error(f"Failed to download dataset: {str(e)}")
-            logging.error(f"Dataset download failed: {str(e)}", exc_info=True) 
\ No newline at end of file
+            st.error(f"Failed to download datasets: {str(e)}")
+            logging.error(f"Batch dataset download failed: {str(e)}", exc_info=True)
+
+# Download every member of a PDS into a directory
+st.subheader("Download PDS Members")
+
+dataset_picker(connection, "download_pds_name", label="Find Partitioned Dataset")
+
+with st.form("pds_download_form"):
+    pds_name = st.text_input("Partitioned Dataset Name (e.g., 'USERID.SOURCE.COBOL')", key="download_pds_name")
+    member_dir = st.text_input("Local Member Directory", "members")
+    member_workers = st.number_input("Parallel Member Downloads",
+                                     min_value=1,
+                                     max_value=64,
+                                     value=transfer_config["max_workers"],
+                                     help="Number of members downloaded at the same time")
+    
+    pds_submit = st.form_submit_button("Download Members")
+    
+    if pds_submit:
+        try:
+            summary = st.empty()
+            table = st.empty()
+            rows = []
+            
+            with st.spinner('Downloading members...'):
+                for rows in download_members(lambda: connection.api(Datasets), pds_name.strip().upper(), member_dir,
+                                             st.session_state.current_host, get_sync_index(),
+                                             max_workers=member_workers):
+                    finished = sum(row['status'] in ('done', 'skipped', 'failed') for row in rows)
+                    summary.progress(finished / len(rows), text=f"{finished} of {len(rows)} members")
+                    table.dataframe(rows, use_container_width=True)
+            
+            counts = {state: sum(row['status'] == state for row in rows) for state in ('done', 'skipped', 'failed')}
+            if counts['failed']:
+                st.error(f"{counts['failed']} of {len(rows)} members failed")
+            else:
+                st.success(f"Downloaded {counts['done']} members to {member_dir}, "
+                           f"{counts['skipped']} unchanged members skipped")
+                    
+        except Exception as e:
+            st.error(f"Failed to download members: {str(e)}")
+            logging.error(f"PDS member download failed: {str(e)}", exc_info=True)
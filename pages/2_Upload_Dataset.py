@@ -1,18 +1,27 @@
 import streamlit as st
 from zowe.zos_files_for_zowe_sdk import Datasets
 from utils.auth_utils import get_or_create_connection
+from utils.transfer_utils import create_dataset, describe_compression, format_bytes, get_transfer_config
+from utils.resume_utils import resumable_upload
+from utils.pds_utils import member_sources, upload_members
+from utils.catalog_utils import dataset_picker
+from utils.sync_utils import get_sync_index
+from utils.codec_utils import CODE_PAGES, VARIABLE_FORMATS, encode_text
+from utils.diff_utils import content_differs
+from utils.queue_utils import get_transfer_manager, upload_task
 import logging
-import os
-from tempfile import NamedTemporaryFile
 
 st.title("Upload Dataset")
 
 # Get authenticated connection
-profile_manager = get_or_create_connection()
+connection = get_or_create_connection()
+
+# Complete dataset names from the cached catalog instead of typing them exactly
+dataset_picker(connection, "upload_dataset_name")
 
 # Create form for dataset upload
 with st.form("upload_form"):
-    dataset_name = st.text_input("Target Dataset Name (e.g., 'USERID.DATA.SET')")
+    dataset_name = st.text_input("Target Dataset Name (e.g., 'USERID.DATA.SET')", key="upload_dataset_name")
     uploaded_file = st.file_uploader("Choose a file to upload")
     
     # Add dataset allocation options
@@ -29,41 +38,131 @@ with st.form("upload_form"):
                            min_value=0,
                            value=80,
                            help="Length of each record")
+    transfer_mode = st.radio("Transfer Mode",
+                             options=["Text", "Records (encode locally)", "Binary (as is)"],
+                             horizontal=True,
+                             help="Records mode encodes each line to EBCDIC with the record format "
+                                  "above; binary uploads the file unchanged")
+    code_page = st.selectbox("Code Page", options=CODE_PAGES, help="Used to encode records")
+    only_changed = st.checkbox("Only upload when the content differs",
+                               help="Streams the dataset and compares it with the file first; "
+                                    "the Compare page shows what would change")
+    run_in_background = st.checkbox("Run in background",
+                                    help="Queue the upload and follow it on the Transfers page")
     
     submit = st.form_submit_button("Upload to Dataset")
     
     if submit and uploaded_file is not None:
         try:
-            datasets_api = Datasets(profile_manager)
+            datasets_api = connection.api(Datasets)
             
-            # Save uploaded file temporarily
-            with st.spinner('Uploading dataset...'):
-                # Use a secure temporary file
-                with NamedTemporaryFile(delete=False) as temp_file:
-                    temp_file.write(uploaded_file.getvalue())
-                    temp_path = temp_file.name
-                
-                try:
-                    # Create dataset if it doesn't exist
-                    try:
-                        datasets_api.create(
-                            dataset_name,
-                            dsorg=dsorg,
-                            recfm=recfm,
-                            lrecl=lrecl if lrecl > 0 else None
-                        )
-                    except Exception as create_error:
-                        logging.warning(f"Dataset might already exist: {str(create_error)}")
-                    
-                    # Upload to mainframe
-                    datasets_api.write(dataset_name, temp_path)
-                    st.success(f"File uploaded successfully to dataset {dataset_name}")
-                
-                finally:
-                    # Cleanup
-                    if os.path.exists(temp_path):
-                        os.remove(temp_path)
+            # Create dataset if it doesn't exist
+            create_dataset(datasets_api, dataset_name, dsorg, recfm, lrecl)
+            
+            progress_bar = st.progress(0.0, text="Starting upload...")
+            
+            def show_progress(bytes_sent, total_bytes):
+                """Update the progress bar from the streaming upload"""
+                fraction = bytes_sent / total_bytes if total_bytes else 1.0
+                progress_bar.progress(fraction, text=f"{format_bytes(bytes_sent)} of {format_bytes(total_bytes)} sent")
+            
+            payload = uploaded_file.getbuffer()
+            data_type = None
+            if transfer_mode == "Records (encode locally)":
+                if lrecl <= 0:
+                    raise ValueError("Records mode needs a logical record length")
+                payload = encode_text(uploaded_file.getvalue().decode('utf-8'), recfm, lrecl, code_page)
+                data_type = 'record' if recfm in VARIABLE_FORMATS else 'binary'
+            elif transfer_mode == "Binary (as is)":
+                data_type = 'binary'
+            
+            if only_changed and not content_differs(datasets_api, dataset_name,
+                                                    uploaded_file if data_type is None else payload, data_type):
+                progress_bar.empty()
+                st.info(f"{dataset_name} already holds this content, upload skipped")
+            elif run_in_background:
+                # The job outlives this run, give it its own copy of the upload
+                if not isinstance(payload, bytes):
+                    payload = uploaded_file.getvalue()
+                job = get_transfer_manager().submit(st.session_state.session_id, 'upload', dataset_name,
+                                                    uploaded_file.name, st.session_state.current_host,
+                                                    upload_task(connection, dataset_name, payload, data_type,
+                                                                compress=get_transfer_config()["gzip_uploads"]))
+                progress_bar.empty()
+                st.success(f"Upload to {dataset_name} queued as transfer {job.id}, "
+                           f"follow it on the Transfers page")
+            else:
+                # Stream the upload buffer straight to z/OSMF, no temporary file
+                result = resumable_upload(datasets_api, dataset_name, payload,
+                                          progress_callback=show_progress, data_type=data_type,
+                                          compress=get_transfer_config()["gzip_uploads"])
+                st.success(f"File uploaded successfully to dataset {dataset_name}")
+                st.caption(f"{format_bytes(result['bytes'])} in {result['seconds']:.2f}s "
+                           f"({result['mb_per_second']:.2f} MB/s)")
+                if describe_compression(result):
+                    st.caption(describe_compression(result))
                 
         except Exception as e:
             st.error(f"Failed to upload dataset: {str(e)}")
-            logging.error(f"Dataset upload failed: {str(e)}", exc_info=True) 
\ No newline at end of file
+            logging.error(f"Dataset upload failed: {str(e)}", exc_info=True)
+
+# Upload a directory, a zip or several files as members of a PDS
+st.subheader("Upload PDS Members")
+transfer_config = get_transfer_config()
+
+dataset_picker(connection, "upload_pds_name", label="Find Partitioned Dataset")
+
+with st.form("pds_upload_form"):
+    pds_name = st.text_input("Target Partitioned Dataset Name (e.g., 'USERID.SOURCE.COBOL')", key="upload_pds_name")
+    member_files = st.file_uploader("Choose member files or a zip archive", accept_multiple_files=True)
+    member_dir = st.text_input("Or Local Directory", help="Every file in the directory becomes a member")
+    pds_recfm = st.selectbox("Record Format",
+                             options=["FB", "VB", "F", "V"],
+                             index=0,
+                             key="pds_recfm")
+    pds_lrecl = st.number_input("Logical Record Length",
+                                min_value=0,
+                                value=80,
+                                key="pds_lrecl")
+    member_workers = st.number_input("Parallel Member Uploads",
+                                     min_value=1,
+                                     max_value=64,
+                                     value=transfer_config["max_workers"],
+                                     help="Number of members uploaded at the same time")
+    
+    pds_submit = st.form_submit_button("Upload Members")
+    
+    if pds_submit:
+        try:
+            pds_name = pds_name.strip().upper()
+            sources = member_sources(member_files or [], member_dir.strip() or None)
+            if not sources:
+                st.warning("No member files selected")
+            else:
+                datasets_api = connection.api(Datasets)
+            
+                # Create the PDS if it doesn't exist
+                create_dataset(datasets_api, pds_name, "PO", pds_recfm, pds_lrecl)
+            
+                summary = st.empty()
+                table = st.empty()
+                rows = []
+            
+                with st.spinner('Uploading members...'):
+                    for rows in upload_members(lambda: connection.api(Datasets), pds_name, sources,
+                                               st.session_state.current_host, get_sync_index(),
+                                               max_workers=member_workers):
+                        finished = sum(row['status'] in ('done', 'skipped', 'failed') for row in rows)
+                        summary.progress(finished / len(rows), text=f"{finished} of {len(rows)} members")
+                        table.dataframe(rows, use_container_width=True)
+            
+                counts = {state: sum(row['status'] == state for row in rows) for state in ('done', 'skipped', 'failed')}
+                if counts['failed']:
+                    st.error(f"{counts['failed']} of {len(rows)} members failed")
+                else:
+                    st.success(f"Uploaded {counts['done']} members to {pds_name}, "
+                               f"{counts['skipped']} unchanged members skipped")
+                
+        except Exception as e:
+            st.error(f"Failed to upload members: {str(e)}")
+            logging.error(f"PDS member upload failed: {str(e)}", exc_info=True)
@@ -0,0 +1,62 @@
+import streamlit as st
+from utils.auth_utils import get_or_create_connection
+from utils.job_utils import get_job_monitor
+from utils.transfer_utils import read_preview
+import logging
+
+st.title("Submit Job")
+
+# Get authenticated connection
+connection = get_or_create_connection()
+job_monitor = get_job_monitor()
+
+# Create form for job submission
+with st.form("submit_job_form"):
+    jcl_dataset = st.text_input("JCL Dataset (e.g., 'USERID.JCL(MYJOB)')")
+    jcl_file = st.file_uploader("Or choose a local JCL file", type=["jcl", "txt"])
+
+    submit = st.form_submit_button("Submit Job")
+
+    if submit:
+        if not jcl_dataset and jcl_file is None:
+            st.error("Please enter a JCL dataset or choose a JCL file")
+        else:
+            try:
+                job = job_monitor.submit(
+                    st.session_state.session_id,
+                    connection,
+                    jcl_dataset=jcl_dataset.strip().upper() or None,
+                    jcl_text=jcl_file.getvalue().decode('utf-8') if jcl_file is not None else None
+                )
+                st.success(f"Job {job.jobname}({job.jobid}) submitted")
+            except Exception as e:
+                st.error(f"Failed to submit job: {str(e)}")
+                logging.error(f"Job submission failed: {str(e)}", exc_info=True)
+
+@st.fragment(run_every=2)
+def show_jobs():
+    """Show job status and spool output, refreshed without rerunning the page"""
+    jobs = job_monitor.jobs_for(st.session_state.session_id)
+    if not jobs:
+        st.info("No jobs submitted in this session")
+        return
+
+    st.subheader("Jobs")
+    st.dataframe([job.summary() for job in jobs], use_container_width=True)
+
+    labels = {f"{job.jobname}({job.jobid})": job for job in jobs}
+    selected = labels[st.selectbox("Job Output", options=list(labels))]
+
+    for spool in list(selected.spool_files.values()):
+        with st.expander(f"{spool.stepname} {spool.ddname} ({spool.records_read:,} records)"):
+            try:
+                head, tail, truncated = read_preview(spool.path)
+                st.code(head + ("\n...\n" + tail if truncated else ""), language=None)
+            except FileNotFoundError:
+                st.caption("No output yet")
+
+    if selected.done and st.button("Remove from list"):
+        job_monitor.forget(st.session_state.session_id, selected)
+        st.rerun(scope="fragment")
+
+show_jobs()
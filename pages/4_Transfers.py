@@ -0,0 +1,40 @@
+import streamlit as st
+from utils.auth_utils import get_or_create_connection
+from utils.queue_utils import get_transfer_manager
+
+st.title("Transfers")
+
+# Get authenticated connection
+connection = get_or_create_connection()
+transfer_manager = get_transfer_manager()
+
+@st.fragment(run_every=1)
+def show_transfers():
+    """Show background transfers, refreshed without rerunning the page"""
+    jobs = transfer_manager.jobs_for(st.session_state.session_id)
+    if not jobs:
+        st.info("No transfers in this session. Choose \"Run in background\" on the download or upload page.")
+        return
+
+    active = [job for job in jobs if job.active]
+    st.caption(f"{len(active)} active, {len(jobs) - len(active)} finished")
+    st.dataframe(
+        [job.summary() for job in jobs],
+        use_container_width=True,
+        column_config={
+            "progress": st.column_config.ProgressColumn("progress", min_value=0.0, max_value=1.0)
+        }
+    )
+
+    if active:
+        labels = {f"{job.kind} {job.name} ({job.id})": job for job in active}
+        selected = labels[st.selectbox("Active Transfer", options=list(labels))]
+        if st.button("Cancel Transfer"):
+            transfer_manager.cancel(st.session_state.session_id, selected.id)
+            st.rerun(scope="fragment")
+
+    if len(active) < len(jobs) and st.button("Clear Finished"):
+        transfer_manager.clear_finished(st.session_state.session_id)
+        st.rerun(scope="fragment")
+
+show_transfers()
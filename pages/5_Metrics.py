@@ -0,0 +1,54 @@
+import streamlit as st
+from datetime import datetime
+from utils.auth_utils import get_metrics_config, get_or_create_connection
+from utils.metrics_utils import get_metrics
+from utils.transfer_utils import format_bytes
+
+st.title("Metrics")
+
+# Get authenticated connection
+connection = get_or_create_connection()
+metrics = get_metrics()
+
+if not get_metrics_config()["enabled"]:
+    st.warning("z/OSMF call metrics are disabled; set `[metrics] enabled = true` in secrets to record them")
+
+@st.fragment(run_every=5)
+def show_metrics():
+    """Show z/OSMF call timings, refreshed without rerunning the page"""
+    rows = metrics.snapshot()
+    st.caption(f"Since {datetime.fromtimestamp(metrics.started):%Y-%m-%d %H:%M:%S}, all sessions of this process")
+    if not rows:
+        st.info("No z/OSMF calls recorded yet")
+        return
+
+    hosts = sorted({row['host'] for row in rows})
+    selected_hosts = st.multiselect("Hosts", options=hosts, default=hosts)
+    rows = [row for row in rows if row['host'] in selected_hosts]
+
+    calls = sum(row['calls'] for row in rows)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Calls", f"{calls:,}")
+    col2.metric("Errors", f"{sum(row['errors'] for row in rows):,}")
+    col3.metric("Time in z/OSMF", f"{sum(row['total_s'] for row in rows):,.1f}s")
+    col4.metric("Transferred", format_bytes(sum(row['bytes_sent'] + row['bytes_received'] for row in rows)))
+
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    if rows:
+        st.subheader("Latency by Operation (ms)")
+        st.bar_chart([{"call": f"{row['operation']} @ {row['host']}", "p50": row['p50_ms'], "p95": row['p95_ms']}
+                      for row in rows], x="call", y=["p50", "p95"], stack=False)
+
+show_metrics()
+
+with st.expander("Prometheus"):
+    prometheus_file = get_metrics_config()["prometheus_file"]
+    if prometheus_file:
+        st.caption(f"Exported to `{prometheus_file}`, point a node_exporter textfile collector at its directory")
+    text = metrics.prometheus_text()
+    st.download_button("Download Metrics", data=text, file_name="zowe_app.prom", mime="text/plain")
+    st.code(text, language=None)
+
+if st.button("Reset Metrics"):
+    metrics.reset()
+    st.rerun()
@@ -0,0 +1,77 @@
+import streamlit as st
+import time
+from utils.auth_utils import get_or_create_connection
+from utils.catalog_utils import DATASET_ATTRIBUTES, MEMBER_ATTRIBUTES, get_catalog_index, high_level_qualifier
+
+# Rows shown per page of the listing
+ROWS_PER_PAGE = 100
+
+st.title("Catalog")
+
+# Get authenticated connection
+connection = get_or_create_connection()
+index = get_catalog_index()
+
+def listing_status(listing, noun):
+    """Describe how complete and how fresh a listing is"""
+    if listing.loading:
+        return f"Loading, {listing.fetched:,} {noun} fetched so far"
+    if listing.error:
+        return f"Listing failed: {listing.error}"
+    if listing.loaded_at is not None:
+        return f"{len(listing.index):,} {noun}, listed {int(time.monotonic() - listing.loaded_at) // 60} min ago"
+    return ""
+
+def paged_rows(listing, prefix, key, columns, name_column):
+    """Show one page of a listing's entries starting with ``prefix``; returns the names shown"""
+    total = listing.index.count(prefix)
+    pages = max(1, -(-total // ROWS_PER_PAGE))
+    page = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, key=key)
+    entries = listing.index.page(prefix, (page - 1) * ROWS_PER_PAGE, ROWS_PER_PAGE)
+    rows = [{name_column: name, **dict(zip(columns, values or ()))} for name, values in entries]
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    st.caption(f"{total:,} matching")
+    return [name for name, _ in entries]
+
+col1, col2 = st.columns([4, 1])
+with col1:
+    prefix = st.text_input("Dataset Prefix (e.g., 'USERID.PROD')",
+                           value=st.session_state.connection.get("user", "")).strip().upper()
+with col2:
+    st.write("")
+    refresh = st.button("Refresh")
+
+hlq = high_level_qualifier(prefix)
+if hlq:
+    # The fragment polls while a listing is loading; a full rerun once it is complete redefines it without polling
+    listing = index.datasets(connection, hlq, force=refresh)
+    polling = listing.loading
+
+    @st.fragment(run_every=2 if polling else None)
+    def show_datasets():
+        listing = index.datasets(connection, hlq)
+        st.caption(listing_status(listing, f"datasets under {hlq}"))
+        names = paged_rows(listing, prefix, "catalog_page", DATASET_ATTRIBUTES, "dsname")
+        st.session_state.catalog_names = names
+        if polling and not listing.loading:
+            st.rerun()
+
+    show_datasets()
+
+    st.subheader("Members")
+    dataset_name = st.selectbox("Partitioned Dataset", st.session_state.get("catalog_names", []), index=None,
+                                placeholder="Pick a dataset from the page above")
+    if dataset_name:
+        member_prefix = st.text_input("Member Prefix").strip().upper()
+        members = index.members(connection, dataset_name)
+        members_polling = members.loading
+
+        @st.fragment(run_every=2 if members_polling else None)
+        def show_members():
+            members = index.members(connection, dataset_name)
+            st.caption(listing_status(members, "members"))
+            paged_rows(members, member_prefix, "catalog_member_page", MEMBER_ATTRIBUTES, "member")
+            if members_polling and not members.loading:
+                st.rerun()
+
+        show_members()
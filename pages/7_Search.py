@@ -0,0 +1,85 @@
+import streamlit as st
+import csv
+import io
+import time
+from zowe.zos_files_for_zowe_sdk import Datasets
+from zowe.zos_jobs_for_zowe_sdk import Jobs
+from utils.auth_utils import get_or_create_connection
+from utils.transfer_utils import get_transfer_config
+from utils.search_utils import get_search_config, search_datasets, search_targets
+import logging
+
+st.title("Search")
+
+# Get authenticated connection
+connection = get_or_create_connection()
+transfer_config = get_transfer_config()
+search_config = get_search_config()
+
+with st.form("search_form"):
+    dataset_entries = st.text_area("Datasets, Members or Patterns (one per line, e.g., 'USERID.SOURCE.COBOL', "
+                                   "'USERID.PROD.**')")
+    text = st.text_input("Search For")
+    col1, col2 = st.columns(2)
+    with col1:
+        regex = st.checkbox("Regular expression", help="Needs dataset search support in z/OSMF")
+    with col2:
+        case_sensitive = st.checkbox("Case sensitive")
+    max_workers = st.number_input("Parallel Searches",
+                                  min_value=1,
+                                  max_value=64,
+                                  value=transfer_config["max_workers"],
+                                  help="Number of members or datasets searched at the same time")
+    
+    search_submit = st.form_submit_button("Search")
+    
+    if search_submit and not text:
+        st.warning("Enter a string to search for")
+    elif search_submit:
+        try:
+            with st.spinner('Resolving dataset names...'):
+                targets = search_targets(connection.api(Datasets), dataset_entries.splitlines())
+            
+            if not targets:
+                st.warning("No datasets matched")
+            else:
+                summary = st.empty()
+                table = st.empty()
+                rows, hits = [], []
+                start = time.monotonic()
+                
+                # The job name is the user id with an S, as TSO names submitted jobs
+                jobname = (st.session_state.connection['user'][:7] + 'S').upper()
+                for rows, hits in search_datasets(lambda: connection.api(Datasets), lambda: connection.api(Jobs),
+                                                  targets, text, st.session_state.current_host, jobname,
+                                                  regex=regex,
+                                                  case_sensitive=case_sensitive,
+                                                  max_workers=max_workers,
+                                                  job_card=search_config["job_card"],
+                                                  job_timeout=search_config["job_timeout_minutes"] * 60):
+                    finished = sum(row['status'] in ('done', 'failed') for row in rows)
+                    summary.progress(finished / len(rows),
+                                     text=f"{finished} of {len(rows)} searched, {len(hits)} hits")
+                    table.dataframe(hits, use_container_width=True, hide_index=True)
+                
+                failed = [row for row in rows if row['status'] == 'failed']
+                elapsed = time.monotonic() - start
+                if failed:
+                    st.error(f"{len(failed)} of {len(rows)} searches failed")
+                    st.dataframe([{'name': row['name'], 'error': row['error']} for row in failed],
+                                 use_container_width=True, hide_index=True)
+                else:
+                    st.success(f"Found {len(hits)} hits in {len(rows)} datasets and members in {elapsed:.1f}s")
+                st.session_state.search_hits = hits
+                
+        except Exception as e:
+            st.error(f"Search failed: {str(e)}")
+            logging.error(f"Dataset search failed: {str(e)}", exc_info=True)
+
+# Download buttons cannot sit inside a form
+if st.session_state.get("search_hits"):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=['dataset', 'member', 'line', 'record'])
+    writer.writeheader()
+    writer.writerows(st.session_state.search_hits)
+    st.download_button("Download Hits (CSV)", output.getvalue(), file_name="search_hits.csv", mime="text/csv")
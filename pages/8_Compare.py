@@ -0,0 +1,113 @@
+import streamlit as st
+from zowe.zos_files_for_zowe_sdk import Datasets
+from utils.auth_utils import get_or_create_connection
+from utils.catalog_utils import dataset_picker
+from utils.diff_utils import compare, iter_dataset_lines, iter_file_lines
+import logging
+
+st.title("Compare")
+
+# Get authenticated connection
+connection = get_or_create_connection()
+
+def side_by_side(lines):
+    """Rows of old and new records from a page of unified diff lines"""
+    rows = []
+    removed, added = [], []
+
+    def flush():
+        for k in range(max(len(removed), len(added))):
+            rows.append({'old': removed[k] if k < len(removed) else '',
+                         'new': added[k] if k < len(added) else ''})
+        removed.clear()
+        added.clear()
+
+    for line in lines:
+        if line.startswith(('---', '+++')):
+            continue
+        if line.startswith('@@'):
+            flush()
+            rows.append({'old': line, 'new': ''})
+        elif line.startswith('-'):
+            removed.append(line[1:])
+        elif line.startswith('+'):
+            added.append(line[1:])
+        else:
+            flush()
+            rows.append({'old': line[1:], 'new': line[1:]})
+    flush()
+    return rows
+
+mode = st.radio("Compare With", options=["Local file", "Another dataset"], horizontal=True)
+
+dataset_picker(connection, "compare_left_name")
+if mode == "Another dataset":
+    dataset_picker(connection, "compare_right_name", label="Find Second Dataset")
+
+with st.form("compare_form"):
+    left_name = st.text_input("Dataset Name (e.g., 'USERID.SOURCE.COBOL(PROG1)')", key="compare_left_name")
+    if mode == "Another dataset":
+        right_name = st.text_input("Second Dataset Name", key="compare_right_name")
+    else:
+        local_file = st.file_uploader("Choose a local file")
+        local_path = st.text_input("Or Local File Path")
+    ignore_trailing_blanks = st.checkbox("Ignore trailing blanks", value=True,
+                                         help="Fixed-length records are padded with blanks")
+
+    submit = st.form_submit_button("Compare")
+
+    if submit:
+        try:
+            left_name = left_name.strip().upper()
+            if mode == "Another dataset":
+                right_label = right_name.strip().upper()
+                right = iter_dataset_lines(connection.api(Datasets), right_label)
+            elif local_file is not None:
+                right_label = local_file.name
+                right = iter_file_lines(local_file)
+            elif local_path.strip():
+                right_label = local_path.strip()
+                right = iter_file_lines(right_label)
+            else:
+                raise ValueError("Choose a local file or enter its path")
+
+            if st.session_state.get("compare_result"):
+                st.session_state.compare_result.close()
+                st.session_state.compare_result = None
+
+            progress = st.empty()
+
+            def show_progress(left_records, right_records):
+                progress.caption(f"{left_records:,} and {right_records:,} records compared")
+
+            with st.spinner('Comparing...'):
+                st.session_state.compare_result = compare(iter_dataset_lines(connection.api(Datasets), left_name),
+                                                          right, left_name, right_label,
+                                                          ignore_trailing_blanks=ignore_trailing_blanks,
+                                                          progress_callback=show_progress)
+            progress.empty()
+
+        except Exception as e:
+            st.error(f"Comparison failed: {str(e)}")
+            logging.error(f"Dataset comparison failed: {str(e)}", exc_info=True)
+
+# The diff stays on disk and is read back one page at a time
+result = st.session_state.get("compare_result")
+if result:
+    st.caption(f"{result.left_label}: {result.left_records:,} records, "
+               f"{result.right_label}: {result.right_records:,} records, compared in {result.seconds:.1f}s")
+    if result.identical:
+        st.success("No differences")
+    else:
+        st.info(f"{result.hunks:,} changed regions, {result.removed:,} records removed and "
+                f"{result.added:,} added")
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            page = st.number_input(f"Page (of {result.pages:,})", min_value=1, max_value=result.pages, value=1)
+        with col2:
+            view = st.radio("View", options=["Unified", "Side by side"], horizontal=True)
+        lines = result.page(page)
+        if view == "Unified":
+            st.code('\n'.join(lines), language='diff')
+        else:
+            st.dataframe(side_by_side(lines), use_container_width=True, hide_index=True)
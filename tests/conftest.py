@@ -0,0 +1,26 @@
+import pytest
+from zowe.zos_files_for_zowe_sdk import Datasets
+
+from benchmarks.mock_zosmf import MockZosmf
+
+
+@pytest.fixture
+def zosmf(request):
+    """The mock z/OSMF server of the benchmarks on a free local port
+
+    Parametrize it indirectly with a dict of MockZosmf options, e.g. to inject faults.
+    """
+    server = MockZosmf(**getattr(request, 'param', {})).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def connection(zosmf):
+    return {'host': '127.0.0.1', 'port': zosmf.port, 'user': 'IBMUSER', 'password': 'secret',
+            'rejectUnauthorized': False}
+
+
+@pytest.fixture
+def datasets_api(connection):
+    return Datasets(connection)
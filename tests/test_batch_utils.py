@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+from utils import batch_utils
+from utils.batch_utils import host_slot, resolve_dataset_names, run_batch
+
+
+@pytest.fixture
+def two_slots(monkeypatch, request):
+    """A host of its own allowing two concurrent requests"""
+    monkeypatch.setattr(batch_utils, 'get_transfer_config', lambda: {'max_connections_per_host': 2})
+    return f"lpar-{request.node.name}"
+
+
+class Concurrency:
+    """Records the most tasks running at once"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def task(self, item, status):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+
+
+def finish(batch):
+    rows = []
+    for rows in batch:
+        pass
+    return {row['name']: row for row in rows}
+
+
+def test_batches_share_the_host_limit(two_slots):
+    concurrency = Concurrency()
+    batches = [threading.Thread(target=finish, args=(run_batch(range(4), concurrency.task, 4, two_slots, 0.01),))
+               for _ in range(2)]
+    for batch in batches:
+        batch.start()
+    for batch in batches:
+        batch.join(10)
+    assert concurrency.peak == 2
+
+
+def test_slot_is_released_after_a_failure(two_slots):
+    def fail():
+        with host_slot(two_slots):
+            raise RuntimeError('connection reset')
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            fail()
+    concurrency = Concurrency()
+    finish(run_batch(range(4), concurrency.task, 4, two_slots, 0.01))
+    assert concurrency.peak == 2
+
+
+def test_tasks_without_a_slot_are_not_limited(two_slots):
+    concurrency = Concurrency()
+    finish(run_batch(range(4), concurrency.task, 4, two_slots, 0.01, hold_slot=False))
+    assert concurrency.peak == 4
+
+
+def test_rows_report_the_outcome(two_slots):
+    def task(item, status):
+        if item == 'USER.BAD':
+            raise RuntimeError('Data set not found')
+        if item == 'USER.SAME':
+            status['result'] = 'skipped'
+        status['bytes'] = 10
+
+    rows = finish(run_batch(['USER.GOOD', 'USER.BAD', 'USER.SAME'], task, 2, two_slots, 0.01))
+    assert {name: row['status'] for name, row in rows.items()} == {
+        'USER.GOOD': 'done', 'USER.BAD': 'failed', 'USER.SAME': 'skipped'}
+    assert rows['USER.BAD']['error'] == 'Data set not found'
+    assert rows['USER.GOOD']['bytes'] == 10
+    assert all('result' not in row for row in rows.values())
+
+
+def test_patterns_are_resolved_on_the_host(zosmf, datasets_api):
+    for name in ('USER.PROD.A', 'USER.PROD.B', 'USER.TEST.A'):
+        zosmf.add_dataset(name)
+    names = resolve_dataset_names(datasets_api, [' user.prod.* ', '', 'USER.PROD.A', 'USER.OTHER'])
+    assert names == ['USER.PROD.A', 'USER.PROD.B', 'USER.OTHER']
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from utils.cache_utils import ContentCache, split_member
+
+HOST = '127.0.0.1'
+
+
+def content(name, size):
+    return b''.join(b'%s %06d\n' % (name.encode(), number) for number in range(size // 20))
+
+
+@pytest.fixture
+def datasets(zosmf):
+    for name in ('USER.A', 'USER.B', 'USER.C'):
+        zosmf.add_dataset(name, content(name, 40000))
+    return zosmf.datasets
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ContentCache(root=tmp_path / 'cache')
+
+
+def fetch(cache, datasets_api, tmp_path, name):
+    output_path = tmp_path / f"{name}.txt"
+    result = cache.fetch(datasets_api, HOST, name, str(output_path))
+    return result, output_path.read_bytes()
+
+
+def test_second_fetch_is_served_after_a_304(tmp_path, zosmf, datasets_api, datasets, cache):
+    result, data = fetch(cache, datasets_api, tmp_path, 'USER.A')
+    assert not result['cache_hit']
+    assert data == datasets['USER.A'].data
+    requests = zosmf.requests
+    result, data = fetch(cache, datasets_api, tmp_path, 'USER.A')
+    assert result['cache_hit']
+    assert result['not_modified']
+    assert data == datasets['USER.A'].data
+    # One conditional request, answered without a body
+    assert zosmf.requests == requests + 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['bytes_saved'] == len(data)
+
+
+def test_changed_dataset_replaces_the_entry(tmp_path, datasets_api, datasets, cache):
+    fetch(cache, datasets_api, tmp_path, 'USER.A')
+    datasets['USER.A'].set_data(b'NEW CONTENT\n')
+    result, data = fetch(cache, datasets_api, tmp_path, 'USER.A')
+    assert not result['cache_hit']
+    assert data == b'NEW CONTENT\n'
+    blobs = [path for path in (tmp_path / 'cache').rglob('*') if path.is_file() and len(path.name) == 64]
+    assert len(blobs) == 1
+    assert cache.stats()['entries'] == 1
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, datasets_api, datasets):
+    size = len(datasets['USER.A'].data)
+    cache = ContentCache(root=tmp_path / 'cache', max_bytes=int(size * 2.5))
+    fetch(cache, datasets_api, tmp_path, 'USER.A')
+    fetch(cache, datasets_api, tmp_path, 'USER.B')
+    # A hit makes A more recent than B
+    assert fetch(cache, datasets_api, tmp_path, 'USER.A')[0]['cache_hit']
+    fetch(cache, datasets_api, tmp_path, 'USER.C')
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['size'] <= cache.max_bytes
+    assert fetch(cache, datasets_api, tmp_path, 'USER.A')[0]['cache_hit']
+    assert fetch(cache, datasets_api, tmp_path, 'USER.C')[0]['cache_hit']
+    assert not fetch(cache, datasets_api, tmp_path, 'USER.B')[0]['cache_hit']
+
+
+def test_missing_blob_is_downloaded_again(tmp_path, datasets_api, datasets, cache):
+    fetch(cache, datasets_api, tmp_path, 'USER.A')
+    for path in (tmp_path / 'cache').rglob('*'):
+        if path.is_file() and len(path.name) == 64:
+            os.remove(path)
+    result, data = fetch(cache, datasets_api, tmp_path, 'USER.A')
+    assert not result['cache_hit']
+    assert data == datasets['USER.A'].data
+
+
+def test_cache_is_shared_through_the_directory(tmp_path, datasets_api, datasets, cache):
+    fetch(cache, datasets_api, tmp_path, 'USER.A')
+    other = ContentCache(root=tmp_path / 'cache')
+    assert fetch(other, datasets_api, tmp_path, 'USER.A')[0]['cache_hit']
+
+
+@pytest.mark.parametrize('name, parts', [
+    ('USER.PDS(MEMBER)', ('USER.PDS', 'MEMBER')),
+    ('USER.SEQ', ('USER.SEQ', '')),
+])
+def test_split_member(name, parts):
+    assert split_member(name) == parts
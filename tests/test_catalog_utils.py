@@ -0,0 +1,112 @@
+import random
+import threading
+import time
+
+import pytest
+
+from utils.catalog_utils import CatalogIndex, PrefixIndex, high_level_qualifier
+
+
+def random_names(seed, count):
+    rng = random.Random(seed)
+    qualifiers = ['PROD', 'PRODX', 'TEST', 'PAY', 'PAYROLL', 'SRC', 'A', 'Z9']
+    return list({'.'.join(rng.choice(qualifiers) for _ in range(rng.randint(1, 4))) for _ in range(count)})
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_prefix_lookups_match_a_scan(seed):
+    names = random_names(seed, 500)
+    index = PrefixIndex(names)
+    assert len(index) == len(names)
+    for prefix in ['', 'P', 'PROD', 'PROD.', 'PRODX.PAY', 'PAY.PAYROLL.S', 'Q', 'Z9.Z9.Z9.Z9', 'ZZZ']:
+        expected = sorted(name for name in names if name.startswith(prefix))
+        assert index.count(prefix) == len(expected)
+        assert index.complete(prefix, 7) == expected[:7]
+        assert [name for name, _ in index.page(prefix, 5, 10)] == expected[5:15]
+
+
+def test_page_past_the_end():
+    index = PrefixIndex(['A.B', 'A.C', 'B.A'])
+    assert index.page('A.', 2, 10) == []
+    assert index.page('A.', 1, 10) == [('A.C', None)]
+
+
+def test_page_attributes():
+    index = PrefixIndex(['PROD.B', 'PROD.A'], {'PROD.A': ('PS', 'FB'), 'PROD.B': ('PO', 'VB')})
+    assert index.page('PROD', 0, 10) == [('PROD.A', ('PS', 'FB')), ('PROD.B', ('PO', 'VB'))]
+
+
+def test_prefix_with_high_characters():
+    index = PrefixIndex(['A', 'Aÿ', 'AĀ', 'B'])
+    assert index.complete('A', 10) == ['A', 'Aÿ', 'AĀ']
+
+
+def test_high_level_qualifier():
+    assert high_level_qualifier(' prod.pay.d ') == 'PROD'
+    assert high_level_qualifier('PROD') == 'PROD'
+    assert high_level_qualifier('') == ''
+
+
+def wait_loaded(listing, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while listing.loading:
+        assert time.monotonic() < deadline, "listing did not finish loading"
+        time.sleep(0.01)
+    return listing
+
+
+def test_listing_loads_in_the_background():
+    catalog = CatalogIndex(ttl_seconds=60)
+    release = threading.Event()
+
+    def pages():
+        yield [(f"PROD.DS{number:03d}", ('PS',)) for number in range(100)]
+        release.wait(5)
+        yield [(f"PROD.DS{number:03d}", ('PO',)) for number in range(100, 150)]
+
+    listing = catalog._listing(('lpar', 'user', 'datasets', 'PROD'), pages)
+    assert listing.loading
+    # The first page is published before the listing completes
+    deadline = time.monotonic() + 5
+    while listing.index.count('PROD.') < 100:
+        assert time.monotonic() < deadline, "first page was not published"
+        time.sleep(0.01)
+    assert listing.loading
+    assert listing.fetched == 100
+    release.set()
+    wait_loaded(listing)
+    assert listing.index.count('PROD.') == 150
+    assert listing.index.page('PROD.DS14', 0, 1) == [('PROD.DS140', ('PO',))]
+    assert listing.error is None
+
+
+def test_listing_is_cached_until_stale_or_forced():
+    catalog = CatalogIndex(ttl_seconds=60)
+    loads = []
+
+    def pages():
+        loads.append(1)
+        yield [('PROD.A', None)]
+
+    key = ('lpar', 'user', 'datasets', 'PROD')
+    wait_loaded(catalog._listing(key, pages))
+    wait_loaded(catalog._listing(key, pages))
+    assert len(loads) == 1
+    wait_loaded(catalog._listing(key, pages, force=True))
+    assert len(loads) == 2
+
+
+def test_failed_listing_keeps_the_error_and_waits_to_retry():
+    catalog = CatalogIndex(ttl_seconds=60)
+    attempts = []
+
+    def pages():
+        attempts.append(1)
+        raise RuntimeError('not authorized')
+        yield
+
+    key = ('lpar', 'user', 'members', 'PROD.PDS')
+    listing = wait_loaded(catalog._listing(key, pages))
+    assert listing.error == 'not authorized'
+    wait_loaded(catalog._listing(key, pages))
+    assert len(attempts) == 1
@@ -0,0 +1,79 @@
+import os
+import shutil
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives.serialization import Encoding
+
+from utils import cert_utils
+from utils.cert_utils import get_ssl_context, load_certificate
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """The certificate files parsed, one entry per parse"""
+    parsed = []
+    parse = cert_utils._parse
+
+    def recording_parse(cert_file, data):
+        parsed.append(cert_file.name)
+        return parse(cert_file, data)
+
+    monkeypatch.setattr(cert_utils, '_parse', recording_parse)
+    return parsed
+
+
+@pytest.fixture
+def pem_file(tmp_path, zosmf):
+    # The mock server's self-signed certificate
+    return shutil.copy(zosmf.ca_file, tmp_path / 'zosmf.pem')
+
+
+def test_unchanged_file_is_processed_once(pem_file, parses):
+    info = load_certificate(pem_file)
+    assert load_certificate(pem_file) is info
+    assert parses == ['zosmf.pem']
+    assert info['path'] == str(pem_file)
+    assert info['subject']
+
+
+def test_touched_file_is_matched_by_content(pem_file, parses):
+    info = load_certificate(pem_file)
+    stat = os.stat(pem_file)
+    os.utime(pem_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_certificate(pem_file) is info
+    assert parses == ['zosmf.pem']
+
+
+def test_changed_file_is_processed_again(pem_file, parses):
+    info = load_certificate(pem_file)
+    with open(pem_file, 'ab') as f:
+        f.write(b'\n')
+    changed = load_certificate(pem_file)
+    assert changed['sha256'] != info['sha256']
+    assert parses == ['zosmf.pem', 'zosmf.pem']
+
+
+def test_der_certificate_is_converted_beside_it(tmp_path, pem_file, parses):
+    certificate = x509.load_pem_x509_certificate((tmp_path / 'zosmf.pem').read_bytes())
+    der_file = tmp_path / 'host.cer'
+    der_file.write_bytes(certificate.public_bytes(Encoding.DER))
+    info = load_certificate(der_file)
+    assert info['path'] == str(tmp_path / 'host.pem')
+    assert (tmp_path / 'host.pem').read_bytes() == info['pem'] == certificate.public_bytes(Encoding.PEM)
+
+
+@pytest.mark.parametrize('name, content, message', [
+    ('host.crt', b'', 'Unsupported certificate format'),
+    ('missing.pem', None, 'not found'),
+    ('broken.pem', b'not a certificate', 'No PEM certificate'),
+])
+def test_unusable_certificates_raise(tmp_path, name, content, message):
+    if content is not None:
+        (tmp_path / name).write_bytes(content)
+    with pytest.raises(ValueError, match=message):
+        load_certificate(tmp_path / name)
+
+
+def test_ssl_context_is_shared(pem_file):
+    assert get_ssl_context(pem_file) is get_ssl_context(pem_file)
@@ -0,0 +1,129 @@
+import random
+
+import numpy as np
+import pytest
+
+from utils.codec_utils import (CODE_PAGES, PREFIX_RDW, decode_file, decode_table, encode_table, encode_text,
+                               iter_variable_spans)
+
+
+def random_lines(seed, count, max_length):
+    rng = random.Random(seed)
+    alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 .,;:+-*/()$#@'
+    lines = []
+    for _ in range(count):
+        line = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, max_length)))
+        # A record cannot be empty, and fixed records lose their trailing blanks in text form
+        lines.append(line.rstrip() or 'X')
+    return lines
+
+
+def round_trip(tmp_path, text, recfm, lrecl, code_page='IBM-1047', **options):
+    raw_path = tmp_path / 'raw.bin'
+    raw_path.write_bytes(encode_text(text, recfm, lrecl, code_page))
+    output_path = tmp_path / 'decoded.txt'
+    result = decode_file(str(raw_path), str(output_path), recfm, lrecl, code_page, **options)
+    return result, output_path.read_text(encoding='utf-8')
+
+
+@pytest.mark.parametrize('code_page', CODE_PAGES)
+def test_tables_are_inverse(code_page):
+    assert np.array_equal(encode_table(code_page)[decode_table(code_page)], np.arange(256))
+
+
+@pytest.mark.parametrize('recfm, lrecl', [('FB', 80), ('F', 20), ('VB', 84), ('V', 24)])
+def test_round_trip(tmp_path, recfm, lrecl):
+    lines = random_lines(recfm, 500, 20)
+    result, decoded = round_trip(tmp_path, '\n'.join(lines) + '\n', recfm, lrecl)
+    assert decoded == ''.join(line + '\n' for line in lines)
+    assert result['records'] == len(lines)
+
+
+@pytest.mark.parametrize('recfm, lrecl', [('FB', 40), ('VB', 44)])
+def test_round_trip_in_small_batches(tmp_path, recfm, lrecl):
+    lines = random_lines(lrecl, 2000, 40)
+    result, decoded = round_trip(tmp_path, '\n'.join(lines), recfm, lrecl, batch_bytes=100)
+    assert decoded.splitlines() == lines
+    assert result['records'] == len(lines)
+
+
+@pytest.mark.parametrize('code_page', CODE_PAGES)
+def test_round_trip_latin1_characters(tmp_path, code_page):
+    text = 'Café [x] ^ ¬ Ý ¨ {ü} ß\nÄÖÜ äöü ±µ\n'
+    _, decoded = round_trip(tmp_path, text, 'VB', 64, code_page)
+    assert decoded == text
+
+
+def test_fixed_records_keep_blanks_without_strip(tmp_path):
+    _, decoded = round_trip(tmp_path, 'AB\nC\n', 'FB', 4, strip=False)
+    assert decoded == 'AB  \nC   \n'
+
+
+def test_empty_lines_become_a_blank_record(tmp_path):
+    _, decoded = round_trip(tmp_path, 'A\n\nB\n', 'VB', 10)
+    assert decoded == 'A\n \nB\n'
+
+
+def test_empty_file(tmp_path):
+    result, decoded = round_trip(tmp_path, '', 'VB', 10)
+    assert decoded == ''
+    assert result['records'] == 0
+
+
+def test_line_longer_than_record():
+    with pytest.raises(ValueError, match='Line 2'):
+        encode_text('OK\nTOO LONG\n', 'FB', 4)
+    with pytest.raises(ValueError, match='Line 1'):
+        encode_text('12345\n', 'VB', 8)
+
+
+def test_character_outside_code_page():
+    with pytest.raises(ValueError, match='no IBM-1047 equivalent'):
+        encode_text('price: 5€\n', 'FB', 20)
+
+
+def test_fixed_file_size_must_match_lrecl(tmp_path):
+    raw_path = tmp_path / 'raw.bin'
+    raw_path.write_bytes(b'\x40' * 81)
+    with pytest.raises(ValueError, match='not a multiple of LRECL 80'):
+        decode_file(str(raw_path), str(tmp_path / 'out.txt'), 'FB', 80)
+
+
+def test_truncated_variable_record(tmp_path):
+    raw_path = tmp_path / 'raw.bin'
+    raw_path.write_bytes(encode_text('ABC\nDEF\n', 'VB', 10)[:-1])
+    with pytest.raises(ValueError, match='Invalid record prefix'):
+        decode_file(str(raw_path), str(tmp_path / 'out.txt'), 'VB', 10)
+
+
+def test_truncated_variable_prefix():
+    data = np.frombuffer(encode_text('ABC\n', 'VB', 10) + b'\x00\x00', dtype=np.uint8)
+    with pytest.raises(ValueError, match='Truncated record prefix'):
+        list(iter_variable_spans(data))
+
+
+def test_variable_spans_are_windowed():
+    lines = random_lines(7, 300, 30)
+    data = np.frombuffer(encode_text('\n'.join(lines), 'VB', 34), dtype=np.uint8)
+    windows = list(iter_variable_spans(data, batch_bytes=256))
+    assert len(windows) > 1
+    starts = np.concatenate([starts for starts, _ in windows])
+    lengths = np.concatenate([lengths for _, lengths in windows])
+    assert lengths.tolist() == [len(line) for line in lines]
+    assert (starts[1:] == starts[:-1] + lengths[:-1] + 4).all()
+
+
+def test_rdw_prefix(tmp_path):
+    lines = ['FIRST', 'SECOND RECORD', 'X']
+    table = encode_table('IBM-1047')
+    raw = b''
+    for line in lines:
+        # The RDW length counts the 4-byte RDW itself
+        raw += (len(line) + 4).to_bytes(2, 'big') + b'\x00\x00'
+        raw += table[np.frombuffer(line.encode(), dtype=np.uint8)].tobytes()
+    raw_path = tmp_path / 'raw.bin'
+    raw_path.write_bytes(raw)
+    output_path = tmp_path / 'out.txt'
+    result = decode_file(str(raw_path), str(output_path), 'VB', prefix=PREFIX_RDW)
+    assert output_path.read_text().splitlines() == lines
+    assert result['records'] == 3
@@ -0,0 +1,148 @@
+from decimal import Decimal
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from utils.codec_utils import decode_table, encode_table
+from utils.copybook_utils import count_rows, decode_batch, extract_columns, parse_copybook, read_page
+
+COPYBOOK = """\
+000100 01  CUSTOMER-RECORD.
+000200     05  CUST-ID            PIC 9(5).
+000300     05  CUST-NAME          PIC X(10).
+000400     05  ALT-NAME REDEFINES CUST-NAME PIC X(10).
+000500*    Balance in cents
+000600     05  BALANCE            PIC S9(5)V99 COMP-3.
+000700     05  VISITS             PIC S9(4) USAGE IS COMP.
+000800     05  FILLER             PIC X(2).
+000900     05  AMOUNT             PIC S9(3)V9 OCCURS 2 TIMES.
+001000     05  STATUS-CODE        PIC X VALUE 'A'.
+001100         88  ACTIVE         VALUE 'A'.
+"""
+
+RECORD_LENGTH = 32
+
+
+def ebcdic(text):
+    return encode_table('IBM-1047')[np.frombuffer(text.encode('latin-1'), dtype=np.uint8)].tobytes()
+
+
+def zoned(value, digits):
+    text = f"{abs(value):0{digits}d}"
+    data = bytearray(0xF0 | int(digit) for digit in text)
+    data[-1] = (0xD0 if value < 0 else 0xC0) | int(text[-1])
+    return bytes(data)
+
+
+def packed(value, digits):
+    nibbles = [int(digit) for digit in f"{abs(value):0{digits}d}"] + [0xD if value < 0 else 0xC]
+    if len(nibbles) % 2:
+        nibbles.insert(0, 0)
+    return bytes(high << 4 | low for high, low in zip(nibbles[0::2], nibbles[1::2]))
+
+
+def record(cust_id, name, balance_cents, visits, amounts, status='A'):
+    data = (zoned(cust_id, 5) + ebcdic(name.ljust(10)) + packed(balance_cents, 7)
+            + visits.to_bytes(2, 'big', signed=True) + ebcdic('  ')
+            + b''.join(zoned(amount, 4) for amount in amounts) + ebcdic(status))
+    assert len(data) == RECORD_LENGTH
+    return data
+
+
+def test_parse_layout():
+    layout = parse_copybook(COPYBOOK)
+    assert layout.record_length == RECORD_LENGTH
+    assert [(field.name, field.offset, field.length, field.kind) for field in layout.fields] == [
+        ('CUST-ID', 0, 5, 'zoned'),
+        ('CUST-NAME', 5, 10, 'text'),
+        ('BALANCE', 15, 4, 'packed'),
+        ('VISITS', 19, 2, 'binary'),
+        ('AMOUNT_1', 23, 4, 'zoned'),
+        ('AMOUNT_2', 27, 4, 'zoned'),
+        ('STATUS-CODE', 31, 1, 'text'),
+    ]
+    assert layout.schema.field('BALANCE').type == pa.decimal128(7, 2)
+    assert layout.schema.field('CUST-ID').type == pa.int64()
+
+
+def test_occurs_group_and_repeated_names():
+    layout = parse_copybook("""
+       01  TABLE-RECORD.
+           05  ENTRY OCCURS 2 TIMES.
+               10  CODE   PIC X(3).
+               10  QTY    PIC 9(2).
+           05  TOTALS.
+               10  QTY    PIC 9(4).
+    """)
+    assert [field.name for field in layout.fields] == ['CODE_1', 'QTY_1', 'CODE_2', 'QTY_2', 'QTY']
+    assert [field.offset for field in layout.fields] == [0, 3, 5, 8, 10]
+    assert layout.record_length == 14
+
+
+@pytest.mark.parametrize('source, message', [
+    ("05  LOOSE PIC X.", "no 01-level record"),
+    ("01  REC.\n    05  RATE COMP-1.", "COMP-1 is not supported"),
+    ("01  REC.\n    05  NUMBER PIC 9(19).", "more than 18 digits"),
+    ("01  REC.\n    05  GROUP-ONLY.", "without PIC clause"),
+])
+def test_parse_errors(source, message):
+    with pytest.raises(ValueError, match=message):
+        parse_copybook(source)
+
+
+def test_decode_batch():
+    layout = parse_copybook(COPYBOOK)
+    data = record(12345, 'ALICE', -123456, -42, [999, -5]) + record(7, 'BOB', 50, 300, [0, 1], 'I')
+    rows = np.frombuffer(data, dtype=np.uint8).reshape(-1, RECORD_LENGTH)
+    batch = decode_batch(rows, layout, decode_table('IBM-1047')).to_pydict()
+    assert batch == {
+        'CUST-ID': [12345, 7],
+        'CUST-NAME': ['ALICE', 'BOB'],
+        'BALANCE': [Decimal('-1234.56'), Decimal('0.50')],
+        'VISITS': [-42, 300],
+        'AMOUNT_1': [Decimal('99.9'), Decimal('0.0')],
+        'AMOUNT_2': [Decimal('-0.5'), Decimal('0.1')],
+        'STATUS-CODE': ['A', 'I'],
+    }
+
+
+def test_invalid_and_blank_numbers_are_null():
+    layout = parse_copybook(COPYBOOK)
+    data = bytearray(record(1, 'X', 1, 1, [1, 1]))
+    data[0:5] = ebcdic(' ' * 5)
+    data[15:19] = b'\xff\xff\xff\xff'
+    rows = np.frombuffer(bytes(data), dtype=np.uint8).reshape(-1, RECORD_LENGTH)
+    batch = decode_batch(rows, layout, decode_table('IBM-1047')).to_pydict()
+    assert batch['CUST-ID'] == [None]
+    assert batch['BALANCE'] == [None]
+    assert batch['VISITS'] == [1]
+
+
+@pytest.mark.parametrize('extension', ['.parquet', '.arrow'])
+def test_extract_and_page(tmp_path, extension):
+    layout = parse_copybook(COPYBOOK)
+    raw_path = tmp_path / 'raw.bin'
+    raw_path.write_bytes(b''.join(record(number, f"NAME{number}", number * 100, number % 1000, [number % 999, 0])
+                                  for number in range(1000)))
+    output_path = str(tmp_path / f"columns{extension}")
+    progress = []
+    # Small batches spread the rows over many row groups or record batches
+    result = extract_columns(str(raw_path), layout, output_path, batch_bytes=RECORD_LENGTH * 64,
+                             progress_callback=lambda done, total: progress.append((done, total)))
+    assert result['records'] == 1000
+    assert progress[-1] == (1000, 1000)
+    assert count_rows(output_path) == 1000
+
+    page = read_page(output_path, 3, page_size=100)
+    assert page['CUST-ID'].tolist() == list(range(300, 400))
+    assert page['CUST-NAME'].iloc[0] == 'NAME300'
+    assert read_page(output_path, 9, page_size=100)['CUST-ID'].tolist() == list(range(900, 1000))
+    assert read_page(output_path, 10, page_size=100).empty
+
+
+def test_extract_rejects_short_lrecl(tmp_path):
+    raw_path = tmp_path / 'raw.bin'
+    raw_path.write_bytes(b'')
+    with pytest.raises(ValueError, match='shorter than'):
+        extract_columns(str(raw_path), parse_copybook(COPYBOOK), str(tmp_path / 'out.parquet'), lrecl=20)
@@ -0,0 +1,138 @@
+import io
+import random
+
+import pytest
+
+from utils.diff_utils import compare, diff_records, iter_file_lines, records_differ, unified_hunks
+
+
+def mutate(rng, lines):
+    """A copy of ``lines`` with a few random insertions, deletions and replacements"""
+    result = list(lines)
+    for _ in range(rng.randint(0, 8)):
+        position = rng.randint(0, len(result))
+        action = rng.choice(('insert', 'delete', 'replace'))
+        run = rng.randint(1, 5)
+        new = [f"NEW {rng.randint(0, 99)}" for _ in range(run)]
+        if action == 'insert' or position == len(result):
+            result[position:position] = new
+        elif action == 'delete':
+            del result[position:position + run]
+        else:
+            result[position:position + run] = new
+    return result
+
+
+def random_case(seed):
+    rng = random.Random(seed)
+    # A small alphabet makes repeated records, the hard case for aligning windows
+    left = [f"REC {rng.randint(0, 20)}" for _ in range(rng.randint(0, 400))]
+    return left, mutate(rng, left)
+
+
+def apply_hunks(left, hunks):
+    """Rebuild the right side from the left one and its unified hunks, checking every context line"""
+    result = []
+    position = 1
+    for hunk in hunks:
+        assert hunk['left_start'] >= position
+        result.extend(left[position - 1:hunk['left_start'] - 1])
+        position = hunk['left_start']
+        for line in hunk['lines']:
+            tag, text = line[0], line[1:]
+            if tag in ' -':
+                assert left[position - 1] == text
+                position += 1
+            if tag in ' +':
+                result.append(text)
+        assert position == hunk['left_start'] + hunk['left_count']
+    result.extend(left[position - 1:])
+    return result
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_random_hunks_apply(seed):
+    left, right = random_case(seed)
+    events = diff_records(left, right, ignore_trailing_blanks=False, block_records=8, window_blocks=2)
+    hunks = list(unified_hunks(events, context=3))
+    assert apply_hunks(left, hunks) == right
+    for hunk in hunks:
+        assert sum(line[0] in ' +' for line in hunk['lines']) == hunk['right_count']
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_events_cover_both_sides(seed):
+    left, right = random_case(seed)
+    rebuilt_left, rebuilt_right = [], []
+    for event in diff_records(left, right, ignore_trailing_blanks=False, block_records=4, window_blocks=3):
+        if event[0] == 'equal':
+            _, left_line, right_line, lines = event
+            assert left[left_line - 1:left_line - 1 + len(lines)] == lines
+            assert right[right_line - 1:right_line - 1 + len(lines)] == lines
+            rebuilt_left.extend(lines)
+            rebuilt_right.extend(lines)
+        else:
+            _, left_line, old_lines, right_line, new_lines = event
+            assert len(rebuilt_left) == left_line - 1 and len(rebuilt_right) == right_line - 1
+            rebuilt_left.extend(old_lines)
+            rebuilt_right.extend(new_lines)
+    assert rebuilt_left == left
+    assert rebuilt_right == right
+
+
+def test_hunk_context_and_merging():
+    left = [f"L{number}" for number in range(1, 31)]
+    right = list(left)
+    right[4] = 'CHANGED 5'
+    right[10] = 'CHANGED 11'
+    right[25] = 'CHANGED 26'
+    hunks = list(unified_hunks(diff_records(left, right), context=3))
+    # Changes 6 equal lines apart share a hunk, 14 apart do not
+    assert [(hunk['left_start'], hunk['left_count']) for hunk in hunks] == [(2, 13), (23, 7)]
+    assert hunks[1]['lines'] == [' L23', ' L24', ' L25', '-L26', '+CHANGED 26', ' L27', ' L28', ' L29']
+
+
+def test_long_hunks_are_split():
+    left = [f"OLD {number}" for number in range(100)]
+    right = [f"NEW {number}" for number in range(100)]
+    hunks = list(unified_hunks(diff_records(left, right, block_records=10), max_lines=50))
+    assert len(hunks) > 1
+    assert apply_hunks(left, hunks) == right
+
+
+def test_trailing_blanks():
+    assert not records_differ(['A   ', 'B\n'], ['A', 'B'])
+    assert records_differ(['A   '], ['A'], ignore_trailing_blanks=False)
+    assert records_differ(['A'], ['A', 'B'])
+    assert not records_differ([], [])
+
+
+def test_iter_file_lines(tmp_path):
+    path = tmp_path / 'local.txt'
+    path.write_text('one\ntwo\n')
+    assert list(iter_file_lines(str(path))) == ['one\n', 'two\n']
+    upload = io.BytesIO(b'caf\xc3\xa9\nlast')
+    assert list(iter_file_lines(upload)) == ['café\n', 'last']
+    assert not upload.closed
+
+
+def test_compare_pages(tmp_path):
+    left = [f"LINE {number}" for number in range(1000)]
+    right = [line if number % 50 else f"CHANGED {number}" for number, line in enumerate(left)]
+    result = compare(left, right, 'LEFT.DS', 'right.txt', directory=tmp_path, page_lines=25)
+    assert result.hunks == 20
+    assert result.removed == result.added == 20
+    assert (result.left_records, result.right_records) == (1000, 1000)
+    lines = [line for page in range(1, result.pages + 1) for line in result.page(page)]
+    assert lines[:3] == ['--- LEFT.DS', '+++ right.txt', '@@ -1,4 +1,4 @@']
+    assert all(len(result.page(page)) == 25 for page in range(1, result.pages))
+    assert result.page(result.pages + 1) == []
+    result.close()
+    assert not result.path.exists()
+
+
+def test_compare_identical(tmp_path):
+    result = compare(['A', 'B'], ['A', 'B'], 'LEFT', 'RIGHT', directory=tmp_path)
+    assert result.identical
+    assert result.pages == 0
+    result.close()
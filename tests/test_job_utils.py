@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+from utils import job_utils
+from utils.job_utils import JobMonitor
+
+# The SDK silences this warning when an API object is built, pytest restores the filters between tests
+pytestmark = pytest.mark.filterwarnings('ignore::urllib3.exceptions.InsecureRequestWarning')
+
+JCL = "//PAYROLL JOB (ACCT),'PAYROLL',CLASS=A\n//STEP1 EXEC PGM=IEFBR14\n"
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+class Connection:
+    """Builds SDK API objects for a profile, like a pooled connection"""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def api(self, api_class):
+        return api_class(self.profile)
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    # Spool output is written below the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(job_utils, 'POLL_INITIAL_SECONDS', 0.02)
+    monkeypatch.setattr(job_utils, 'POLL_MAX_SECONDS', 0.08)
+    monitor = JobMonitor(max_workers=2)
+    yield monitor
+    # The scheduler thread outlives the test, stop it polling the stopped server
+    for owner in ('session-1', 'session-2'):
+        monitor.release(owner)
+
+
+@pytest.fixture
+def ranges(monkeypatch):
+    """The first record of every spool read"""
+    starts = []
+    read_spool_records = job_utils.read_spool_records
+
+    def recording_read(jobs_api, correlator, file_id, start, count=job_utils.SPOOL_RECORD_BATCH):
+        starts.append((file_id, start))
+        return read_spool_records(jobs_api, correlator, file_id, start, count)
+
+    monkeypatch.setattr(job_utils, 'read_spool_records', recording_read)
+    return starts
+
+
+def test_spool_is_read_from_the_last_record(tmp_path, zosmf, connection, monitor, ranges):
+    job = monitor.submit('session-1', Connection(connection), jcl_text=JCL)
+    assert (job.jobname, job.status) == ('PAYROLL', 'INPUT')
+    host_job = zosmf.jobs[job.jobid]
+    host_job.write('JESMSGLG', 'PAYROLL STARTED', stepname='JES2')
+    host_job.write('SYSPRINT', 'LINE 1\nLINE 2\nLINE 3')
+    wait_until(lambda: sum(spool.records_read for spool in job.spool_files.values()) == 4)
+    host_job.write('SYSPRINT', 'LINE 4\nLINE 5')
+    host_job.end('CC 0004')
+    wait_until(lambda: job.done)
+
+    assert (job.status, job.retcode) == ('OUTPUT', 'CC 0004')
+    assert sorted(ranges) == [(1, 0), (2, 0), (2, 3)]
+    sysprint = job.spool_files[2]
+    assert (sysprint.ddname, sysprint.records_read) == ('SYSPRINT', 5)
+    with open(sysprint.path) as f:
+        assert f.read() == 'LINE 1\nLINE 2\nLINE 3\nLINE 4\nLINE 5\n'
+    assert job.summary()['records'] == 6
+    assert monitor.jobs_for('session-1') == [job]
+    assert monitor.jobs_for('session-2') == []
+
+
+def test_jcl_is_submitted_from_a_dataset(zosmf, connection, monitor):
+    zosmf.add_dataset('USER.JCL(PAYROLL)', JCL.encode())
+    job = monitor.submit('session-1', Connection(connection), jcl_dataset='USER.JCL(PAYROLL)')
+    assert zosmf.jobs[job.jobid].jcl == JCL
+
+
+def test_polls_back_off_while_nothing_changes(zosmf, connection, monitor):
+    job = monitor.submit('session-1', Connection(connection), jcl_text=JCL)
+    wait_until(lambda: job.interval == job_utils.POLL_MAX_SECONDS)
+    zosmf.jobs[job.jobid].write('SYSPRINT', 'LINE 1')
+    wait_until(lambda: job.interval == job_utils.POLL_INITIAL_SECONDS)
+
+
+def polls_stop(zosmf):
+    """Wait out a poll already under way, then check no more arrive"""
+    time.sleep(0.2)
+    requests = zosmf.requests
+    time.sleep(0.3)
+    return zosmf.requests == requests
+
+
+def test_forgotten_job_is_no_longer_polled(zosmf, connection, monitor):
+    job = monitor.submit('session-1', Connection(connection), jcl_text=JCL)
+    wait_until(lambda: zosmf.requests >= 4)
+    monitor.forget('session-1', job)
+    assert monitor.jobs_for('session-1') == []
+    assert polls_stop(zosmf)
+
+
+def test_release_stops_every_job_of_the_session(zosmf, connection, monitor):
+    for _ in range(3):
+        monitor.submit('session-1', Connection(connection), jcl_text=JCL)
+    other = monitor.submit('session-2', Connection(connection), jcl_text=JCL)
+    zosmf.jobs[other.jobid].end()
+    wait_until(lambda: other.done)
+    monitor.release('session-1')
+    assert monitor.jobs_for('session-1') == []
+    assert polls_stop(zosmf)
+    assert monitor.jobs_for('session-2') == [other]
+
+
+def test_ended_jobs_are_dropped_after_retention(zosmf, connection, monitor):
+    job = monitor.submit('session-1', Connection(connection), jcl_text=JCL)
+    zosmf.jobs[job.jobid].end()
+    wait_until(lambda: job.done)
+    job.ended = time.time() - monitor.retention - 1
+    assert monitor.jobs_for('session-1') == []
@@ -0,0 +1,84 @@
+import json
+import logging
+import os
+import queue
+import sys
+import time
+
+from utils.logging_utils import DroppingQueueHandler, JsonFormatter, RotatingLogHandler
+
+
+def make_record(msg, *args, level=logging.INFO, exc_info=None, **extra):
+    return logging.getLogger('zowe.test').makeRecord('zowe.test', level, __file__, 10, msg, args, exc_info,
+                                                     extra=extra)
+
+
+def test_json_line_keeps_extra_fields():
+    line = JsonFormatter().format(make_record('Downloaded %s', 'USER.DATA', dataset='USER.DATA', bytes=1024))
+    entry = json.loads(line)
+    assert '\n' not in line
+    assert entry['message'] == 'Downloaded USER.DATA'
+    assert (entry['level'], entry['logger']) == ('INFO', 'zowe.test')
+    assert (entry['dataset'], entry['bytes']) == ('USER.DATA', 1024)
+    assert 'exception' not in entry
+
+
+def test_json_line_includes_the_traceback():
+    try:
+        raise RuntimeError('RECFM mismatch')
+    except RuntimeError:
+        record = make_record('Upload failed', level=logging.ERROR, exc_info=sys.exc_info())
+    entry = json.loads(JsonFormatter().format(record))
+    assert 'RuntimeError: RECFM mismatch' in entry['exception']
+
+
+def test_records_are_rendered_before_queueing():
+    handler = DroppingQueueHandler(queue.Queue())
+    values = ['USER.DATA']
+    handler.handle(make_record('Downloaded %s', values, dataset='USER.DATA'))
+    values.append('USER.OTHER')
+    record = handler.queue.get_nowait()
+    assert (record.msg, record.args) == ("Downloaded ['USER.DATA']", None)
+    assert record.dataset == 'USER.DATA'
+
+
+def test_full_queue_drops_and_reports():
+    handler = DroppingQueueHandler(queue.Queue(2))
+    for number in range(5):
+        handler.handle(make_record(f"message {number}"))
+    assert handler.dropped == 3
+    handler.queue.get_nowait()
+    handler.queue.get_nowait()
+    handler.handle(make_record('message 5'))
+    notice = handler.queue.get_nowait()
+    assert notice.levelname == 'WARNING'
+    assert notice.getMessage() == 'Dropped 3 log records, the log writer fell behind'
+    assert handler.queue.get_nowait().getMessage() == 'message 5'
+
+
+def test_file_is_rotated_past_the_size_limit(tmp_path):
+    handler = RotatingLogHandler(tmp_path / 'app.log', max_bytes=1000, retention_days=7)
+    handler.setFormatter(JsonFormatter())
+    try:
+        for number in range(50):
+            handler.handle(make_record(f"message {number:04d}"))
+    finally:
+        handler.close()
+    rotated = sorted(path for path in tmp_path.iterdir() if path.name != 'app.log')
+    assert rotated
+    lines = [line for path in [*rotated, tmp_path / 'app.log'] for line in path.read_text().splitlines()]
+    assert [json.loads(line)['message'] for line in lines] == [f"message {number:04d}" for number in range(50)]
+    assert all(path.stat().st_size < 1000 + 500 for path in rotated)
+
+
+def test_expired_logs_are_removed(tmp_path):
+    old = time.time() - 8 * 86400
+    for name in ('app.log.20240101_000000', 'zowe_app_20240101.log'):
+        (tmp_path / name).write_text('old\n')
+        os.utime(tmp_path / name, (old, old))
+    (tmp_path / 'app.log.20990101_000000').write_text('recent\n')
+    (tmp_path / 'notes.txt').write_text('not a log\n')
+    os.utime(tmp_path / 'notes.txt', (old, old))
+    handler = RotatingLogHandler(tmp_path / 'app.log', max_bytes=0, retention_days=7)
+    handler.close()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['app.log', 'app.log.20990101_000000', 'notes.txt']
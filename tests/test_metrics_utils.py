@@ -0,0 +1,126 @@
+import bisect
+import math
+import random
+
+import pytest
+from zowe.zos_jobs_for_zowe_sdk import Jobs
+
+from utils.job_utils import read_spool_records
+from utils.metrics_utils import LATENCY_BUCKETS, MetricsRegistry, _Series, operation_name
+
+
+def series_of(latencies):
+    series = _Series()
+    for seconds in latencies:
+        series.observe(seconds, 0, 0, False)
+    return series
+
+
+def bucket_bounds(seconds):
+    """Lower and upper bound of the histogram bucket holding ``seconds``"""
+    index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+    lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+    upper = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else math.inf
+    return lower, upper
+
+
+def test_empty_series():
+    assert _Series().quantile(0.5) == 0.0
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_quantile_stays_in_the_bucket_of_the_exact_value(seed):
+    rng = random.Random(seed)
+    latencies = [rng.lognormvariate(-3, 1.5) for _ in range(rng.randint(1, 2000))]
+    series = series_of(latencies)
+    ordered = sorted(latencies)
+    previous = 0.0
+    for q in (0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 1.0):
+        exact = ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+        lower, upper = bucket_bounds(exact)
+        estimate = series.quantile(q)
+        assert lower <= estimate <= min(upper, series.max_seconds)
+        assert estimate >= previous
+        previous = estimate
+
+
+def test_quantile_interpolates_within_a_bucket():
+    # Four calls between 0.1s and 0.25s: the median is half way through the bucket
+    series = series_of([0.2, 0.2, 0.2, 0.25])
+    assert series.quantile(0.5) == pytest.approx(0.175)
+    assert series.quantile(1.0) == pytest.approx(0.25)
+
+
+def test_quantile_never_exceeds_the_slowest_call():
+    series = series_of([0.003] * 10)
+    assert series.quantile(0.99) <= 0.003
+    assert series_of([500.0, 700.0]).quantile(0.5) == 700.0
+
+
+def test_observe_counts():
+    series = _Series()
+    series.observe(0.5, 10, 20, False)
+    series.observe(1.5, 5, 0, True)
+    assert (series.count, series.errors, series.bytes_sent, series.bytes_received) == (2, 1, 15, 20)
+    assert series.seconds == pytest.approx(2.0)
+    assert series.max_seconds == 1.5
+    assert sum(series.buckets) == 2
+
+
+def test_registry_snapshot_and_prometheus_text():
+    registry = MetricsRegistry()
+    registry.observe('lpar1', 'datasets.download', 2.0, bytes_received=1024 * 1024)
+    registry.observe('lpar1', 'datasets.download', 0.004)
+    with pytest.raises(RuntimeError):
+        with registry.timed('lpar"2', 'auth.login'):
+            raise RuntimeError('refused')
+    rows = registry.snapshot()
+    assert [row['operation'] for row in rows] == ['datasets.download', 'auth.login']
+    assert rows[0]['calls'] == 2 and rows[1]['errors'] == 1
+    text = registry.prometheus_text()
+    assert 'zosmf_request_duration_seconds_bucket{host="lpar1",operation="datasets.download",le="0.005"} 1' in text
+    assert 'zosmf_request_duration_seconds_bucket{host="lpar1",operation="datasets.download",le="+Inf"} 2' in text
+    assert 'zosmf_request_errors_total{host="lpar\\"2",operation="auth.login"} 1' in text
+
+
+@pytest.mark.parametrize('method, url, operation', [
+    ('GET', 'https://lpar1/zosmf/info', 'zosmf.get_info'),
+    ('DELETE', 'https://lpar1/zosmf/services/authenticate', 'auth.logout'),
+    ('GET', 'https://lpar1/zosmf/restfiles/ds?dslevel=USER.*', 'datasets.list'),
+    ('PUT', 'https://lpar1/zosmf/restfiles/ds/USER.DATA', 'datasets.write'),
+    ('GET', 'https://lpar1/zosmf/restfiles/ds/USER.PDS/member', 'datasets.list_members'),
+    ('GET', 'https://lpar1/elsewhere', 'get other'),
+])
+def test_operation_name(method, url, operation):
+    assert operation_name(method, url) == operation
+
+
+CORRELATOR = 'J0000001LPAR1.....D9F1.......:'
+
+
+@pytest.mark.parametrize('call, operation', [
+    (lambda jobs_api: jobs_api.submit_plaintext('//JOB1 JOB'), 'jobs.submit'),
+    (lambda jobs_api: jobs_api.get_job_status('JOB1', 'J0000001'), 'jobs.status'),
+    (lambda jobs_api: jobs_api.cancel_job('JOB1', 'J0000001'), 'jobs.cancel'),
+    (lambda jobs_api: jobs_api.delete_job('JOB1', 'J0000001'), 'jobs.purge'),
+    (lambda jobs_api: jobs_api.get_spool_files(CORRELATOR), 'jobs.list_spool'),
+    (lambda jobs_api: jobs_api.get_spool_file_contents(CORRELATOR, 2), 'jobs.read_spool'),
+    (lambda jobs_api: read_spool_records(jobs_api, CORRELATOR, 2, 0), 'jobs.read_spool'),
+])
+def test_operation_name_of_job_requests(call, operation):
+    """Job URLs as the SDK and read_spool_records build them, with encoded slashes"""
+    jobs_api = Jobs({'host': 'lpar1', 'user': 'IBMUSER', 'password': 'secret'})
+    requests = []
+
+    def perform_request(method, custom_args, expected_code=None, **options):
+        requests.append((method, custom_args['url']))
+        return [] if custom_args['url'].endswith('files') else ''
+
+    jobs_api.request_handler.perform_request = perform_request
+    try:
+        call(jobs_api)
+    except Exception:
+        # Only the request matters, not how the SDK parses the canned response
+        pass
+    method, url = requests[-1]
+    assert operation_name(method, url) == operation
@@ -0,0 +1,103 @@
+import pytest
+from zowe.zos_files_for_zowe_sdk import Datasets
+
+from utils.pds_utils import download_members, list_all_members, member_name_from_file, upload_members
+from utils.resume_utils import Checkpoint
+from utils.sync_utils import SyncIndex
+
+HOST = '127.0.0.1'
+MEMBERS = {f"MEM{number}": b''.join(b'MEM%d LINE %04d\n' % (number, line) for line in range(200))
+           for number in range(5)}
+
+
+@pytest.fixture
+def pds(zosmf):
+    for member, data in MEMBERS.items():
+        zosmf.add_dataset(f"USER.PDS({member})", data)
+    return zosmf.datasets
+
+
+@pytest.fixture
+def api_factory(connection):
+    return lambda: Datasets(connection)
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    # Upload checkpoints are written below the working directory
+    monkeypatch.chdir(tmp_path)
+    return SyncIndex(tmp_path / 'index.db')
+
+
+def statuses(batch):
+    rows = []
+    for rows in batch:
+        pass
+    return {row['name']: row['status'] for row in rows}
+
+
+def test_member_names():
+    assert member_name_from_file('src/payroll.cbl') == 'PAYROLL'
+    with pytest.raises(ValueError):
+        member_name_from_file('too_long_name.cbl')
+
+
+def test_members_are_listed_past_the_page_size(api_factory, pds):
+    assert sorted(list_all_members(api_factory(), 'USER.PDS', page_size=2)) == sorted(MEMBERS)
+
+
+def test_unchanged_members_are_not_downloaded_again(tmp_path, zosmf, api_factory, pds, index):
+    def download():
+        return statuses(download_members(api_factory, 'USER.PDS', str(tmp_path / 'out'), HOST, index,
+                                         max_workers=3, poll_interval=0.01))
+
+    assert download() == dict.fromkeys(MEMBERS, 'done')
+    pds['USER.PDS(MEM1)'].set_data(b'EDITED ON THE HOST\n')
+    (tmp_path / 'out' / 'MEM2').write_bytes(b'EDITED LOCALLY\n')
+    requests = zosmf.requests
+    assert download() == {**dict.fromkeys(MEMBERS, 'skipped'), 'MEM1': 'done', 'MEM2': 'done'}
+    # The member list and the two changed members, nothing else
+    assert zosmf.requests == requests + 3
+    for member in MEMBERS:
+        assert (tmp_path / 'out' / member).read_bytes() == pds[f"USER.PDS({member})"].data
+
+
+def test_unchanged_members_are_not_uploaded_again(zosmf, api_factory, pds, index):
+    sources = {member: (lambda data=data: data[::-1]) for member, data in MEMBERS.items()}
+    sources['NEWMEM'] = lambda: b'A NEW MEMBER\n'
+
+    def upload():
+        return statuses(upload_members(api_factory, 'USER.PDS', sources, HOST, index,
+                                       max_workers=3, poll_interval=0.01))
+
+    assert upload() == dict.fromkeys(sources, 'done')
+    assert pds['USER.PDS(NEWMEM)'].data == b'A NEW MEMBER\n'
+    assert pds['USER.PDS(MEM0)'].data == MEMBERS['MEM0'][::-1]
+    # An edit on the host since the last upload is overwritten
+    pds['USER.PDS(MEM1)'].set_data(b'EDITED ON THE HOST\n')
+    assert upload() == {**dict.fromkeys(sources, 'skipped'), 'MEM1': 'done'}
+    assert pds['USER.PDS(MEM1)'].data == MEMBERS['MEM1'][::-1]
+    assert Checkpoint('upload', HOST, 'USER.PDS').load() is None
+
+
+def test_interrupted_upload_skips_confirmed_members(zosmf, api_factory, pds, index):
+    def unreadable():
+        raise OSError('file went away')
+
+    sources = {member: (lambda data=data: data[::-1]) for member, data in MEMBERS.items()}
+    sources['MEM3'] = unreadable
+    assert statuses(upload_members(api_factory, 'USER.PDS', sources, HOST, index,
+                                   max_workers=1, poll_interval=0.01))['MEM3'] == 'failed'
+    assert Checkpoint('upload', HOST, 'USER.PDS').load()
+
+    # The host copies are edited, so only the checkpoint can tell they were sent
+    for member in MEMBERS:
+        pds[f"USER.PDS({member})"].modifications += 1
+    sources['MEM3'] = lambda: MEMBERS['MEM3'][::-1]
+    requests = zosmf.requests
+    result = statuses(upload_members(api_factory, 'USER.PDS', sources, HOST, index,
+                                     max_workers=1, poll_interval=0.01))
+    assert result == {**dict.fromkeys(MEMBERS, 'skipped'), 'MEM3': 'done'}
+    # Two member lists and one upload
+    assert zosmf.requests == requests + 3
+    assert Checkpoint('upload', HOST, 'USER.PDS').load() is None
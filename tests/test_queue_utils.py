@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from utils.queue_utils import TransferCancelled, TransferManager
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def blocking_task(release):
+    """A transfer reporting progress until ``release`` is set, like the streaming helpers"""
+    def run(job):
+        while not release.wait(0.01):
+            job.report(1, 10)
+        return 'copied'
+    return run
+
+
+@pytest.fixture
+def manager():
+    return TransferManager(max_workers=2)
+
+
+@pytest.fixture
+def release():
+    """Ends the blocking transfers, also when a test fails"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_job_runs_and_reports(manager, release):
+    job = manager.submit('session-1', 'download', 'USER.DATA', '/tmp/data', 'lpar1', blocking_task(release))
+    wait_until(lambda: job.bytes == 1)
+    assert job.state == 'running'
+    assert job.summary()['progress'] == 0.1
+    release.set()
+    job.future.result(5)
+    assert (job.state, job.detail) == ('done', 'copied')
+    assert manager.jobs_for('session-1') == [job]
+    assert manager.jobs_for('session-2') == []
+
+
+def test_cancel_running_and_queued(manager, release):
+    running = [manager.submit('session-1', 'download', f"USER.DS{number}", None, 'lpar1', blocking_task(release))
+               for number in range(2)]
+    wait_until(lambda: all(job.state == 'running' for job in running))
+    queued = manager.submit('session-1', 'upload', 'USER.DS2', None, 'lpar1', blocking_task(release))
+    assert not manager.cancel('session-2', running[0].id)
+    assert manager.cancel('session-1', running[0].id)
+    assert manager.cancel('session-1', queued.id)
+    wait_until(lambda: running[0].state == 'cancelled')
+    assert queued.state == 'cancelled'
+    release.set()
+    running[1].future.result(5)
+    assert running[1].state == 'done'
+
+
+def test_failed_job_keeps_the_error(manager):
+    def fail(job):
+        raise RuntimeError('RECFM mismatch')
+
+    job = manager.submit('session-1', 'upload', 'USER.DATA', None, 'lpar1', fail)
+    job.future.result(5)
+    assert (job.state, job.error) == ('failed', 'RECFM mismatch')
+
+
+def test_finished_jobs_are_pruned_after_retention():
+    manager = TransferManager(max_workers=1, retention=60)
+    old = manager.submit('session-1', 'download', 'USER.OLD', None, 'lpar1', lambda job: '')
+    recent = manager.submit('session-1', 'download', 'USER.NEW', None, 'lpar1', lambda job: '')
+    recent.future.result(5)
+    old.finished = time.time() - 120
+    assert manager.jobs_for('session-1') == [recent]
+
+
+def test_release_cancels_and_forgets_a_session(manager, release):
+    mine = manager.submit('session-1', 'download', 'USER.DATA', None, 'lpar1', blocking_task(release))
+    theirs = manager.submit('session-2', 'download', 'USER.DATA', None, 'lpar1', blocking_task(release))
+    wait_until(lambda: mine.state == 'running' and theirs.state == 'running')
+    manager.release('session-1')
+    assert manager.jobs_for('session-1') == []
+    wait_until(lambda: mine.state == 'cancelled')
+    assert theirs.state == 'running'
+
+
+def test_report_raises_once_cancelled(manager):
+    job = manager.submit('session-1', 'download', 'USER.DATA', None, 'lpar1', lambda job: '')
+    job.future.result(5)
+    job.cancel_requested.set()
+    with pytest.raises(TransferCancelled):
+        job.report(1)
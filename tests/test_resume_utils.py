@@ -0,0 +1,128 @@
+import pytest
+import requests
+from zowe.core_for_zowe_sdk.exceptions import RequestFailed
+
+from utils import resume_utils
+from utils.resume_utils import Checkpoint, resumable_download, with_retries
+
+DATA = b''.join(b'RECORD %06d %s\n' % (number, b'X' * (number % 50)) for number in range(20000))
+
+
+@pytest.fixture
+def dataset(zosmf):
+    zosmf.add_dataset('USER.DATA', DATA)
+    return zosmf.datasets['USER.DATA']
+
+
+@pytest.fixture
+def ranges(monkeypatch):
+    """The record range of every GET the download opens"""
+    requested = []
+    open_content = resume_utils.open_content
+
+    def recording_open_content(datasets_api, dataset_name, **options):
+        requested.append(options.get('record_range'))
+        return open_content(datasets_api, dataset_name, **options)
+
+    monkeypatch.setattr(resume_utils, 'open_content', recording_open_content)
+    return requested
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resume_utils.random, 'uniform', lambda low, high: 0.0)
+
+
+def interrupted(tmp_path, records, etag, content=DATA):
+    """A local file and checkpoint as left by a download that stopped after ``records`` records"""
+    output_path = tmp_path / 'data.txt'
+    committed = b''.join(content.splitlines(keepends=True)[:records])
+    output_path.write_bytes(committed + b'PARTIAL RECO')
+    Checkpoint('download', '127.0.0.1', 'USER.DATA', str(output_path), tmp_path / 'checkpoints').save(
+        records=records, bytes=len(committed), etag=etag)
+    return output_path
+
+
+def test_download_in_one_request(tmp_path, datasets_api, dataset, ranges):
+    output_path = tmp_path / 'data.txt'
+    result = resumable_download(datasets_api, '127.0.0.1', 'USER.DATA', str(output_path),
+                                checkpoint_dir=tmp_path / 'checkpoints')
+    assert output_path.read_bytes() == DATA
+    assert (result['records'], result['bytes'], result['resumed_from']) == (20000, len(DATA), 0)
+    assert ranges == [None]
+    assert not list((tmp_path / 'checkpoints').glob('*'))
+
+
+def test_resume_requests_the_remaining_records(tmp_path, datasets_api, dataset, ranges):
+    output_path = interrupted(tmp_path, 12345, dataset.etag)
+    result = resumable_download(datasets_api, '127.0.0.1', 'USER.DATA', str(output_path),
+                                checkpoint_dir=tmp_path / 'checkpoints')
+    assert output_path.read_bytes() == DATA
+    assert result['resumed_from'] == 12345
+    assert ranges == [(12345, resume_utils.REMAINING_RECORDS)]
+
+
+def test_resume_of_a_changed_dataset_starts_over(tmp_path, datasets_api, dataset, ranges):
+    old_content = DATA.replace(b'RECORD', b'OLDREC')
+    output_path = interrupted(tmp_path, 12345, 'etag-of-the-old-content', old_content)
+    result = resumable_download(datasets_api, '127.0.0.1', 'USER.DATA', str(output_path),
+                                checkpoint_dir=tmp_path / 'checkpoints')
+    assert output_path.read_bytes() == DATA
+    assert result['resumed_from'] == 0
+    assert ranges == [(12345, resume_utils.REMAINING_RECORDS), None]
+
+
+# With this seed the first response is cut off part way and the second one completes
+@pytest.mark.parametrize('zosmf', [{'disconnect_rate': 0.5, 'seed': 1}], indirect=True)
+def test_broken_download_continues_from_the_last_record(tmp_path, zosmf, datasets_api, dataset, ranges, no_backoff):
+    output_path = tmp_path / 'data.txt'
+    result = resumable_download(datasets_api, '127.0.0.1', 'USER.DATA', str(output_path), chunk_size=4096,
+                                checkpoint_dir=tmp_path / 'checkpoints')
+    assert output_path.read_bytes() == DATA
+    assert result['records'] == 20000
+    assert zosmf.faults == 1
+    # The retry asks for the records after the last one written
+    assert ranges[0] is None
+    assert 0 < ranges[1][0] < 20000
+    assert len(ranges) == 2
+
+
+def test_backoff_doubles_up_to_the_limit(monkeypatch):
+    delays = []
+    monkeypatch.setattr(resume_utils.random, 'uniform', lambda low, high: high)
+    monkeypatch.setattr(resume_utils.time, 'sleep', delays.append)
+    attempts = []
+
+    def operation():
+        attempts.append(1)
+        if len(attempts) < 6:
+            raise requests.ConnectionError('reset by peer')
+        return 'done'
+
+    assert with_retries(operation, 'Download', max_attempts=6, base_delay=1.0, max_delay=5.0) == 'done'
+    assert delays == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+def test_last_transient_failure_is_raised(monkeypatch, no_backoff):
+    monkeypatch.setattr(resume_utils.time, 'sleep', lambda seconds: None)
+    attempts = []
+
+    def operation():
+        attempts.append(1)
+        raise RequestFailed(503, 'Service Unavailable')
+
+    with pytest.raises(RequestFailed):
+        with_retries(operation, 'Download', max_attempts=3)
+    assert len(attempts) == 3
+
+
+def test_permanent_failure_is_not_retried():
+    attempts = []
+
+    def operation():
+        attempts.append(1)
+        raise RequestFailed(404, 'Data set not found')
+
+    with pytest.raises(RequestFailed):
+        with_retries(operation, 'Download')
+    assert len(attempts) == 1
@@ -0,0 +1,119 @@
+import pytest
+
+from utils.search_utils import (MAX_SEARCH_LENGTH, SearchUnsupported, parse_superc_listing, search_content,
+                                superc_jcl)
+
+# OUTDD of an ISRSUPC search of a PDS as read from the spool: ASA carriage control in column 1,
+# a page break in the middle of a member, and the summary listing the SRCHFOR statement
+PDS_LISTING = """\
+1  ISRSUPC   -   MVS/PDF FILE/LINE/WORD/BYTE/SFOR COMPARE UTILITY- ISPF FOR z/OS         2026/10/17  10.15    PAGE     1
+0  LINE-#  SOURCE SECTION                    SRCH DSN: USER.COBOL.SRC
+0
+   PAYROLL                     --------- STRING(S) FOUND -------------------
+0
+       14            MOVE CUSTOMER-ID TO WS-CUST-ID.
+       87            IF CUSTOMER-ID = ZERO
+1  ISRSUPC   -   MVS/PDF FILE/LINE/WORD/BYTE/SFOR COMPARE UTILITY- ISPF FOR z/OS         2026/10/17  10.15    PAGE     2
+0  LINE-#  SOURCE SECTION                    SRCH DSN: USER.COBOL.SRC
+0
+     1203            DISPLAY 'CUSTOMER-ID ' CUSTOMER-ID.
+0
+   RPT#01                      --------- STRING(S) FOUND -------------------
+0
+        3      * 2019 CUSTOMER-ID WIDENED
+1  ISRSUPC   -   MVS/PDF FILE/LINE/WORD/BYTE/SFOR COMPARE UTILITY- ISPF FOR z/OS         2026/10/17  10.15    PAGE     3
+0                                  SEARCH-FOR SUMMARY SECTION            SRCH DSN: USER.COBOL.SRC
+0
+   LINES-FOUND  LINES-PROC  MEMBERS-W/LNS  MEMBERS-WO/LNS  COMPARE-COLS  LONGEST-LINE
+        4         1650           2              5           1:80           80
+0
+   PROCESS OPTIONS USED: SEARCH(ANYC)
+0
+   THE FOLLOWING PROCESS STATEMENTS (USING COLUMNS 1:72) WERE PROCESSED:
+     SRCHFOR  'CUSTOMER-ID'
+"""
+
+# A sequential dataset has no member headers
+SEQUENTIAL_LISTING = """\
+1  ISRSUPC   -   MVS/PDF FILE/LINE/WORD/BYTE/SFOR COMPARE UTILITY- ISPF FOR z/OS         2026/10/17  10.20    PAGE     1
+0  LINE-#  SOURCE SECTION                    SRCH DSN: USER.PARMLIB.DATA
+0
+        2  SYSNAME=LPAR1
+0                                  SEARCH-FOR SUMMARY SECTION            SRCH DSN: USER.PARMLIB.DATA
+0
+   LINES-FOUND  LINES-PROC  MEMBERS-W/LNS  MEMBERS-WO/LNS  COMPARE-COLS  LONGEST-LINE
+        1           12           0              0           1:80           80
+"""
+
+
+def test_parse_pds_listing():
+    assert parse_superc_listing(PDS_LISTING, 'USER.COBOL.SRC') == [
+        ('USER.COBOL.SRC', 'PAYROLL', 14, '          MOVE CUSTOMER-ID TO WS-CUST-ID.'),
+        ('USER.COBOL.SRC', 'PAYROLL', 87, '          IF CUSTOMER-ID = ZERO'),
+        ('USER.COBOL.SRC', 'PAYROLL', 1203, "          DISPLAY 'CUSTOMER-ID ' CUSTOMER-ID."),
+        ('USER.COBOL.SRC', 'RPT#01', 3, '    * 2019 CUSTOMER-ID WIDENED'),
+    ]
+
+
+def test_parse_sequential_listing():
+    assert parse_superc_listing(SEQUENTIAL_LISTING, 'USER.PARMLIB.DATA') == [
+        ('USER.PARMLIB.DATA', '', 2, 'SYSNAME=LPAR1'),
+    ]
+
+
+def test_parse_empty_listing():
+    assert parse_superc_listing('', 'USER.DATA') == []
+
+
+def test_superc_jcl():
+    jcl = superc_jcl("//{jobname} JOB ,'SEARCH',CLASS=A", 'SRCH1', 'USER.COBOL.SRC', "IT'S", case_sensitive=False)
+    assert jcl.splitlines() == [
+        "//SRCH1 JOB ,'SEARCH',CLASS=A",
+        "//SEARCH   EXEC PGM=ISRSUPC,PARM=('SRCHCMP,ANYC')",
+        "//NEWDD    DD DISP=SHR,DSN=USER.COBOL.SRC",
+        "//OUTDD    DD SYSOUT=*",
+        "//SYSIN    DD *",
+        "  SRCHFOR 'IT''S'",
+        "/*",
+    ]
+    assert "PARM=('SRCHCMP')" in superc_jcl('//{jobname} JOB', 'SRCH1', 'USER.DATA', 'X', case_sensitive=True)
+
+
+@pytest.mark.parametrize('text', ['X' * (MAX_SEARCH_LENGTH + 1), "'" * (MAX_SEARCH_LENGTH // 2 + 1), 'A\nB'])
+def test_superc_jcl_rejects_long_or_multiline_strings(text):
+    with pytest.raises(ValueError):
+        superc_jcl('//{jobname} JOB', 'SRCH1', 'USER.DATA', text)
+
+
+@pytest.fixture
+def mock(zosmf):
+    records = [f"REC {number:04d} {'HIT' if number % 7 == 0 or 300 < number < 305 else 'MISS'}"
+               for number in range(3000)]
+    zosmf.add_dataset('USER.DATA', '\n'.join(records).encode())
+    return zosmf
+
+
+def test_search_content_reads_hits_in_blocks(mock, datasets_api):
+    before = mock.requests
+    hits = list(search_content(datasets_api, 'USER.DATA', 'hit', max_hits=1000, block_records=1000))
+    expected = [(number + 1, f"REC {number:04d} HIT") for number in range(3000)
+                if number % 7 == 0 or 300 < number < 305]
+    assert hits == expected
+    # Hits are close together, so each block of 1000 records is one request
+    assert mock.requests - before == 3
+
+
+def test_search_content_limits_hits(mock, datasets_api):
+    hits = list(search_content(datasets_api, 'USER.DATA', 'REC 030[1-4]', regex=True, case_sensitive=True,
+                               max_hits=3))
+    assert hits == [(302, 'REC 0301 HIT'), (303, 'REC 0302 HIT'), (304, 'REC 0303 HIT')]
+
+
+def test_search_content_without_hits(mock, datasets_api):
+    assert list(search_content(datasets_api, 'USER.DATA', 'NOWHERE')) == []
+
+
+def test_search_content_unsupported(mock, datasets_api):
+    mock.search_support = False
+    with pytest.raises(SearchUnsupported):
+        list(search_content(datasets_api, 'USER.DATA', 'HIT'))
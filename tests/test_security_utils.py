@@ -0,0 +1,149 @@
+import stat
+
+import pytest
+from cryptography.fernet import Fernet
+
+from utils import security_utils
+from utils.security_utils import CredentialManager, SecureProfileManager
+
+
+@pytest.fixture(autouse=True)
+def no_shared_key(monkeypatch):
+    monkeypatch.delenv('ZOWE_ENCRYPTION_KEY', raising=False)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return CredentialManager(key_file=tmp_path / 'encryption.key')
+
+
+def test_key_file_is_created_private(manager):
+    assert manager.key_file.read_bytes() == manager.key + b'\n'
+    assert stat.S_IMODE(manager.key_file.stat().st_mode) == 0o600
+    assert CredentialManager(key_file=manager.key_file).keys == [manager.key]
+
+
+def test_rotation_keeps_old_keys_for_decryption(manager):
+    old_key = manager.key
+    written_before = manager.encrypt('s3cret')
+    new_key = manager.rotate()
+    assert manager.keys == [new_key, old_key]
+    assert manager.decrypt(written_before) == 's3cret'
+    # New data is encrypted with the new key only
+    assert Fernet(new_key).decrypt(manager.encrypt('token').encode()) == b'token'
+    # The rotated key file is read back the same way, newest first
+    reloaded = CredentialManager(key_file=manager.key_file)
+    assert reloaded.keys == [new_key, old_key]
+    assert reloaded.decrypt(written_before) == 's3cret'
+
+
+def test_reencrypt_moves_a_value_to_the_newest_key(manager):
+    written_before = manager.encrypt('s3cret')
+    new_key = manager.rotate()
+    moved = manager.reencrypt(written_before)
+    assert Fernet(new_key).decrypt(moved.encode()) == b's3cret'
+    # Once the old key is dropped, only the moved value can still be read
+    only_new = CredentialManager(key_file=manager.key_file)
+    only_new.keys = [new_key]
+    only_new._initialize_fernet()
+    assert only_new.decrypt(moved) == 's3cret'
+    assert only_new.decrypt(written_before) is None
+
+
+def test_shared_keys_from_the_environment(tmp_path, monkeypatch):
+    new_key, old_key = Fernet.generate_key(), Fernet.generate_key()
+    written_before = Fernet(old_key).encrypt(b'token').decode()
+    monkeypatch.setenv('ZOWE_ENCRYPTION_KEY', f"{new_key.decode()},\n{old_key.decode()}")
+    manager = CredentialManager(key_file=tmp_path / 'encryption.key')
+    assert manager.keys == [new_key, old_key]
+    assert manager.decrypt(written_before) == 'token'
+    assert not manager.key_file.exists()
+    with pytest.raises(ValueError, match='ZOWE_ENCRYPTION_KEY'):
+        manager.rotate()
+
+
+def test_other_key_cannot_decrypt(manager, tmp_path):
+    other = CredentialManager(key_file=tmp_path / 'other.key')
+    assert other.decrypt(manager.encrypt('s3cret')) is None
+
+
+class FakeLayer:
+    """A config file of the profile manager, holding nested profiles"""
+
+    def __init__(self, profiles):
+        self.profiles = profiles
+        self.saves = 0
+
+    def get_profile_name_from_path(self, path):
+        segments = path.split('.')
+        return '.'.join(segments[i] for i in range(1, len(segments), 2) if segments[i - 1] != 'properties')
+
+    def find_profile(self, path, profiles):
+        profile = None
+        for name in path.split('.'):
+            profile = profiles.get(name)
+            profiles = (profile or {}).get('profiles') or {}
+        return profile
+
+    def set_property(self, json_path, value, secure=None):
+        profile = self.find_profile(self.get_profile_name_from_path(json_path), self.profiles)
+        profile.setdefault('properties', {})[json_path.split('.')[-1]] = value
+
+    def save(self):
+        self.saves += 1
+
+
+class FakeProfileManager:
+
+    def __init__(self, layer):
+        self.layer = layer
+        self.lookups = 0
+
+    def get_highest_priority_layer(self, json_path):
+        self.lookups += 1
+        return self.layer
+
+
+@pytest.fixture
+def shared_manager(manager, monkeypatch):
+    monkeypatch.setattr(security_utils, '_credential_manager', manager)
+    return manager
+
+
+def test_secure_property_round_trip(shared_manager):
+    layer = FakeLayer({'zosmf': {'properties': {'host': 'lpar1'}}})
+    profile_manager = FakeProfileManager(layer)
+    secure_profile = SecureProfileManager(profile_manager)
+    secure_profile.secure_property('profiles.zosmf.properties.user', 'IBMUSER')
+    secure_profile.secure_property('profiles.zosmf.properties.port', 443)
+    properties = layer.profiles['zosmf']['properties']
+    assert 'IBMUSER' not in properties['user_encrypted']
+    assert properties['port'] == 443
+    assert secure_profile.get_property('profiles.zosmf.properties.user') == 'IBMUSER'
+    assert secure_profile.get_property('profiles.zosmf.properties.host') == 'lpar1'
+    # The layer of a profile is looked up once
+    assert profile_manager.lookups == 1
+
+
+def test_cleanup_clears_every_sensitive_property(shared_manager):
+    layer = FakeLayer({
+        'zosmf': {'properties': {'host': 'lpar1', 'user': 'IBMUSER', 'certFile': '/certs/lpar1.pem'}},
+        'lpar': {'properties': {'password_encrypted': 'gAAAA'},
+                 'profiles': {'zosmf': {'properties': {'password': 'plain', 'port': 443}}}},
+    })
+    SecureProfileManager(FakeProfileManager(layer)).cleanup()
+    assert layer.profiles == {
+        'zosmf': {'properties': {'host': 'lpar1', 'user': None, 'certFile': None}},
+        'lpar': {'properties': {'password_encrypted': None},
+                 'profiles': {'zosmf': {'properties': {'password': None, 'port': 443}}}},
+    }
+    assert layer.saves == 1
+
+
+def test_cleanup_without_sensitive_properties_writes_nothing(shared_manager):
+    layer = FakeLayer({'zosmf': {'properties': {'host': 'lpar1', 'user': None}}})
+    secure_profile = SecureProfileManager(FakeProfileManager(layer))
+    secure_profile.cleanup()
+    assert layer.saves == 0
+    assert secure_profile.profile_manager is None
+    secure_profile.cleanup()
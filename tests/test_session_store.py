@@ -0,0 +1,210 @@
+import socket
+import socketserver
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+
+from utils.security_utils import CredentialManager
+from utils.session_store import (MemorySessionBackend, RedisSessionBackend, SessionStore, SQLiteSessionBackend,
+                                 create_backend)
+
+PASSWORD = 's3cret'
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """Just enough of a Redis server for the session backend: AUTH, SELECT, SET with PX, GET and DEL"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _FakeRedisHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+        self.connections = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"redis://:{PASSWORD}@127.0.0.1:{self.server_address[1]}/2"
+
+
+class _FakeRedisHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        self.server.connections += 1
+        authenticated = False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2].decode())
+            command = args[0].upper()
+            if command == 'AUTH':
+                authenticated = args[-1] == PASSWORD
+                self.wfile.write(b'+OK\r\n' if authenticated else b'-WRONGPASS invalid password\r\n')
+            elif not authenticated:
+                self.wfile.write(b'-NOAUTH Authentication required\r\n')
+            elif command == 'SELECT':
+                self.wfile.write(b'+OK\r\n')
+            elif command == 'SET':
+                with self.server.lock:
+                    self.server.data[args[1]] = (args[2], time.time() + int(args[4]) / 1000)
+                self.wfile.write(b'+OK\r\n')
+            elif command == 'GET':
+                with self.server.lock:
+                    value, expires = self.server.data.get(args[1], (None, 0))
+                if value is None or expires <= time.time():
+                    self.wfile.write(b'$-1\r\n')
+                else:
+                    data = value.encode()
+                    self.wfile.write(b'$%d\r\n%s\r\n' % (len(data), data))
+            elif command == 'DEL':
+                with self.server.lock:
+                    deleted = self.server.data.pop(args[1], None) is not None
+                self.wfile.write(b':%d\r\n' % deleted)
+            else:
+                self.wfile.write(b'-ERR unknown command\r\n')
+
+
+@pytest.fixture
+def redis_server():
+    server = FakeRedis()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=['memory', 'sqlite', 'redis'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemorySessionBackend()
+    if request.param == 'sqlite':
+        return SQLiteSessionBackend(tmp_path / 'sessions.db')
+    return RedisSessionBackend(request.getfixturevalue('redis_server').url)
+
+
+@pytest.fixture
+def credential_manager(tmp_path, monkeypatch):
+    monkeypatch.delenv('ZOWE_ENCRYPTION_KEY', raising=False)
+    return CredentialManager(key_file=tmp_path / 'encryption.key')
+
+
+def test_backend_set_get_delete(backend):
+    assert backend.get('missing') is None
+    backend.set('key', 'value', 60)
+    assert backend.get('key') == 'value'
+    backend.set('key', 'replaced', 60)
+    assert backend.get('key') == 'replaced'
+    backend.delete('key')
+    assert backend.get('key') is None
+    backend.delete('key')
+
+
+def test_backend_expiry(backend):
+    backend.set('short', 'value', 0.05)
+    backend.set('long', 'value', 60)
+    time.sleep(0.1)
+    assert backend.get('short') is None
+    assert backend.get('long') == 'value'
+
+
+def test_sqlite_backend_is_shared_through_the_file(tmp_path):
+    SQLiteSessionBackend(tmp_path / 'sessions.db').set('key', 'value', 60)
+    assert SQLiteSessionBackend(tmp_path / 'sessions.db').get('key') == 'value'
+
+
+def test_redis_backend_reconnects(redis_server):
+    backend = RedisSessionBackend(redis_server.url)
+    backend.set('key', 'value', 60)
+    stale = backend._local.sock
+    # As when the server closed an idle connection
+    stale.shutdown(socket.SHUT_RDWR)
+    assert backend.get('key') == 'value'
+    assert redis_server.connections == 2
+    # The stale socket is closed, not left for the garbage collector
+    assert stale.fileno() == -1
+
+
+def test_redis_backend_wrong_password(redis_server):
+    backend = RedisSessionBackend(redis_server.url.replace(PASSWORD, 'wrong'))
+    with pytest.raises(RuntimeError, match='WRONGPASS'):
+        backend.get('key')
+    # The unauthenticated connection is not kept for the next command
+    assert backend._local.sock is None
+
+
+@pytest.mark.parametrize('config, backend_type', [
+    ({'backend': 'memory'}, MemorySessionBackend),
+    ({'backend': 'redis', 'redis_url': 'rediss://cache.example:6380/1'}, RedisSessionBackend),
+])
+def test_create_backend(config, backend_type):
+    assert isinstance(create_backend(config), backend_type)
+
+
+@pytest.mark.parametrize('config', [{'backend': 'memcached'}, {'backend': 'redis', 'redis_url': 'http://x'}])
+def test_create_backend_rejects_unknown(config):
+    with pytest.raises(ValueError):
+        create_backend(config)
+
+
+def test_store_round_trip(backend, credential_manager):
+    store = SessionStore(backend, credential_manager)
+    store.put('session-1', {'user': 'IBMUSER', 'token_value': 'LTPA-TOKEN'}, timedelta(minutes=5))
+    record = store.get('session-1')
+    assert record['user'] == 'IBMUSER'
+    assert record['expires'] > time.time()
+    assert store.get('session-2') is None
+    assert store.get(None) is None
+    assert store.pop('session-1')['token_value'] == 'LTPA-TOKEN'
+    assert store.get('session-1') is None
+
+
+def test_store_encrypts_and_hashes_keys(credential_manager):
+    backend = MemorySessionBackend()
+    SessionStore(backend, credential_manager).put('session-1', {'token_value': 'LTPA-TOKEN'}, timedelta(minutes=5))
+    (key, (value, _)), = backend._entries.items()
+    assert 'session-1' not in key
+    assert 'LTPA-TOKEN' not in value
+
+
+def test_replicas_share_sessions(backend, credential_manager):
+    first = SessionStore(backend, credential_manager, local_ttl=0)
+    second = SessionStore(backend, credential_manager, local_ttl=0)
+    first.put('session-1', {'user': 'IBMUSER'}, timedelta(minutes=5))
+    assert second.get('session-1')['user'] == 'IBMUSER'
+    second.pop('session-1')
+    assert first.get('session-1') is None
+
+
+def test_logout_elsewhere_takes_effect_after_local_ttl(credential_manager):
+    backend = MemorySessionBackend()
+    first = SessionStore(backend, credential_manager, local_ttl=0.05)
+    second = SessionStore(backend, credential_manager, local_ttl=0.05)
+    first.put('session-1', {'user': 'IBMUSER'}, timedelta(minutes=5))
+    second.pop('session-1')
+    assert first.get('session-1') is not None
+    time.sleep(0.1)
+    assert first.get('session-1') is None
+
+
+def test_other_key_cannot_read_sessions(tmp_path, credential_manager):
+    backend = MemorySessionBackend()
+    SessionStore(backend, credential_manager).put('session-1', {'user': 'IBMUSER'}, timedelta(minutes=5))
+    other = SessionStore(backend, CredentialManager(key_file=tmp_path / 'other.key'))
+    assert other.get('session-1') is None
+
+
+def test_expired_sessions_are_pruned(credential_manager):
+    store = SessionStore(MemorySessionBackend(), credential_manager, local_ttl=0.05)
+    store.put('short', {'user': 'A'}, timedelta(seconds=0.05))
+    store.put('long', {'user': 'B'}, timedelta(minutes=5))
+    time.sleep(0.1)
+    assert store.get('short') is None
+    store.put('another', {'user': 'C'}, timedelta(minutes=5))
+    assert set(store._local) == {'long', 'another'}
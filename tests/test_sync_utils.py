@@ -0,0 +1,67 @@
+import hashlib
+
+import pytest
+from zowe.zos_files_for_zowe_sdk import Datasets
+
+from utils.batch_utils import download_batch
+from utils.sync_utils import SyncIndex, hash_file
+
+HOST = '127.0.0.1'
+NAMES = ['USER.A', 'USER.B', 'USER.C']
+
+
+def test_index_entries(tmp_path):
+    index = SyncIndex(tmp_path / 'index.db')
+    assert index.get(HOST, 'USER.SEQ') is None
+    index.put(HOST, 'USER.SEQ', etag='e1', size=10, sha256='abc')
+    index.put_many(HOST, 'USER.PDS', {'MEM1': {'stats': [1, 0], 'sha256': 'x'},
+                                      'MEM2': {'etag': 'e2', 'stats': None}})
+    assert index.get(HOST, 'USER.SEQ')['etag'] == 'e1'
+    assert index.get('other', 'USER.SEQ') is None
+    members = index.get_members(HOST, 'USER.PDS')
+    assert sorted(members) == ['MEM1', 'MEM2']
+    assert members['MEM1']['stats'] == [1, 0]
+    assert members['MEM2']['stats'] is None
+    assert len(index) == 3
+    # Entries live in the file, so another process sees them
+    assert SyncIndex(tmp_path / 'index.db').get(HOST, 'USER.PDS', 'MEM1')['sha256'] == 'x'
+
+
+def test_hash_file(tmp_path):
+    path = tmp_path / 'data'
+    path.write_bytes(b'x' * 3_000_000)
+    assert hash_file(path) == hashlib.sha256(b'x' * 3_000_000).hexdigest()
+
+
+@pytest.fixture
+def sync(tmp_path, zosmf, connection):
+    for name in NAMES:
+        zosmf.add_dataset(name, b''.join(b'%s %05d\n' % (name.encode(), number) for number in range(5000)))
+    index = SyncIndex(tmp_path / 'index.db')
+
+    def run():
+        rows = []
+        for rows in download_batch(lambda: Datasets(connection), NAMES, str(tmp_path / 'out'), HOST,
+                                   max_workers=3, poll_interval=0.01, index=index):
+            pass
+        return {row['name']: row['status'] for row in rows}
+    return run
+
+
+def test_unchanged_datasets_are_skipped(tmp_path, zosmf, sync):
+    assert sync() == dict.fromkeys(NAMES, 'done')
+    requests = zosmf.requests
+    assert sync() == dict.fromkeys(NAMES, 'skipped')
+    # One conditional request per dataset, no content
+    assert zosmf.requests == requests + len(NAMES)
+    for name in NAMES:
+        assert (tmp_path / 'out' / f"{name}.txt").read_bytes() == zosmf.datasets[name].data
+
+
+def test_changed_or_damaged_copies_are_transferred_again(tmp_path, zosmf, sync):
+    sync()
+    zosmf.datasets['USER.A'].set_data(b'CHANGED ON THE HOST\n')
+    (tmp_path / 'out' / 'USER.B.txt').write_bytes(b'truncated')
+    assert sync() == {'USER.A': 'done', 'USER.B': 'done', 'USER.C': 'skipped'}
+    assert (tmp_path / 'out' / 'USER.A.txt').read_bytes() == b'CHANGED ON THE HOST\n'
+    assert (tmp_path / 'out' / 'USER.B.txt').read_bytes() == zosmf.datasets['USER.B'].data
@@ -0,0 +1,91 @@
+import pytest
+
+from utils.transfer_utils import describe_compression, stream_binary_download, stream_download, stream_upload
+
+TEXT = b''.join(b'RECORD %06d %s\n' % (number, b'DATA ' * (number % 12)) for number in range(20000))
+
+
+@pytest.fixture
+def dataset(zosmf):
+    zosmf.add_dataset('USER.DATA', TEXT)
+    return zosmf.datasets['USER.DATA']
+
+
+def test_upload_identity(zosmf, datasets_api, dataset):
+    progress = []
+    result = stream_upload(datasets_api, 'USER.DATA', bytearray(TEXT[::-1]), chunk_size=64 * 1024,
+                           progress_callback=lambda sent, total: progress.append((sent, total)))
+    assert dataset.data == TEXT[::-1]
+    assert result['content_encoding'] == 'identity'
+    assert result['bytes'] == result['wire_bytes'] == len(TEXT)
+    assert progress[-1] == (len(TEXT), len(TEXT))
+    assert describe_compression(result) == ''
+
+
+def test_upload_gzip(zosmf, datasets_api, dataset):
+    result = stream_upload(datasets_api, 'USER.DATA', memoryview(TEXT[::-1]), chunk_size=64 * 1024, compress=True)
+    assert dataset.data == TEXT[::-1]
+    assert result['content_encoding'] == 'gzip'
+    assert result['wire_bytes'] < len(TEXT) / 3
+    assert result['compression_ratio'] > 3
+    assert describe_compression(result).startswith('gzip: ')
+
+
+@pytest.mark.parametrize('zosmf', [{'gzip_uploads': False}], indirect=True)
+def test_refused_gzip_upload_falls_back_to_identity(zosmf, datasets_api, dataset):
+    result = stream_upload(datasets_api, 'USER.DATA', TEXT[::-1], compress=True)
+    assert dataset.data == TEXT[::-1]
+    assert result['content_encoding'] == 'identity'
+    assert result['wire_bytes'] == len(TEXT)
+    # The refusal is remembered, the next upload goes out uncompressed at once
+    requests = zosmf.requests
+    stream_upload(datasets_api, 'USER.DATA', TEXT, compress=True)
+    assert dataset.data == TEXT
+    assert zosmf.requests == requests + 1
+
+
+def test_binary_upload_is_stored_as_is(zosmf, datasets_api, dataset):
+    payload = bytes(range(256)) * 100
+    result = stream_upload(datasets_api, 'USER.DATA', payload, data_type='binary', compress=True)
+    assert dataset.data == payload
+    assert result['content_encoding'] == 'gzip'
+
+
+@pytest.mark.parametrize('zosmf', [{}, {'gzip_responses': True}], indirect=True)
+def test_download(tmp_path, zosmf, datasets_api, dataset):
+    output_path = tmp_path / 'data.txt'
+    progress = []
+    result = stream_download(datasets_api, 'USER.DATA', str(output_path), chunk_size=16 * 1024,
+                             progress_callback=lambda written, records, total: progress.append((written, records)))
+    assert output_path.read_bytes() == TEXT
+    assert (result['bytes'], result['records']) == (len(TEXT), 20000)
+    assert progress[-1] == (len(TEXT), 20000)
+    assert result['etag'] == dataset.etag
+    if zosmf.gzip_responses:
+        assert result['content_encoding'] == 'gzip'
+        assert result['wire_bytes'] < len(TEXT) / 3
+    else:
+        assert result['content_encoding'] == 'identity'
+
+
+def test_download_unchanged_leaves_the_file(tmp_path, datasets_api, dataset):
+    output_path = tmp_path / 'data.txt'
+    output_path.write_bytes(b'local copy')
+    result = stream_download(datasets_api, 'USER.DATA', str(output_path), etag=dataset.etag)
+    assert result['not_modified']
+    assert output_path.read_bytes() == b'local copy'
+
+
+def test_download_counts_a_last_record_without_newline(tmp_path, zosmf, datasets_api):
+    zosmf.add_dataset('USER.SHORT', b'FIRST\nLAST')
+    result = stream_download(datasets_api, 'USER.SHORT', str(tmp_path / 'short.txt'))
+    assert result['records'] == 2
+
+
+def test_binary_download(tmp_path, zosmf, datasets_api):
+    payload = bytes(range(256)) * 10
+    zosmf.add_dataset('USER.BIN', b'')
+    zosmf.datasets['USER.BIN'].set_data(payload, 'binary')
+    output_path = tmp_path / 'data.bin'
+    stream_binary_download(datasets_api, 'USER.BIN', str(output_path))
+    assert output_path.read_bytes() == payload
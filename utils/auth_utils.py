@@ -1,6 +1,201 @@
 import streamlit as st
 import os
 import logging
+import secrets
+import time
+from datetime import datetime, timedelta
+from utils.job_utils import get_job_monitor
+from utils.logging_utils import setup_logging
+from utils.metrics_utils import PROMETHEUS_FILE, get_metrics, start_export
+from utils.queue_utils import get_transfer_manager
+from utils.security_utils import SecureProfileManager, get_credential_manager
+from utils.session_store import SQLITE_PATH, SessionStore, create_backend
+
+def get_metrics_config():
+    """Get metrics settings from secrets"""
+    try:
+        return {
+            "enabled": st.secrets["metrics"]["enabled"],
+            "prometheus_file": st.secrets["metrics"].get("prometheus_file", str(PROMETHEUS_FILE)),
+            "export_interval_seconds": st.secrets["metrics"].get("export_interval_seconds", 15)
+        }
+    except Exception as e:
+        logging.warning(f"Failed to load metrics config from secrets: {e}")
+        return {
+            "enabled": True,
+            "prometheus_file": str(PROMETHEUS_FILE),
+            "export_interval_seconds": 15
+        }
+
+@st.cache_resource
+def get_connection_pool():
+    """Get the process-wide pool of keep-alive z/OSMF sessions"""
+    # Imported on first use so the login page renders without loading requests and the SDK
+    from utils.connection_pool import ConnectionPool
+    from utils.transfer_utils import get_transfer_config
+    try:
+        idle_timeout = timedelta(minutes=st.secrets["connection_pool"]["idle_timeout_minutes"])
+    except Exception as e:
+        logging.warning(f"Failed to load connection pool config from secrets: {e}")
+        idle_timeout = timedelta(minutes=10)
+    metrics_config = get_metrics_config()
+    metrics = None
+    if metrics_config["enabled"]:
+        metrics = get_metrics()
+        if metrics_config["prometheus_file"]:
+            start_export(metrics, metrics_config["prometheus_file"], metrics_config["export_interval_seconds"])
+    return ConnectionPool(idle_timeout=idle_timeout,
+                          pool_size=get_transfer_config()["max_connections_per_host"],
+                          metrics=metrics)
+
+def get_session_config():
+    """Get session store settings from secrets"""
+    try:
+        return {
+            "backend": st.secrets["sessions"]["backend"],
+            "sqlite_path": st.secrets["sessions"].get("sqlite_path", str(SQLITE_PATH)),
+            "redis_url": st.secrets["sessions"].get("redis_url", "redis://localhost:6379/0"),
+            "cookie": st.secrets["sessions"].get("cookie", "")
+        }
+    except Exception as e:
+        logging.warning(f"Failed to load session store config from secrets: {e}")
+        return {
+            "backend": "memory",
+            "sqlite_path": str(SQLITE_PATH),
+            "redis_url": "redis://localhost:6379/0",
+            "cookie": ""
+        }
+
+@st.cache_resource
+def get_session_store():
+    """Get the store of logged-in sessions, shared by replicas unless it is in memory"""
+    config = get_session_config()
+    if config["backend"] != "memory" and not os.getenv('ZOWE_ENCRYPTION_KEY'):
+        logging.warning("ZOWE_ENCRYPTION_KEY is not set, other replicas cannot read the sessions of this one")
+    if config["backend"] != "memory" and not config["cookie"]:
+        logging.warning("[sessions] cookie is not set, a reload that reaches another replica has to log in again")
+    return SessionStore(create_backend(config), get_credential_manager())
+
+def _browser_cookie():
+    """Value of the per-browser HttpOnly cookie set by the fronting proxy, or None"""
+    name = get_session_config()["cookie"]
+    return st.context.cookies.get(name) if name else None
+
+def _browser_key(cookie):
+    # Store key of the pointer from a browser to its current session key
+    return f"browser:{cookie}"
+
+def save_session(session_id, connection, token, profile_name, auth_time, ttl):
+    """Store a login so any replica can serve the session, and tie the browser to it
+
+    The record is stored under a fresh random key kept in the session
+    state; it never appears in the URL. When the fronting proxy sets the
+    browser cookie named in ``[sessions] cookie``, a pointer from that
+    cookie to the key lets another replica restore the login.
+    """
+    token_type, token_value = token
+    session_key = secrets.token_urlsafe(32)
+    store = get_session_store()
+    store.put(session_key, {
+        "session_id": session_id,
+        "connection": connection,
+        "token_type": token_type,
+        "token_value": token_value,
+        "profile_name": profile_name,
+        "auth_time": auth_time.isoformat()
+    }, ttl)
+    cookie = _browser_cookie()
+    if cookie:
+        store.put(_browser_key(cookie), {"session_key": session_key}, ttl)
+    st.session_state.session_key = session_key
+
+def _rotate_session(cookie):
+    """Move the session of this browser to a new key, returning the key and its record, or (None, None)
+
+    A key only ever leaves the server as a store key, but rotating it on
+    every restore still makes a leaked one short-lived.
+    """
+    store = get_session_store()
+    pointer = store.get(_browser_key(cookie))
+    if pointer is None:
+        return None, None
+    record = store.get(pointer["session_key"])
+    if record is None:
+        return None, None
+    ttl = timedelta(seconds=record["expires"] - time.time())
+    session_key = secrets.token_urlsafe(32)
+    store.put(session_key, record, ttl)
+    store.put(_browser_key(cookie), {"session_key": session_key}, ttl)
+    store.pop(pointer["session_key"])
+    return session_key, record
+
+def restore_session():
+    """Restore the login of this browser session from the session store
+
+    Used when the session state is empty, e.g. after a reload that
+    reached another replica. The browser is recognised by the HttpOnly
+    cookie of the fronting proxy only, never by anything in the URL.
+    Returns whether a session was restored.
+    """
+    cookie = _browser_cookie()
+    if not cookie:
+        return False
+    session_key, record = _rotate_session(cookie)
+    if record is None:
+        return False
+    # Imported here so the login page does not pay for loading the SDK
+    from zowe.core_for_zowe_sdk import ProfileManager
+    secure_profile = SecureProfileManager(ProfileManager(appname='zowe'))
+    secure_profile.creation_time = datetime.fromisoformat(record["auth_time"])
+    st.session_state.auth_success = True
+    st.session_state.secure_profile = secure_profile
+    st.session_state.current_host = record["connection"]["host"]
+    st.session_state.profile_name = record["profile_name"]
+    st.session_state.auth_time = secure_profile.creation_time
+    st.session_state.connection = record["connection"]
+    st.session_state.session_id = record["session_id"]
+    st.session_state.session_key = session_key
+    logging.info(f"Restored session of {record['connection']['user']} on {record['connection']['host']}")
+    return True
+
+def current_session_record():
+    """The stored record of this session, following the browser pointer if another tab rotated the key"""
+    store = get_session_store()
+    record = store.get(st.session_state.get('session_key'))
+    if record is None:
+        cookie = _browser_cookie()
+        pointer = store.get(_browser_key(cookie)) if cookie else None
+        if pointer is not None:
+            record = store.get(pointer["session_key"])
+            if record is not None and record["session_id"] == st.session_state.get('session_id'):
+                st.session_state.session_key = pointer["session_key"]
+            else:
+                record = None
+    return record
+
+def token_connection(connection, token):
+    """Connection properties that authenticate with an auth token instead of a password"""
+    token_type, token_value = token
+    return {**connection, "tokenType": token_type, "tokenValue": token_value}
+
+def release_connection():
+    """Log the session's auth token out of z/OSMF and drop its pooled connection, jobs and transfers"""
+    connection = st.session_state.get('connection')
+    if not connection:
+        return
+    record = current_session_record()
+    store = get_session_store()
+    store.pop(st.session_state.get('session_key'))
+    cookie = _browser_cookie()
+    if cookie:
+        store.pop(_browser_key(cookie))
+    get_job_monitor().release(st.session_state.get('session_id'))
+    get_transfer_manager().release(st.session_state.get('session_id'))
+    if record:
+        token = (record["token_type"], record["token_value"])
+        get_connection_pool().get(token_connection(connection, token)).logout(*token)
+        # Other sessions of the same user keep their own pooled sessions
+        get_connection_pool().release(token_connection(connection, token))
 
 def init_session_state():
     """Initialize session state variables"""
@@ -9,16 +204,27 @@ def init_session_state():
         'secure_profile': None,
         'current_host': None,
         'profile_name': None,
-        'auth_time': None
+        'auth_time': None,
+        'connection': None,
+        'session_id': None,
+        'session_key': None
     }
     
     for var, default in session_vars.items():
         if var not in st.session_state:
             st.session_state[var] = default
+    
+    if not st.session_state.auth_success:
+        restore_session()
 
 def get_or_create_connection():
-    """Get existing connection or redirect to login"""
-    required_vars = ['auth_success', 'secure_profile']
+    """Get the pooled z/OSMF connection of this session or redirect to login"""
+    # Pages opened directly never run Home.py; this is cached, so only the first call sets logging up
+    setup_logging()
+    if not st.session_state.get('auth_success'):
+        init_session_state()
+    
+    required_vars = ['auth_success', 'secure_profile', 'connection']
     
     # Check if all required variables exist
     if not all(var in st.session_state for var in required_vars):
@@ -39,7 +245,15 @@ def get_or_create_connection():
         cleanup_session()
         st.stop()
     
-    return st.session_state.secure_profile.profile_manager
+    # API calls authenticate with the stored token, never the password
+    record = current_session_record()
+    if record is None:
+        st.error("Session expired. Please login again!")
+        cleanup_session()
+        st.stop()
+    
+    token = (record["token_type"], record["token_value"])
+    return get_connection_pool().get(token_connection(st.session_state.connection, token))
 
 def cleanup_session():
     """Clean up session state and profile files"""
@@ -47,6 +261,8 @@ def cleanup_session():
         if hasattr(st.session_state, 'secure_profile') and st.session_state.secure_profile:
             st.session_state.secure_profile.cleanup()
         
+        release_connection()
+        
         if hasattr(st.session_state, 'profile_name'):
             profile_path = os.path.join(os.path.expanduser("~"), ".zowe", "profiles", 
                                       f"{st.session_state.profile_name}.yaml")
@@ -0,0 +1,155 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+
+from utils.resume_utils import with_retries
+from utils.sync_utils import hash_file
+from utils.transfer_utils import get_transfer_config, stream_download
+
+# Characters that make a DSN entry a pattern to resolve on the host
+PATTERN_CHARS = ('*', '%')
+
+# Process-wide semaphores limiting concurrent requests per host
+_host_semaphores = {}
+_host_semaphores_lock = threading.Lock()
+
+
+@contextmanager
+def host_slot(host):
+    """Hold one of the concurrent request slots for ``host``
+
+    Each host gets ``max_connections_per_host`` slots from the transfer
+    config, shared by every session and every kind of transfer in the
+    process, so parallel batches against the same LPAR never exceed the
+    limit together.
+    """
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(get_transfer_config()["max_connections_per_host"])
+            _host_semaphores[host] = semaphore
+    with semaphore:
+        yield
+
+
+def resolve_dataset_names(datasets_api, entries):
+    """Expand DSN patterns (e.g. USERID.PROD.**) into dataset names
+
+    Plain names are kept as they are. The result keeps the input order
+    and contains each dataset once.
+    """
+    names = []
+    for entry in entries:
+        entry = entry.strip().upper()
+        if not entry:
+            continue
+        if any(char in entry for char in PATTERN_CHARS):
+            response = datasets_api.list(entry)
+            matches = [item.dsname for item in (response.items or [])]
+            logging.info(f"Pattern {entry} resolved to {len(matches)} datasets")
+            names.extend(matches)
+        else:
+            names.append(entry)
+    return list(dict.fromkeys(names))
+
+
+def per_thread(factory):
+    """Wrap an API factory so each worker thread builds its own instance
+
+    SDK API objects keep per-request state on their request handler and
+    must not be shared between threads.
+    """
+    local = threading.local()
+
+    def get_api():
+        if not hasattr(local, 'api'):
+            local.api = factory()
+        return local.api
+    return get_api
+
+
+def run_batch(items, task, max_workers, host, poll_interval=0.5, hold_slot=True):
+    """Run ``task(item, status)`` for every item on a bounded thread pool
+
+    ``status`` is the item's row in the result table; tasks update it in
+    place to report progress and may set ``status['result']`` (e.g.
+    'skipped') to replace the final 'done' state. Each task runs in a
+    ``host_slot`` unless ``hold_slot`` is False, for tasks that wait
+    between requests and take the slot around their requests themselves.
+
+    This is a generator yielding a snapshot of all rows every
+    ``poll_interval`` seconds until the batch finishes, so the caller can
+    render progress from the script thread.
+    """
+    lock = threading.Lock()
+    rows = {item: {'name': item, 'status': 'queued', 'bytes': 0, 'records': 0,
+                   'seconds': 0.0, 'error': ''} for item in items}
+
+    def run(item):
+        status = rows[item]
+        with host_slot(host) if hold_slot else nullcontext():
+            start = time.monotonic()
+            with lock:
+                status['status'] = 'running'
+            try:
+                task(item, status)
+                with lock:
+                    status['status'] = status.get('result') or 'done'
+            except Exception as e:
+                logging.error(f"Batch item {item} failed: {str(e)}")
+                with lock:
+                    status['status'] = 'failed'
+                    status['error'] = str(e)
+            finally:
+                with lock:
+                    status['seconds'] = round(time.monotonic() - start, 2)
+
+    def snapshot():
+        with lock:
+            return [{key: value for key, value in row.items() if key != 'result'}
+                    for row in rows.values()]
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch') as executor:
+        pending = {executor.submit(run, item) for item in rows}
+        while pending:
+            _, pending = wait(pending, timeout=poll_interval)
+            yield snapshot()
+
+
+def download_batch(api_factory, dataset_names, target_dir, host, max_workers=8, poll_interval=0.5,
+                   index=None):
+    """Download datasets concurrently into ``target_dir``
+
+    With a ``SyncIndex`` the download becomes a sync: datasets whose ETag
+    still matches the index, and whose local copy is intact, are skipped
+    without transferring content. Yields result-table snapshots, see
+    ``run_batch``.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    get_api = per_thread(api_factory)
+
+    def download(dataset_name, status):
+        def track(bytes_written, records, total_bytes):
+            status['bytes'] = bytes_written
+            status['records'] = records
+
+        output_path = os.path.join(target_dir, f"{dataset_name}.txt")
+        etag = None
+        if index is not None:
+            known = index.get(host, dataset_name)
+            if known and os.path.exists(output_path) and os.path.getsize(output_path) == known['size']:
+                etag = known['etag']
+
+        result = with_retries(lambda: stream_download(get_api(), dataset_name, output_path,
+                                                      progress_callback=track, etag=etag),
+                              f"Download of {dataset_name}")
+        if result['not_modified']:
+            status['result'] = 'skipped'
+        elif index is not None:
+            index.put(host, dataset_name, etag=result['etag'], size=os.path.getsize(output_path),
+                      sha256=hash_file(output_path))
+
+    yield from run_batch(dataset_names, download, max_workers, host, poll_interval)
@@ -0,0 +1,173 @@
+import streamlit as st
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from utils.transfer_utils import stream_download
+
+CACHE_DIR = Path('.cache/datasets')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    host TEXT NOT NULL,
+    dsn TEXT NOT NULL,
+    member TEXT NOT NULL DEFAULT '',
+    etag TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (host, dsn, member)
+)
+"""
+
+
+def split_member(dataset_name):
+    """Split 'DSN(MEMBER)' into ('DSN', 'MEMBER'); sequential datasets get ''"""
+    if dataset_name.endswith(')') and '(' in dataset_name:
+        dsn, member = dataset_name[:-1].split('(', 1)
+        return dsn, member
+    return dataset_name, ''
+
+
+class ContentCache:
+    """Shared on-disk cache of dataset contents with LRU eviction
+
+    Entries are keyed by (host, DSN, member, ETag). A hit is only served
+    after a conditional request confirms the ETag is still current, so
+    cached content is never stale but unchanged data never crosses the
+    wire twice. When the cache grows past ``max_bytes`` the least recently
+    used entries are removed.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=2 * 1024 ** 3):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / 'cache.db'), check_same_thread=False)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+
+    def _blob_path(self, host, dsn, member, etag):
+        key = hashlib.sha256(f"{host}\0{dsn}\0{member}\0{etag}".encode()).hexdigest()
+        return self.root / key[:2] / key
+
+    def _lookup(self, host, dsn, member):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, path, size FROM blobs WHERE host = ? AND dsn = ? AND member = ?",
+                (host, dsn, member)).fetchone()
+        if row and os.path.exists(row[1]):
+            return row
+        return None
+
+    def fetch(self, datasets_api, host, dataset_name, output_path, progress_callback=None):
+        """Download a dataset to ``output_path`` through the cache
+
+        Returns the ``stream_download`` result with an added ``cache_hit``
+        flag.
+        """
+        dsn, member = split_member(dataset_name)
+        cached = self._lookup(host, dsn, member)
+        partial = self.root / f"{os.getpid()}_{threading.get_ident()}.part"
+        result = self._download(datasets_api, dataset_name, partial, progress_callback, cached[0] if cached else None)
+        now = time.time()
+        if result['not_modified']:
+            try:
+                shutil.copyfile(cached[1], output_path)
+            except FileNotFoundError:
+                # Another session evicted or replaced the blob after the lookup
+                logging.info(f"Cached copy of {dataset_name} disappeared, downloading it again")
+                cached = None
+                result = self._download(datasets_api, dataset_name, partial, progress_callback, None)
+            else:
+                with self._lock, self._db:
+                    self._db.execute(
+                        "UPDATE blobs SET last_access = ? WHERE host = ? AND dsn = ? AND member = ?",
+                        (now, host, dsn, member))
+                    self.hits += 1
+                    self.bytes_saved += cached[2]
+                result['bytes'] = cached[2]
+                result['cache_hit'] = True
+                return result
+
+        if result['etag']:
+            blob = self._blob_path(host, dsn, member, result['etag'])
+            blob.parent.mkdir(exist_ok=True)
+            os.replace(partial, blob)
+            # Copied before the entry is recorded, so no other session can evict the blob meanwhile
+            shutil.copyfile(blob, output_path)
+            with self._lock, self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO blobs (host, dsn, member, etag, path, size, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (host, dsn, member, result['etag'], str(blob), result['bytes'], now))
+            if cached and cached[1] != str(blob):
+                self._remove_file(cached[1])
+            self._evict()
+        else:
+            # Without an ETag the content cannot be validated later
+            os.replace(partial, output_path)
+        with self._lock:
+            self.misses += 1
+        result['cache_hit'] = False
+        return result
+
+    def _download(self, datasets_api, dataset_name, partial, progress_callback, etag):
+        """Stream a dataset to the partial file, removing it if the download fails"""
+        try:
+            return stream_download(datasets_api, dataset_name, str(partial),
+                                   progress_callback=progress_callback, etag=etag)
+        except Exception:
+            self._remove_file(partial)
+            raise
+
+    @staticmethod
+    def _remove_file(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its budget"""
+        with self._lock, self._db:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for host, dsn, member, path, size in self._db.execute(
+                    "SELECT host, dsn, member, path, size FROM blobs ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM blobs WHERE host = ? AND dsn = ? AND member = ?",
+                                 (host, dsn, member))
+                self._remove_file(path)
+                total -= size
+                logging.debug(f"Evicted {dsn}({member}) from the content cache")
+
+    def stats(self):
+        """Hit/miss counters, bytes saved and current size of the cache"""
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            return {'hits': self.hits, 'misses': self.misses, 'bytes_saved': self.bytes_saved,
+                    'entries': entries, 'size': size}
+
+
+@st.cache_resource
+def get_content_cache():
+    """Get the process-wide dataset content cache"""
+    try:
+        max_bytes = st.secrets["cache"]["max_size_mb"] * 1024 * 1024
+    except Exception as e:
+        logging.warning(f"Failed to load cache config from secrets: {e}")
+        max_bytes = 2 * 1024 ** 3
+    return ContentCache(max_bytes=max_bytes)
@@ -0,0 +1,262 @@
+import streamlit as st
+import bisect
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from zowe.zos_files_for_zowe_sdk import Datasets
+
+from utils.connection_pool import connection_key
+from utils.pds_utils import MEMBER_PAGE_SIZE, iter_member_pages
+
+# Datasets requested per list call (X-IBM-Max-Items)
+CATALOG_PAGE_SIZE = 1000
+
+# Attributes kept per dataset; a tuple per name keeps large catalogs small in memory
+DATASET_ATTRIBUTES = ('dsorg', 'recfm', 'lrecl', 'blksz', 'vol', 'migr', 'rdate')
+MEMBER_ATTRIBUTES = ('vers', 'mod', 'm4date', 'mtime', 'user')
+
+# Seconds before a failed listing is tried again
+RETRY_SECONDS = 30
+
+# Listings not looked at for this many TTLs are dropped
+IDLE_TTLS = 4
+
+REFRESH_WORKERS = 2
+
+
+def get_catalog_config():
+    """Get catalog index settings from secrets"""
+    try:
+        return {
+            "ttl_minutes": st.secrets["catalog"]["ttl_minutes"],
+            "page_size": st.secrets["catalog"].get("page_size", CATALOG_PAGE_SIZE)
+        }
+    except Exception as e:
+        logging.warning(f"Failed to load catalog config from secrets: {e}")
+        return {
+            "ttl_minutes": 15,
+            "page_size": CATALOG_PAGE_SIZE
+        }
+
+
+def high_level_qualifier(prefix):
+    """First qualifier of a DSN prefix (e.g. 'PROD.PAY.D' -> 'PROD')"""
+    return prefix.strip().upper().split('.', 1)[0]
+
+
+def iter_dataset_pages(datasets_api, pattern, page_size=CATALOG_PAGE_SIZE):
+    """List the datasets matching a DSLEVEL pattern one page at a time, with base attributes
+
+    Each call asks for at most ``page_size`` names (X-IBM-Max-Items) and
+    continues from the last name returned while z/OSMF reports more rows.
+    A generator yielding lists of item dicts; the next page is only
+    requested when the caller asks for it.
+    """
+    start = None
+    while True:
+        custom_args = datasets_api._create_custom_request_arguments()
+        custom_args["url"] = "{}ds".format(datasets_api._request_endpoint)
+        custom_args["params"] = {"dslevel": datasets_api._encode_uri_component(pattern)}
+        if start:
+            custom_args["params"]["start"] = datasets_api._encode_uri_component(start)
+        custom_args["headers"]["X-IBM-Max-Items"] = str(page_size)
+        custom_args["headers"]["X-IBM-Attributes"] = "base"
+        response = datasets_api.request_handler.perform_request("GET", custom_args) or {}
+        items = response.get("items") or []
+        # The start dataset is returned again at the top of the next page
+        page = items[1:] if start and items and items[0].get("dsname") == start else items
+        if page:
+            yield page
+        if not page or not response.get("moreRows", len(items) >= page_size):
+            return
+        start = items[-1]["dsname"]
+
+
+class PrefixIndex:
+    """Sorted names answering prefix lookups by binary search
+
+    Every name sharing a prefix sits in one contiguous run of the sorted
+    list, so a lookup is two bisections plus the rows returned, the same
+    walk a trie does but without a node object per character; a few
+    hundred thousand names take tens of MB and any prefix resolves in
+    microseconds.
+    """
+
+    def __init__(self, names=(), attributes=None):
+        self.names = sorted(names)
+        self.attributes = attributes if attributes is not None else {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _range(self, prefix):
+        # Every name starting with the prefix sorts before prefix + the highest character
+        return (bisect.bisect_left(self.names, prefix),
+                bisect.bisect_left(self.names, prefix + '\uffff'))
+
+    def count(self, prefix=''):
+        low, high = self._range(prefix)
+        return high - low
+
+    def complete(self, prefix, limit):
+        """Up to ``limit`` names starting with ``prefix``, in order"""
+        low, high = self._range(prefix)
+        return self.names[low:min(high, low + limit)]
+
+    def page(self, prefix, offset, limit):
+        """Names and attributes of one page of the names starting with ``prefix``"""
+        low, high = self._range(prefix)
+        names = self.names[min(high, low + offset):min(high, low + offset + limit)]
+        return [(name, self.attributes.get(name)) for name in names]
+
+
+class _Listing:
+    """One cached listing (the datasets of an HLQ or the members of a PDS)"""
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        self.loaded_at = None
+        self.retry_at = 0.0
+        self.loading = False
+        self.fetched = 0
+        self.error = None
+        self.last_used = time.monotonic()
+
+
+class CatalogIndex:
+    """Process-wide cache of dataset and member listings for browsing and autocomplete
+
+    Listings are fetched from z/OSMF page by page on a background pool and
+    kept per (host, user), since catalog access differs between users.
+    A first load publishes what it has fetched so far as it goes; once
+    a listing is older than ``ttl`` it keeps being served while a fresh
+    copy loads in the background, so lookups never wait on the mainframe.
+    """
+
+    def __init__(self, ttl_seconds, page_size=CATALOG_PAGE_SIZE, workers=REFRESH_WORKERS):
+        self.ttl_seconds = ttl_seconds
+        self.page_size = page_size
+        self._listings = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='catalog')
+
+    def _listing(self, key, pages, force=False):
+        """Return the listing for ``key``, (re)loading it in the background when missing or stale"""
+        now = time.monotonic()
+        with self._lock:
+            for idle in [k for k, listing in self._listings.items()
+                         if now - listing.last_used > IDLE_TTLS * self.ttl_seconds and not listing.loading]:
+                del self._listings[idle]
+            listing = self._listings.get(key)
+            if listing is None:
+                listing = self._listings[key] = _Listing()
+            listing.last_used = now
+            stale = listing.loaded_at is None or now - listing.loaded_at > self.ttl_seconds
+            if (force or (stale and now >= listing.retry_at)) and not listing.loading:
+                listing.loading = True
+                listing.fetched = 0
+                self._executor.submit(self._load, key, listing, pages)
+        return listing
+
+    @staticmethod
+    def _load(key, listing, pages):
+        names, attributes = [], {}
+        first_load = listing.loaded_at is None
+        published = 0
+        try:
+            for page in pages():
+                for name, values in page:
+                    names.append(name)
+                    attributes[name] = values
+                listing.fetched = len(names)
+                # Show a first load as it grows, re-sorting only when it has doubled
+                if first_load and len(names) >= 2 * published:
+                    listing.index = PrefixIndex(names, attributes)
+                    published = len(names)
+            listing.index = PrefixIndex(names, attributes)
+            listing.loaded_at = time.monotonic()
+            listing.error = None
+            logging.info(f"Catalog listing {key[2]} {key[3]} loaded with {len(names)} entries")
+        except Exception as e:
+            listing.error = str(e)
+            listing.retry_at = time.monotonic() + RETRY_SECONDS
+            logging.error(f"Catalog listing {key[2]} {key[3]} failed: {str(e)}")
+        finally:
+            listing.loading = False
+
+    def datasets(self, connection, hlq, force=False):
+        """The listing of every dataset under ``hlq`` for a pooled connection"""
+        hlq = hlq.strip().upper()
+        host, user, _ = connection_key(connection.connection)
+        page_size = self.page_size
+
+        def pages():
+            datasets_api = connection.api(Datasets)
+            for page in iter_dataset_pages(datasets_api, f"{hlq}.**", page_size):
+                yield [(item["dsname"], tuple(item.get(field) for field in DATASET_ATTRIBUTES)) for item in page]
+        return self._listing((host, user, 'datasets', hlq), pages, force)
+
+    def members(self, connection, dataset_name, force=False):
+        """The listing of every member of a PDS for a pooled connection"""
+        dataset_name = dataset_name.strip().upper()
+        host, user, _ = connection_key(connection.connection)
+        page_size = min(self.page_size, MEMBER_PAGE_SIZE)
+
+        def pages():
+            datasets_api = connection.api(Datasets)
+            for page in iter_member_pages(datasets_api, dataset_name, page_size):
+                yield [(item.member, tuple(getattr(item, field, None) for field in MEMBER_ATTRIBUTES))
+                       for item in page]
+        return self._listing((host, user, 'members', dataset_name), pages, force)
+
+    def complete(self, connection, prefix, limit=50):
+        """Dataset names starting with ``prefix``, from the listing of its HLQ
+
+        A prefix with an open parenthesis ('PROD.PAY.SRC(AB') completes
+        member names of that PDS instead, as 'DSN(MEMBER)'. Returns the
+        names and the listing they came from, which may still be loading.
+        """
+        prefix = prefix.strip().upper()
+        if '(' in prefix:
+            dataset_name, member = prefix.split('(', 1)
+            listing = self.members(connection, dataset_name)
+            names = listing.index.complete(member.rstrip(')'), limit)
+            return [f"{dataset_name}({name})" for name in names], listing
+        listing = self.datasets(connection, high_level_qualifier(prefix))
+        return listing.index.complete(prefix, limit), listing
+
+
+@st.cache_resource
+def get_catalog_index():
+    """Get the process-wide catalog index"""
+    config = get_catalog_config()
+    return CatalogIndex(ttl_seconds=config["ttl_minutes"] * 60, page_size=config["page_size"])
+
+
+def _use_match(target_key, match_key):
+    if st.session_state.get(match_key):
+        st.session_state[target_key] = st.session_state[match_key]
+
+
+def dataset_picker(connection, target_key, label="Find Dataset"):
+    """Autocomplete from the catalog index that fills the text input stored under ``target_key``
+
+    Put this above the form holding the input; the input must be created
+    with ``key=target_key``.
+    """
+    prefix = st.text_input(label, key=f"{target_key}_prefix",
+                           help="Start of a dataset name (e.g. USERID.PROD), or 'DSN(' for members")
+    if not prefix.strip():
+        return
+    matches, listing = get_catalog_index().complete(connection, prefix)
+    if listing.loading:
+        st.caption(f"Indexing, {listing.fetched:,} entries fetched so far; press Enter again for more matches")
+    elif listing.error:
+        st.caption(f"Listing failed: {listing.error}")
+    if matches:
+        st.selectbox("Matches", matches, index=None, key=f"{target_key}_match", placeholder="Pick a dataset",
+                     on_change=_use_match, args=(target_key, f"{target_key}_match"))
+    elif not listing.loading:
+        st.caption("No matching datasets")
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import os
+import ssl
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Certificate file types accepted, PEM text or DER (or PEM) with a .cer extension
+CERT_SUFFIXES = ('.pem', '.cer')
+
+PEM_MARKER = b'-----BEGIN CERTIFICATE-----'
+
+# Processed certificates by (path, mtime, size) and by (path, content hash)
+_certificates = {}
+_by_content = {}
+_lock = threading.Lock()
+
+
+def _parse(cert_file, data):
+    """Load a PEM or DER certificate in-process, returning it with its PEM encoding"""
+    # cryptography.x509 takes a while to import and is only needed on a cache miss
+    from cryptography import x509
+    from cryptography.hazmat.primitives.serialization import Encoding
+
+    if PEM_MARKER in data:
+        certificates = x509.load_pem_x509_certificates(data)
+        return certificates[0], b''.join(c.public_bytes(Encoding.PEM) for c in certificates)
+    if cert_file.suffix.lower() == '.pem':
+        raise ValueError("No PEM certificate found in .pem file")
+    certificate = x509.load_der_x509_certificate(data)
+    return certificate, certificate.public_bytes(Encoding.PEM)
+
+
+def _write_if_changed(path, data):
+    """Write ``data`` to ``path`` atomically, leaving an identical file untouched"""
+    try:
+        if path.read_bytes() == data:
+            return
+    except FileNotFoundError:
+        pass
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+
+
+def load_certificate(cert_path):
+    """Validate a .pem or .cer certificate, converting .cer to a .pem beside it
+
+    Processing happens once per file version: a repeated call only stats
+    the file, and a file touched without changing its content is matched
+    by its SHA-256 without parsing it again. Returns a dict with the PEM
+    ``path`` to verify against, its ``pem`` bytes, ``sha256``,
+    ``subject`` and ``not_after``. Raises ValueError for a missing,
+    unsupported or unreadable certificate.
+    """
+    cert_file = Path(cert_path)
+    if cert_file.suffix.lower() not in CERT_SUFFIXES:
+        raise ValueError("Unsupported certificate format. Please provide .cer or .pem file")
+    try:
+        stat = cert_file.stat()
+    except FileNotFoundError:
+        raise ValueError(f"Certificate file not found: {cert_path}")
+    resolved = str(cert_file.resolve())
+    version_key = (resolved, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        info = _certificates.get(version_key)
+    if info is not None:
+        return info
+
+    data = cert_file.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    with _lock:
+        info = _by_content.get((resolved, digest))
+    if info is None:
+        logging.info(f"Processing certificate: {cert_path}")
+        try:
+            certificate, pem = _parse(cert_file, data)
+        except Exception as e:
+            raise ValueError(f"Failed to process certificate: {str(e)}")
+        pem_path = cert_file
+        if cert_file.suffix.lower() == '.cer':
+            pem_path = cert_file.with_suffix('.pem')
+            _write_if_changed(pem_path, pem)
+        not_after = certificate.not_valid_after_utc
+        if not_after < datetime.now(timezone.utc):
+            logging.warning(f"Certificate {cert_path} expired on {not_after:%Y-%m-%d}")
+        info = {'path': str(pem_path), 'pem': pem, 'sha256': digest,
+                'subject': certificate.subject.rfc4514_string(), 'not_after': not_after}
+    with _lock:
+        _certificates[version_key] = info
+        _by_content[(resolved, digest)] = info
+    return info
+
+
+def get_ssl_context(cert_path):
+    """SSL context trusting the default CA bundle plus the certificate at ``cert_path``
+
+    Loading the CA bundle takes tens of milliseconds, so the context is
+    built once per certificate content and shared by every connection.
+    """
+    from requests.utils import DEFAULT_CA_BUNDLE_PATH
+
+    info = load_certificate(cert_path)
+    with _lock:
+        context = info.get('ssl_context')
+        if context is None:
+            context = ssl.create_default_context(cafile=DEFAULT_CA_BUNDLE_PATH)
+            context.load_verify_locations(cadata=info['pem'].decode('ascii'))
+            info['ssl_context'] = context
+    return context
@@ -0,0 +1,254 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.cert_utils import get_ssl_context
+from utils.metrics_utils import operation_name
+
+
+# z/OSMF endpoint that exchanges credentials for an auth token
+AUTH_SERVICE_PATH = "/zosmf/services/authenticate"
+
+# Token cookies set by z/OSMF, in order of preference
+TOKEN_TYPES = ("jwtToken", "LtpaToken2")
+
+
+def connection_key(connection):
+    """The login a connection belongs to, (host, user, cert)"""
+    return (connection.get("host"), connection.get("user"), connection.get("cert_file"))
+
+
+def _pool_key(connection):
+    # One session per auth token, so two browser sessions of a user never share cookies or sockets
+    return connection_key(connection) + (connection.get("tokenValue"),)
+
+
+def _counted_body(data, counter):
+    """Request body that adds the bytes it sends to ``counter[0]``
+
+    Sized bodies are counted up front, generators as requests consumes them.
+    """
+    if isinstance(data, (bytes, bytearray, str)) or (hasattr(data, 'read') and hasattr(data, '__len__')):
+        counter[0] += len(data)
+    elif hasattr(data, '__next__'):
+        def counting():
+            for chunk in data:
+                counter[0] += len(chunk)
+                yield chunk
+        return counting()
+    return data
+
+
+def _received_bytes(response):
+    """Bytes of a response body as read off the socket, before decompression"""
+    try:
+        return response.raw.tell()
+    except AttributeError:
+        return len(response.content or b'')
+
+
+class _SessionHandle:
+    """Stand-in for ``requests.Session`` handed to SDK request handlers
+
+    The SDK closes its session when an API object is garbage collected.
+    The handle forwards requests to the pooled session but ignores close,
+    so dropping an API object never tears down the shared connections.
+    """
+
+    def __init__(self, pooled):
+        self._pooled = pooled
+
+    def request(self, method, url, **kwargs):
+        return self._pooled.request(method, url, **kwargs)
+
+    def close(self):
+        pass
+
+
+class _ContextAdapter(HTTPAdapter):
+    """HTTPAdapter verifying servers with a prebuilt SSL context instead of one per pool"""
+
+    def __init__(self, ssl_context, **kwargs):
+        self.ssl_context = ssl_context
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['ssl_context'] = self.ssl_context
+        super().init_poolmanager(*args, **kwargs)
+
+
+class PooledConnection:
+    """A keep-alive HTTPS session for one z/OSMF login
+
+    Every SDK API object built through ``api`` sends its requests over the
+    same ``requests.Session``, so TCP and TLS handshakes are paid once per
+    connection in the pool instead of once per API object.
+    """
+
+    def __init__(self, connection, pool_size, metrics=None):
+        self.connection = connection
+        self.metrics = metrics
+        self.session = requests.Session()
+        if connection.get("cert_file"):
+            # Trust the configured certificate through a context shared by every session
+            adapter = _ContextAdapter(get_ssl_context(connection["cert_file"]),
+                                      pool_connections=1, pool_maxsize=pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.last_used = time.monotonic()
+
+    @property
+    def host(self):
+        return self.connection.get("host")
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def request(self, method, url, **kwargs):
+        """Send a request on the pooled session, timing it if metrics are enabled
+
+        A streamed response is recorded when it is closed, so its latency
+        and byte count cover the whole body.
+        """
+        self.touch()
+        if self.metrics is None:
+            return self.session.request(method, url, **kwargs)
+
+        operation = operation_name(method, url)
+        sent = [0]
+        if 'data' in kwargs:
+            kwargs['data'] = _counted_body(kwargs['data'], sent)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception:
+            self.metrics.observe(self.host, operation, time.perf_counter() - start, sent[0], error=True)
+            raise
+
+        def record():
+            self.metrics.observe(self.host, operation, time.perf_counter() - start, sent[0],
+                                 _received_bytes(response), error=response.status_code >= 400)
+
+        if not kwargs.get('stream'):
+            record()
+            return response
+        close = response.close
+        recorded = False
+
+        def close_and_record():
+            nonlocal recorded
+            if not recorded:
+                recorded = True
+                record()
+            close()
+
+        response.close = close_and_record
+        return response
+
+    def _auth_request(self, method, **kwargs):
+        connection = self.connection
+        url = (f"{connection.get('protocol', 'https')}://{connection['host']}:"
+               f"{connection.get('port', 443)}{AUTH_SERVICE_PATH}")
+        return self.request(method, url, headers={"X-CSRF-ZOSMF-HEADER": ""},
+                            verify=connection.get("reject_unauthorized", True),
+                            timeout=30, **kwargs)
+
+    def login(self, user, password):
+        """Exchange credentials for a z/OSMF auth token (JWT or LTPA)
+
+        This is the only request that carries the password; later requests
+        authenticate with the returned token. Returns ``(token_type, token_value)``.
+        """
+        response = self._auth_request("POST", auth=(user, password))
+        # Logins of the same user share this session; the token belongs to the caller, not its cookie jar
+        self.session.cookies.clear()
+        if not response.ok:
+            raise ValueError(f"z/OSMF login failed with status {response.status_code}")
+        for token_type in TOKEN_TYPES:
+            token_value = response.cookies.get(token_type)
+            if token_value:
+                return token_type, token_value
+        raise ValueError("z/OSMF did not return an auth token")
+
+    def logout(self, token_type, token_value):
+        """Invalidate an auth token on z/OSMF"""
+        self.session.cookies.clear()
+        try:
+            self._auth_request("DELETE", cookies={token_type: token_value})
+        except Exception as e:
+            logging.warning(f"z/OSMF logout failed: {str(e)}")
+        self.session.cookies.clear()
+
+    def api(self, api_class):
+        """Build an SDK API object (Datasets, Zosmf, ...) on the pooled session
+
+        API objects are cheap and keep per-request state, so build one per
+        thread rather than sharing one across threads.
+        """
+        api = api_class(self.connection)
+        api.request_handler.session.close()
+        api.request_handler.session = _SessionHandle(self)
+        self.touch()
+        return api
+
+    def close(self):
+        self.session.close()
+
+
+class ConnectionPool:
+    """Process-wide pool of keep-alive z/OSMF sessions keyed by (host, user, cert, token)
+
+    Each logged-in browser session has its own entry, so logging one out
+    never clears cookies or closes sockets under another session's
+    transfers; connections without a token are only used to log in.
+
+    Entries idle for longer than ``idle_timeout`` are closed and dropped
+    whenever the pool is accessed.
+    """
+
+    def __init__(self, idle_timeout=timedelta(minutes=10), pool_size=8, metrics=None):
+        self.idle_timeout = idle_timeout.total_seconds()
+        self.pool_size = pool_size
+        self.metrics = metrics
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, connection):
+        """Return the pooled session for a connection, creating it if needed"""
+        key = _pool_key(connection)
+        with self._lock:
+            self._evict_idle()
+            pooled = self._entries.get(key)
+            if pooled is None:
+                logging.debug(f"Opening pooled session for {key[1]}@{key[0]}")
+                pooled = PooledConnection(connection, self.pool_size, self.metrics)
+                self._entries[key] = pooled
+            elif pooled.connection != connection:
+                # Same login with new credentials, keep the open sockets
+                pooled.connection = connection
+            pooled.touch()
+            return pooled
+
+    def release(self, connection):
+        """Close and drop the pooled session of a connection (e.g. on logout)"""
+        with self._lock:
+            pooled = self._entries.pop(_pool_key(connection), None)
+        if pooled:
+            pooled.close()
+
+    def _evict_idle(self):
+        now = time.monotonic()
+        for key, pooled in list(self._entries.items()):
+            if now - pooled.last_used > self.idle_timeout:
+                logging.debug(f"Evicting idle pooled session for {key[1]}@{key[0]}")
+                del self._entries[key]
+                pooled.close()
+
+    def __len__(self):
+        return len(self._entries)
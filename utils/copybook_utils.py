@@ -0,0 +1,394 @@
+import logging
+import mmap
+import os
+import re
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.codec_utils import BATCH_BYTES, decode_table
+
+# Rows shown per page of the columnar preview
+PREVIEW_PAGE_ROWS = 100
+
+# Extensions written as Arrow IPC files, anything else becomes Parquet
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+# int64 holds 18 decimal digits without overflow
+MAX_DIGITS = 18
+
+_BINARY_USAGES = {'COMP', 'COMPUTATIONAL', 'COMP-4', 'COMPUTATIONAL-4', 'COMP-5', 'COMPUTATIONAL-5', 'BINARY'}
+_PACKED_USAGES = {'COMP-3', 'COMPUTATIONAL-3', 'PACKED-DECIMAL'}
+_UNSUPPORTED_USAGES = {'COMP-1', 'COMPUTATIONAL-1', 'COMP-2', 'COMPUTATIONAL-2', 'POINTER', 'INDEX'}
+
+_STATEMENT_END = re.compile(r'\.(?=\s|$)')
+_REPEAT = re.compile(r'(.)\((\d+)\)')
+
+_EBCDIC_SPACE = 0x40
+
+
+class Field:
+    """An elementary copybook item at a fixed offset of the record"""
+
+    def __init__(self, name, offset, length, kind, digits=0, scale=0, signed=False):
+        self.name = name
+        self.offset = offset
+        self.length = length
+        self.kind = kind
+        self.digits = digits
+        self.scale = scale
+        self.signed = signed
+
+    @property
+    def arrow_type(self):
+        if self.kind == 'text':
+            return pa.string()
+        if self.scale:
+            return pa.decimal128(max(self.digits, 1), self.scale)
+        return pa.int64()
+
+    def summary(self):
+        return {'field': self.name, 'offset': self.offset, 'length': self.length, 'type': self.kind,
+                'digits': self.digits or '', 'scale': self.scale or '', 'signed': self.signed}
+
+
+class CopybookLayout:
+    """Flat record layout of the first 01-level record of a copybook"""
+
+    def __init__(self, fields, record_length):
+        self.fields = fields
+        self.record_length = record_length
+        self.schema = pa.schema([(field.name, field.arrow_type) for field in fields])
+
+
+class _Item:
+    """A parsed data description entry, before offsets are assigned"""
+
+    def __init__(self, level, name):
+        self.level = level
+        self.name = name
+        self.picture = None
+        self.usage = 'DISPLAY'
+        self.occurs = 1
+        self.redefines = False
+        self.children = []
+
+    def size(self):
+        if self.children:
+            own = sum(child.size() for child in self.children if not child.redefines)
+        else:
+            own = _elementary(self, 0, self.name).length
+        return own * self.occurs
+
+
+def _source_text(text):
+    """Strip sequence numbers, indicator area and comments from copybook source"""
+    parts = []
+    for line in text.splitlines():
+        if len(line) > 6 and (not line[:6].strip() or line[:6].isdigit()):
+            # Fixed format: columns 1-6 sequence, 7 indicator, 8-72 code
+            if line[6] in '*/':
+                continue
+            line = line[7:72]
+        line = line.split('*>', 1)[0]
+        if line.strip():
+            parts.append(line)
+    return ' '.join(parts)
+
+
+def _parse_picture(picture):
+    """Return ``(kind, digits, scale, signed, display_length)`` of a PIC string"""
+    expanded = _REPEAT.sub(lambda match: match.group(1) * int(match.group(2)), picture.upper())
+    signed = expanded.startswith('S')
+    expanded = expanded.lstrip('S')
+    if expanded and set(expanded) <= set('9V'):
+        integer, _, fraction = expanded.partition('V')
+        return 'numeric', len(integer) + len(fraction), len(fraction), signed, len(integer) + len(fraction)
+    # Alphanumeric and edited pictures are stored as characters
+    return 'text', 0, 0, False, len(expanded.replace('V', ''))
+
+
+def _elementary(item, offset, name):
+    """Build the Field of an elementary item"""
+    if item.usage in _UNSUPPORTED_USAGES:
+        raise ValueError(f"{item.name}: USAGE {item.usage} is not supported")
+    if item.picture is None:
+        raise ValueError(f"{item.name}: elementary item without PIC clause")
+    kind, digits, scale, signed, display_length = _parse_picture(item.picture)
+    if kind == 'text':
+        return Field(name, offset, display_length, 'text')
+    if digits > MAX_DIGITS:
+        raise ValueError(f"{item.name}: more than {MAX_DIGITS} digits are not supported")
+    if item.usage in _PACKED_USAGES:
+        return Field(name, offset, digits // 2 + 1, 'packed', digits, scale, signed)
+    if item.usage in _BINARY_USAGES:
+        length = 2 if digits <= 4 else 4 if digits <= 9 else 8
+        return Field(name, offset, length, 'binary', digits, scale, signed)
+    return Field(name, offset, display_length, 'zoned', digits, scale, signed)
+
+
+def _parse_items(text):
+    """Parse data description entries into a tree, return the first 01 item"""
+    root = None
+    stack = []
+    for statement in _STATEMENT_END.split(_source_text(text)):
+        tokens = statement.split()
+        if not tokens or not tokens[0].isdigit():
+            continue
+        level = int(tokens[0])
+        if level in (66, 77, 88):
+            continue
+        name = tokens[1].upper() if len(tokens) > 1 else 'FILLER'
+        item = _Item(level, name)
+        clause = [token.upper() for token in tokens[2:]]
+        for index, token in enumerate(clause):
+            following = clause[index + 1:]
+            if following and following[0] == 'IS':
+                following = following[1:]
+            if token in ('PIC', 'PICTURE') and following:
+                item.picture = following[0]
+            elif token == 'USAGE' and following:
+                item.usage = following[0]
+            elif token in _BINARY_USAGES | _PACKED_USAGES | _UNSUPPORTED_USAGES:
+                item.usage = token
+            elif token == 'OCCURS' and following and following[0].isdigit():
+                item.occurs = int(following[0])
+            elif token == 'REDEFINES':
+                item.redefines = True
+            elif token == 'VALUE':
+                break
+
+        if level == 1:
+            if root is not None:
+                # Further 01 records describe alternative layouts of the same area
+                break
+            root = item
+            stack = [item]
+            continue
+        if root is None:
+            raise ValueError("Copybook has no 01-level record")
+        while stack and stack[-1].level >= level:
+            stack.pop()
+        if not stack:
+            raise ValueError(f"{name}: level {level} outside the 01 record")
+        stack[-1].children.append(item)
+        stack.append(item)
+    if root is None:
+        raise ValueError("Copybook has no 01-level record")
+    return root
+
+
+def _flatten(item, offset, suffix, fields):
+    """Append the elementary fields of ``item`` at ``offset``, return the offset after it"""
+    single = item.size() // item.occurs
+    for occurrence in range(item.occurs):
+        name_suffix = f"{suffix}_{occurrence + 1}" if item.occurs > 1 else suffix
+        if item.children:
+            child_offset = offset
+            for child in item.children:
+                if child.redefines:
+                    # A REDEFINES reuses the storage of the item before it
+                    continue
+                child_offset = _flatten(child, child_offset, name_suffix, fields)
+        elif item.name != 'FILLER':
+            fields.append(_elementary(item, offset, item.name + name_suffix))
+        offset += single
+    return offset
+
+
+def parse_copybook(text):
+    """Parse COBOL copybook source into a flat ``CopybookLayout``
+
+    The first 01-level record is used. OCCURS tables are expanded into
+    numbered columns, FILLER is skipped, and REDEFINES items are ignored
+    in favour of the layout they redefine.
+    """
+    root = _parse_items(text)
+    fields = []
+    record_length = _flatten(root, 0, '', fields)
+    seen = {}
+    for field in fields:
+        # Names repeat across groups; keep columns unique
+        count = seen.get(field.name, 0) + 1
+        seen[field.name] = count
+        if count > 1:
+            field.name = f"{field.name}_{count}"
+    return CopybookLayout(fields, record_length)
+
+
+def _accumulate(digits):
+    """Combine a (rows, n) array of decimal digits into int64 values"""
+    values = np.zeros(digits.shape[0], dtype=np.int64)
+    for column in range(digits.shape[1]):
+        values = values * 10 + digits[:, column]
+    return values
+
+
+def _decode_zoned(block):
+    low = block & 0x0F
+    zones = block >> 4
+    sign = zones[:, -1]
+    valid = (low <= 9).all(axis=1) & (zones[:, :-1] == 0xF).all(axis=1) & (sign >= 0xC)
+    values = _accumulate(low)
+    return np.where(sign == 0xD, -values, values), valid
+
+
+def _decode_packed(block):
+    nibbles = np.empty((block.shape[0], block.shape[1] * 2), dtype=np.uint8)
+    nibbles[:, 0::2] = block >> 4
+    nibbles[:, 1::2] = block & 0x0F
+    sign = nibbles[:, -1]
+    valid = (nibbles[:, :-1] <= 9).all(axis=1) & (sign >= 0xA)
+    values = _accumulate(nibbles[:, :-1])
+    return np.where((sign == 0xD) | (sign == 0xB), -values, values), valid
+
+
+def _decode_binary(block, signed):
+    dtype = f">{'i' if signed else 'u'}{block.shape[1]}"
+    values = np.ascontiguousarray(block).view(dtype).ravel().astype(np.int64)
+    return values, None
+
+
+def _decode_text(block, table):
+    # Widening Latin-1 bytes to UCS-4 gives numpy strings without a Python loop
+    characters = np.ascontiguousarray(table[block].astype('<u4'))
+    return pa.array(np.char.rstrip(characters.view(f'<U{block.shape[1]}').ravel()), type=pa.string())
+
+
+def _numeric_array(values, valid, field):
+    """Wrap unscaled int64 values as an int64 or decimal128 Arrow array"""
+    validity = None
+    if valid is not None and not valid.all():
+        validity = pa.array(valid).buffers()[1]
+    if not field.scale:
+        return pa.Array.from_buffers(pa.int64(), len(values), [validity, pa.py_buffer(values)])
+    # decimal128 is a 16-byte little-endian two's complement integer
+    words = np.empty((len(values), 2), dtype=np.int64)
+    words[:, 0] = values
+    words[:, 1] = values >> 63
+    return pa.Array.from_buffers(field.arrow_type, len(values), [validity, pa.py_buffer(words)])
+
+
+def decode_batch(rows, layout, table):
+    """Decode a (records, lrecl) uint8 array into an Arrow record batch
+
+    Each field is converted column-wise over the whole batch. Numeric
+    fields with invalid digits or sign nibbles become nulls.
+    """
+    columns = []
+    for field in layout.fields:
+        block = rows[:, field.offset:field.offset + field.length]
+        if field.kind == 'text':
+            columns.append(_decode_text(block, table))
+            continue
+        if field.kind == 'packed':
+            values, valid = _decode_packed(block)
+        elif field.kind == 'binary':
+            values, valid = _decode_binary(block, field.signed)
+        else:
+            values, valid = _decode_zoned(block)
+            # Numeric fields left blank are treated as missing
+            valid &= ~(block == _EBCDIC_SPACE).all(axis=1)
+        columns.append(_numeric_array(values, valid, field))
+    return pa.RecordBatch.from_arrays(columns, schema=layout.schema)
+
+
+def _open_writer(output_path, schema):
+    if os.path.splitext(output_path)[1].lower() in ARROW_EXTENSIONS:
+        return pa.ipc.new_file(output_path, schema)
+    return pq.ParquetWriter(output_path, schema, compression='zstd')
+
+
+def extract_columns(input_path, layout, output_path, code_page='IBM-1047', lrecl=None,
+                    batch_bytes=BATCH_BYTES, progress_callback=None):
+    """Decode the fixed-length records of a raw dataset file into a columnar file
+
+    ``input_path`` holds records as fetched by a binary download. Records
+    are memory-mapped and decoded in batches of about ``batch_bytes``, each
+    written as its own Parquet row group or Arrow record batch, so memory
+    stays bounded however large the file is. ``lrecl`` defaults to the
+    copybook record length. ``progress_callback`` is called with
+    ``(records_done, total_records)``.
+
+    Returns a dict with the record count and elapsed seconds.
+    """
+    start = time.monotonic()
+    lrecl = lrecl or layout.record_length
+    if lrecl < layout.record_length:
+        raise ValueError(f"LRECL {lrecl} is shorter than the {layout.record_length} byte copybook record")
+    table = decode_table(code_page)
+    size = os.path.getsize(input_path)
+    if size % lrecl:
+        raise ValueError(f"File size {size} is not a multiple of LRECL {lrecl}")
+    total_records = size // lrecl
+    rows_per_batch = max(1, batch_bytes // lrecl)
+
+    records = 0
+    with open(input_path, 'rb') as source, _open_writer(output_path, layout.schema) as writer:
+        if size:
+            # Released with the arrays over it, see codec_utils.decode_file
+            mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+            data = np.frombuffer(mapped, dtype=np.uint8).reshape(-1, lrecl)
+            for first in range(0, total_records, rows_per_batch):
+                writer.write_batch(decode_batch(data[first:first + rows_per_batch], layout, table))
+                records = min(first + rows_per_batch, total_records)
+                if progress_callback:
+                    progress_callback(records, total_records)
+
+    elapsed = time.monotonic() - start
+    logging.info(f"Extracted {records} records of {len(layout.fields)} fields from {input_path} "
+                 f"to {output_path} in {elapsed:.2f}s")
+    return {'records': records, 'seconds': elapsed}
+
+
+def count_rows(path):
+    """Number of rows in a Parquet or Arrow IPC file, read from its metadata"""
+    if os.path.splitext(path)[1].lower() in ARROW_EXTENSIONS:
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            return sum(reader.get_batch(index).num_rows for index in range(reader.num_record_batches))
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def read_page(path, page, page_size=PREVIEW_PAGE_ROWS):
+    """Read one page of rows of a columnar file as a pandas DataFrame
+
+    Only the row groups or record batches overlapping the page are read.
+    """
+    start = page * page_size
+    end = start + page_size
+    if os.path.splitext(path)[1].lower() in ARROW_EXTENSIONS:
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            batches = []
+            first_row = None
+            position = 0
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index)
+                if position < end and position + batch.num_rows > start:
+                    if first_row is None:
+                        first_row = position
+                    batches.append(batch)
+                elif batches:
+                    break
+                position += batch.num_rows
+            if not batches:
+                return reader.schema.empty_table().to_pandas()
+            return pa.Table.from_batches(batches).slice(start - first_row, page_size).to_pandas()
+
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    groups = []
+    first_row = None
+    position = 0
+    for index in range(parquet_file.num_row_groups):
+        rows = parquet_file.metadata.row_group(index).num_rows
+        if position < end and position + rows > start:
+            if first_row is None:
+                first_row = position
+            groups.append(index)
+        position += rows
+    if not groups:
+        return parquet_file.schema_arrow.empty_table().to_pandas()
+    return parquet_file.read_row_groups(groups).slice(start - first_row, page_size).to_pandas()
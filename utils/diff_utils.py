@@ -0,0 +1,356 @@
+import codecs
+import difflib
+import hashlib
+import io
+import itertools
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+
+from utils.transfer_utils import DEFAULT_CHUNK_SIZE, PROGRESS_INTERVAL, DecodedBody, error_status, open_content
+
+DIFF_DIR = Path('.cache/diffs')
+
+# Records hashed per block; identical blocks are skipped without diffing
+BLOCK_RECORDS = 256
+
+# Blocks of each side diffed together once a block differs
+WINDOW_BLOCKS = 4
+
+CONTEXT_LINES = 3
+
+# Lines of unified diff shown per page
+DIFF_PAGE_LINES = 200
+
+# A hunk growing past this many lines is closed and the next change starts a new one
+MAX_HUNK_LINES = 2000
+
+# Diff files older than this are removed when the next comparison starts
+DIFF_MAX_AGE_SECONDS = 24 * 60 * 60
+
+
+def iter_dataset_lines(datasets_api, dataset_name, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream the records of a dataset or member as text lines, one chunk in memory at a time"""
+    response = open_content(datasets_api, dataset_name)
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    tail = ''
+    try:
+        for chunk in DecodedBody(response, chunk_size):
+            lines = (tail + decoder.decode(chunk)).split('\n')
+            tail = lines.pop()
+            yield from lines
+        tail += decoder.decode(b'', final=True)
+    finally:
+        response.close()
+    if tail:
+        yield tail
+
+
+def iter_file_lines(source, encoding='utf-8'):
+    """Stream the lines of a local file, given as a path or a binary file object (e.g. an upload)"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, encoding=encoding, errors='replace') as f:
+            yield from f
+        return
+    source.seek(0)
+    text = io.TextIOWrapper(source, encoding=encoding, errors='replace')
+    try:
+        yield from text
+    finally:
+        # Leave the caller's file object open
+        text.detach()
+
+
+def _block_hash(lines):
+    return hashlib.blake2b('\n'.join(lines).encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+class _Side:
+    """Lines of one side not compared yet, read ahead as far as the diff needs"""
+
+    def __init__(self, lines, normalize):
+        self._lines = iter(lines)
+        self._normalize = normalize
+        self.buffer = []
+        self.start = 1
+        self.records = 0
+        self.done = False
+
+    def fill(self, count):
+        """The first ``count`` pending lines, reading more when needed"""
+        needed = count - len(self.buffer)
+        if needed > 0 and not self.done:
+            read = len(self.buffer)
+            self.buffer.extend(map(self._normalize, itertools.islice(self._lines, needed)))
+            read = len(self.buffer) - read
+            self.records += read
+            self.done = read < needed
+        return self.buffer[:count]
+
+    def take(self, count):
+        del self.buffer[:count]
+        self.start += count
+
+
+def diff_records(left, right, ignore_trailing_blanks=True, block_records=BLOCK_RECORDS,
+                 window_blocks=WINDOW_BLOCKS, progress_callback=None):
+    """Compare two streams of records, yielding equal runs and changes in order
+
+    Both sides are read a block of ``block_records`` at a time; blocks
+    with the same hash are passed over as equal. Once a block differs,
+    windows of ``window_blocks`` blocks are diffed with difflib up to the
+    last matching run, and the rest is carried into the next round, so
+    memory stays bounded by the window whatever the dataset sizes.
+
+    Yields ``('equal', left_line, right_line, lines)`` and
+    ``('change', left_line, old_lines, right_line, new_lines)`` with
+    1-based line numbers. ``progress_callback`` is called with the
+    records read from each side.
+    """
+    if ignore_trailing_blanks:
+        def normalize(line):
+            return line.rstrip()
+    else:
+        def normalize(line):
+            return line.rstrip('\r\n')
+    a, b = _Side(left, normalize), _Side(right, normalize)
+    window = block_records * window_blocks
+    last_report = 0.0
+    while True:
+        head_a, head_b = a.fill(block_records), b.fill(block_records)
+        if not head_a and not head_b:
+            break
+        now = time.monotonic()
+        if progress_callback and now - last_report >= PROGRESS_INTERVAL:
+            progress_callback(a.records, b.records)
+            last_report = now
+
+        if len(head_a) == len(head_b) and _block_hash(head_a) == _block_hash(head_b):
+            yield 'equal', a.start, b.start, head_a
+            a.take(len(head_a))
+            b.take(len(head_b))
+            continue
+
+        window_a, window_b = a.fill(window), b.fill(window)
+        opcodes = difflib.SequenceMatcher(None, window_a, window_b, autojunk=False).get_opcodes()
+        if not (a.done and b.done and len(a.buffer) <= window and len(b.buffer) <= window):
+            # What follows the last matching run may line up with records not read yet
+            matched = [k for k, opcode in enumerate(opcodes) if opcode[0] == 'equal']
+            if matched:
+                opcodes = opcodes[:matched[-1] + 1]
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal':
+                yield 'equal', a.start + i1, b.start + j1, window_a[i1:i2]
+            else:
+                yield 'change', a.start + i1, window_a[i1:i2], b.start + j1, window_b[j1:j2]
+        consumed_a, consumed_b = opcodes[-1][2], opcodes[-1][4]
+        a.take(consumed_a)
+        b.take(consumed_b)
+    if progress_callback:
+        progress_callback(a.records, b.records)
+
+
+def records_differ(left, right, ignore_trailing_blanks=True):
+    """Whether two streams of records differ, stopping at the first difference"""
+    return any(event[0] == 'change' for event in diff_records(left, right, ignore_trailing_blanks))
+
+
+def unified_hunks(events, context=CONTEXT_LINES, max_lines=MAX_HUNK_LINES):
+    """Group the events of ``diff_records`` into unified diff hunks
+
+    Yields dicts with the ``left_start``, ``left_count``, ``right_start``
+    and ``right_count`` of each hunk and its ``lines`` prefixed with
+    ' ', '-' or '+'. Changes at most ``2 * context`` equal lines apart
+    share a hunk, as in ``diff -u``.
+    """
+    hunk = None
+    # Equal lines after the open hunk's trailing context, as (left, right, text); the last few lead the next hunk
+    pending = deque(maxlen=context)
+    gap = 0
+
+    def add_context(text):
+        hunk['lines'].append(' ' + text)
+        hunk['left_count'] += 1
+        hunk['right_count'] += 1
+
+    for event in events:
+        if event[0] == 'equal':
+            _, left_line, right_line, lines = event
+            skip = 0
+            if hunk is not None and gap < context:
+                skip = min(context - gap, len(lines))
+                for text in lines[:skip]:
+                    add_context(text)
+            # Only the last lines of a long equal run can become leading context
+            for offset in range(max(skip, len(lines) - context), len(lines)):
+                pending.append((left_line + offset, right_line + offset, lines[offset]))
+            gap += len(lines)
+            continue
+
+        _, left_line, old_lines, right_line, new_lines = event
+        if hunk is not None and (gap > 2 * context or len(hunk['lines']) >= max_lines):
+            yield hunk
+            hunk = None
+        if hunk is None:
+            first_left, first_right = (pending[0][0], pending[0][1]) if pending else (left_line, right_line)
+            hunk = {'left_start': first_left, 'left_count': 0, 'right_start': first_right, 'right_count': 0,
+                    'lines': []}
+        for _, _, text in pending:
+            add_context(text)
+        pending.clear()
+        gap = 0
+        hunk['lines'].extend('-' + text for text in old_lines)
+        hunk['lines'].extend('+' + text for text in new_lines)
+        hunk['left_count'] += len(old_lines)
+        hunk['right_count'] += len(new_lines)
+    if hunk is not None:
+        yield hunk
+
+
+def _hunk_header(hunk):
+    # An empty range is numbered after the line it follows, as diff -u does
+    left_start = hunk['left_start'] if hunk['left_count'] else hunk['left_start'] - 1
+    right_start = hunk['right_start'] if hunk['right_count'] else hunk['right_start'] - 1
+    return f"@@ -{left_start},{hunk['left_count']} +{right_start},{hunk['right_count']} @@"
+
+
+class DiffResult:
+    """A unified diff written to disk, read back one page at a time
+
+    Only the file offset of each page is kept in memory, so a diff of
+    any size can be paged through in the UI.
+    """
+
+    def __init__(self, path, left_label, right_label, page_lines=DIFF_PAGE_LINES):
+        self.path = Path(path)
+        self.left_label = left_label
+        self.right_label = right_label
+        self.page_lines = page_lines
+        self.page_offsets = []
+        self.hunks = 0
+        self.added = 0
+        self.removed = 0
+        self.left_records = 0
+        self.right_records = 0
+        self.seconds = 0.0
+
+    @property
+    def identical(self):
+        return self.hunks == 0
+
+    @property
+    def pages(self):
+        return len(self.page_offsets)
+
+    def page(self, number):
+        """Lines of the 1-based page ``number`` of the unified diff"""
+        if not 1 <= number <= self.pages:
+            return []
+        lines = []
+        with open(self.path, 'rb') as f:
+            f.seek(self.page_offsets[number - 1])
+            for line in f:
+                lines.append(line.decode('utf-8', errors='replace').rstrip('\n'))
+                if len(lines) == self.page_lines:
+                    break
+        return lines
+
+    def close(self):
+        """Remove the diff file"""
+        self.path.unlink(missing_ok=True)
+
+
+def _remove_old_diffs(directory):
+    cutoff = time.time() - DIFF_MAX_AGE_SECONDS
+    for path in directory.glob('*.diff'):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def compare(left, right, left_label, right_label, ignore_trailing_blanks=True, progress_callback=None,
+            directory=DIFF_DIR, page_lines=DIFF_PAGE_LINES):
+    """Diff two streams of records into a paged unified diff on disk
+
+    ``left`` and ``right`` are iterables of lines, e.g. from
+    ``iter_dataset_lines`` or ``iter_file_lines``; the labels name them
+    in the diff header. Returns a DiffResult.
+    """
+    start = time.monotonic()
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    _remove_old_diffs(directory)
+    result = DiffResult(directory / f"{uuid.uuid4().hex}.diff", left_label, right_label, page_lines)
+
+    lines_written = 0
+
+    def write_line(f, line):
+        nonlocal lines_written
+        if lines_written % result.page_lines == 0:
+            result.page_offsets.append(f.tell())
+        f.write((line + '\n').encode('utf-8', errors='replace'))
+        lines_written += 1
+
+    def count_records(left_records, right_records):
+        result.left_records, result.right_records = left_records, right_records
+        if progress_callback:
+            progress_callback(left_records, right_records)
+
+    with open(result.path, 'wb') as f:
+        events = diff_records(left, right, ignore_trailing_blanks, progress_callback=count_records)
+        for hunk in unified_hunks(events):
+            if not result.hunks:
+                write_line(f, f"--- {left_label}")
+                write_line(f, f"+++ {right_label}")
+            result.hunks += 1
+            write_line(f, _hunk_header(hunk))
+            for line in hunk['lines']:
+                write_line(f, line)
+                if line[0] == '+':
+                    result.added += 1
+                elif line[0] == '-':
+                    result.removed += 1
+
+    result.seconds = time.monotonic() - start
+    logging.info(f"Compared {left_label} ({result.left_records} records) with {right_label} "
+                 f"({result.right_records} records) in {result.seconds:.2f}s: {result.hunks} hunks, "
+                 f"{result.removed} removed, {result.added} added")
+    return result
+
+
+def content_differs(datasets_api, dataset_name, payload, data_type=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Whether an upload would change a dataset, True when the dataset does not exist
+
+    ``payload`` is a buffer or a binary file object such as an upload.
+
+    Text payloads are compared record by record, ignoring trailing blanks
+    that fixed-length records pad with; with ``data_type`` 'binary' or
+    'record' the bytes z/OSMF stores are compared as they are. Either way
+    the dataset is streamed and the comparison stops at the first
+    difference.
+    """
+    try:
+        if not data_type:
+            source = payload if hasattr(payload, 'read') else io.BytesIO(payload)
+            return records_differ(iter_dataset_lines(datasets_api, dataset_name, chunk_size),
+                                  iter_file_lines(source))
+        view = memoryview(payload.getbuffer() if hasattr(payload, 'getbuffer') else payload).cast('B')
+        response = open_content(datasets_api, dataset_name, data_type=data_type)
+        try:
+            position = 0
+            for chunk in DecodedBody(response, chunk_size):
+                if view[position:position + len(chunk)] != chunk:
+                    return True
+                position += len(chunk)
+            return position != len(view)
+        finally:
+            response.close()
+    except Exception as e:
+        if error_status(e) == 404:
+            return True
+        raise
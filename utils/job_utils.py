@@ -0,0 +1,200 @@
+import streamlit as st
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from zowe.zos_jobs_for_zowe_sdk import Jobs
+
+# Polling backoff: start fast, double while nothing changes, cap at the maximum
+POLL_INITIAL_SECONDS = 1.0
+POLL_MAX_SECONDS = 30.0
+
+# Spool records fetched per request
+SPOOL_RECORD_BATCH = 5000
+
+SPOOL_DIR = 'spool'
+
+# Ended jobs stay listed this long before the monitor drops them
+JOB_RETENTION_SECONDS = 60 * 60
+
+
+class SpoolFile:
+    """A spool file of a tracked job, appended to a local file as it grows"""
+
+    def __init__(self, file_id, ddname, stepname, path):
+        self.file_id = file_id
+        self.ddname = ddname
+        self.stepname = stepname
+        self.path = path
+        self.records_read = 0
+
+
+class TrackedJob:
+    """State of a submitted job as seen by the last poll"""
+
+    def __init__(self, owner, connection, response):
+        self.owner = owner
+        self.connection = connection
+        self.jobname = response.jobname
+        self.jobid = response.jobid
+        self.correlator = response.job_correlator
+        self.status = response.status
+        self.retcode = response.retcode
+        self.spool_files = {}
+        self.error = ''
+        self.done = False
+        self.submitted = time.time()
+        self.ended = None
+        self.interval = POLL_INITIAL_SECONDS
+        self.spool_dir = os.path.join(SPOOL_DIR, f"{self.jobname}_{self.jobid}")
+
+    def summary(self):
+        return {
+            'jobname': self.jobname,
+            'jobid': self.jobid,
+            'status': self.status,
+            'retcode': self.retcode or '',
+            'spool files': len(self.spool_files),
+            'records': sum(spool.records_read for spool in self.spool_files.values()),
+            'error': self.error
+        }
+
+
+class JobMonitor:
+    """Background poller for submitted jobs, shared by all sessions
+
+    A single scheduler thread hands due polls to a bounded worker pool, so
+    dozens of in-flight jobs cost a few threads and never block the
+    Streamlit script thread. Each job is polled with exponential backoff
+    that resets whenever new spool output arrives, and spool files are
+    fetched incrementally by record range instead of re-read in full.
+    Ended jobs are dropped ``retention`` seconds after they end, and all
+    jobs of a session when it is released.
+    """
+
+    def __init__(self, max_workers=4, retention=JOB_RETENTION_SECONDS):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='jobs')
+        self._jobs = {}
+        self._schedule = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        threading.Thread(target=self._run, name='job-scheduler', daemon=True).start()
+
+    def submit(self, owner, connection, jcl_dataset=None, jcl_text=None):
+        """Submit JCL from a dataset or from text and start tracking the job"""
+        jobs_api = connection.api(Jobs)
+        if jcl_dataset:
+            response = jobs_api.submit_from_mainframe(jcl_dataset)
+        else:
+            response = jobs_api.submit_plaintext(jcl_text)
+        job = TrackedJob(owner, connection, response)
+        logging.info(f"Submitted job {job.jobname}({job.jobid})")
+        with self._lock:
+            self._prune()
+            self._jobs[(owner, job.correlator)] = job
+            self._schedule_poll(job, 0)
+        return job
+
+    def jobs_for(self, owner):
+        """Jobs submitted by a session, newest first"""
+        with self._lock:
+            self._prune()
+            jobs = [job for (job_owner, _), job in self._jobs.items() if job_owner == owner]
+        return sorted(jobs, key=lambda job: job.submitted, reverse=True)
+
+    def forget(self, owner, job):
+        """Stop tracking a job"""
+        with self._lock:
+            self._jobs.pop((owner, job.correlator), None)
+
+    def release(self, owner):
+        """Stop tracking every job of a session, e.g. when it logs out"""
+        with self._lock:
+            for key in [key for key in self._jobs if key[0] == owner]:
+                del self._jobs[key]
+
+    def _prune(self):
+        """Drop jobs that ended more than ``retention`` seconds ago; called with the lock held"""
+        cutoff = time.time() - self.retention
+        for key in [key for key, job in self._jobs.items() if job.ended and job.ended < cutoff]:
+            del self._jobs[key]
+
+    def _schedule_poll(self, job, delay):
+        heapq.heappush(self._schedule, (time.monotonic() + delay, next(self._sequence), job))
+        self._wakeup.notify()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._schedule or self._schedule[0][0] > time.monotonic():
+                    timeout = self._schedule[0][0] - time.monotonic() if self._schedule else None
+                    self._wakeup.wait(timeout)
+                _, _, job = heapq.heappop(self._schedule)
+                if (job.owner, job.correlator) not in self._jobs:
+                    continue
+            self._executor.submit(self._poll, job)
+
+    def _poll(self, job):
+        try:
+            jobs_api = job.connection.api(Jobs)
+            status = jobs_api.get_job_status(job.jobname, job.jobid)
+            job.status = status.status
+            job.retcode = status.retcode
+            grew = self._fetch_spool(jobs_api, job)
+            job.error = ''
+            if job.status == 'OUTPUT' and not grew:
+                job.done = True
+                job.ended = time.time()
+                logging.info(f"Job {job.jobname}({job.jobid}) ended with {job.retcode}")
+                return
+            job.interval = POLL_INITIAL_SECONDS if grew else min(job.interval * 2, POLL_MAX_SECONDS)
+        except Exception as e:
+            logging.warning(f"Polling job {job.jobname}({job.jobid}) failed: {str(e)}")
+            job.error = str(e)
+            job.interval = min(job.interval * 2, POLL_MAX_SECONDS)
+        with self._lock:
+            self._schedule_poll(job, job.interval)
+
+    def _fetch_spool(self, jobs_api, job):
+        """Append new records of every spool file, return True if any arrived"""
+        grew = False
+        for item in jobs_api.get_spool_files(job.correlator):
+            spool = job.spool_files.get(item.id)
+            if spool is None:
+                path = os.path.join(job.spool_dir, f"{item.id}_{item.stepname}_{item.ddname}.txt")
+                spool = SpoolFile(item.id, item.ddname, item.stepname, path)
+                job.spool_files[item.id] = spool
+            while (item.record_count or 0) > spool.records_read:
+                records = read_spool_records(jobs_api, job.correlator, spool.file_id, spool.records_read)
+                if not records:
+                    break
+                os.makedirs(job.spool_dir, exist_ok=True)
+                with open(spool.path, 'a', encoding='utf-8') as f:
+                    f.write(records)
+                spool.records_read += records.count('\n')
+                grew = True
+        return grew
+
+
+def read_spool_records(jobs_api, correlator, file_id, start, count=SPOOL_RECORD_BATCH):
+    """Read ``count`` records of a spool file from record ``start`` (0-based)"""
+    custom_args = jobs_api._create_custom_request_arguments()
+    custom_args["url"] = "{}{}/files/{}/records".format(
+        jobs_api._request_endpoint, jobs_api._encode_uri_component(correlator), file_id)
+    custom_args["headers"]["X-IBM-Record-Range"] = f"{start},{count}"
+    records = jobs_api.request_handler.perform_request("GET", custom_args) or ''
+    if records and not records.endswith('\n'):
+        records += '\n'
+    return records
+
+
+@st.cache_resource
+def get_job_monitor():
+    """Get the process-wide job monitor"""
+    return JobMonitor()
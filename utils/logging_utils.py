@@ -0,0 +1,191 @@
+import streamlit as st
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+LOG_DIR = Path('logs')
+LOG_FILE_NAME = 'zowe_app.log'
+
+# Records waiting for the writer thread; beyond this they are dropped, never blocking the caller
+QUEUE_SIZE = 10000
+
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed in ``extra`` and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+
+def get_logging_config():
+    """Get logging settings from secrets"""
+    try:
+        return {
+            "level": st.secrets["logging"]["level"],
+            "log_retention_days": st.secrets["logging"]["log_retention_days"],
+            "max_file_mb": st.secrets["logging"].get("max_file_mb", 50)
+        }
+    except Exception as e:
+        logging.warning(f"Failed to load logging config from secrets: {e}")
+        return {
+            "level": "INFO",
+            "log_retention_days": 7,
+            "max_file_mb": 50
+        }
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with ``extra`` fields kept as fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that never blocks: when the writer falls behind, records are dropped and counted
+
+    Messages and tracebacks are rendered on the calling thread, so the
+    writer never touches objects that may have changed meanwhile, but the
+    record keeps its fields for structured output.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            if self._unreported:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': f"Dropped {self._unreported} log records, the log writer fell behind"
+                }))
+                self._unreported = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+
+class RotatingLogHandler(logging.handlers.BaseRotatingHandler):
+    """Log file rotated at midnight and whenever it grows past ``max_bytes``
+
+    Rotated files get a timestamp suffix and are deleted once they are
+    older than ``retention_days``, as are log files left by earlier
+    versions of the app.
+    """
+
+    def __init__(self, path, max_bytes, retention_days):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(str(path), 'a', encoding='utf-8')
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.rollover_at = self._next_midnight()
+        self.remove_expired()
+
+    @staticmethod
+    def _next_midnight():
+        tomorrow = datetime.now() + timedelta(days=1)
+        return tomorrow.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+    def shouldRollover(self, record):
+        if time.time() >= self.rollover_at:
+            return True
+        return bool(self.max_bytes) and self.stream is not None and self.stream.tell() >= self.max_bytes
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        target = f"{self.baseFilename}.{datetime.now():%Y%m%d_%H%M%S}"
+        suffix = 1
+        while os.path.exists(target):
+            target = f"{self.baseFilename}.{datetime.now():%Y%m%d_%H%M%S}_{suffix}"
+            suffix += 1
+        if os.path.exists(self.baseFilename):
+            os.replace(self.baseFilename, target)
+        self.stream = self._open()
+        self.rollover_at = self._next_midnight()
+        self.remove_expired()
+
+    def remove_expired(self):
+        """Delete rotated and legacy log files older than the retention period"""
+        directory = Path(self.baseFilename).parent
+        cutoff = time.time() - self.retention_days * 86400
+        for path in directory.glob('*.log*'):
+            if str(path) == self.baseFilename:
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                pass
+
+
+@st.cache_resource
+def setup_logging():
+    """Route all logging through a queue to a background writer, once per process
+
+    Callers only format the message and enqueue it; a listener thread
+    writes JSON lines to ``logs/zowe_app.log`` and plain lines to the
+    console. Level, retention and file size come from ``[logging]`` in
+    secrets.
+    """
+    config = get_logging_config()
+    level = logging.getLevelName(str(config["level"]).upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    file_handler = RotatingLogHandler(LOG_DIR / LOG_FILE_NAME,
+                                      max_bytes=int(config["max_file_mb"] * 1024 * 1024),
+                                      retention_days=config["log_retention_days"])
+    file_handler.setFormatter(JsonFormatter())
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+
+    queue_handler = DroppingQueueHandler(queue.Queue(QUEUE_SIZE))
+    listener = logging.handlers.QueueListener(queue_handler.queue, file_handler, console_handler)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    # Suppress excessive logging from urllib3
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+
+    listener.start()
+    atexit.register(listener.stop)
+    logging.info(f"Logging at {logging.getLevelName(level)} to {file_handler.baseFilename}, "
+                 f"kept for {config['log_retention_days']} days")
+    return queue_handler
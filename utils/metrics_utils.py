@@ -0,0 +1,215 @@
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Host label of operations that never leave this machine, such as profile saves
+LOCAL_HOST = 'local'
+
+PROMETHEUS_FILE = Path('metrics/zowe_app.prom')
+
+# z/OSMF REST paths and the operation each one is reported as, checked in order
+_OPERATIONS = (
+    (re.compile(r'/zosmf/info$'), {'GET': 'zosmf.get_info'}),
+    (re.compile(r'/zosmf/services/authenticate$'), {'POST': 'auth.login', 'DELETE': 'auth.logout'}),
+    (re.compile(r'/zosmf/restfiles/ds$'), {'GET': 'datasets.list'}),
+    (re.compile(r'/zosmf/restfiles/ds/[^/]+/member$'), {'GET': 'datasets.list_members'}),
+    (re.compile(r'/zosmf/restfiles/ds/[^/]+$'), {'GET': 'datasets.download', 'PUT': 'datasets.write',
+                                                 'POST': 'datasets.create', 'DELETE': 'datasets.delete'}),
+    (re.compile(r'/zosmf/restjobs/jobs$'), {'GET': 'jobs.list', 'PUT': 'jobs.submit'}),
+    # Spool requests address the job by its correlator, status and cancel by name and ID
+    (re.compile(r'/zosmf/restjobs/jobs/[^/]+/files$'), {'GET': 'jobs.list_spool'}),
+    (re.compile(r'/zosmf/restjobs/jobs/[^/]+/files/[^/]+/records$'), {'GET': 'jobs.read_spool'}),
+    (re.compile(r'/zosmf/restjobs/jobs/[^/]+/[^/]+$'), {'GET': 'jobs.status', 'PUT': 'jobs.cancel',
+                                                         'DELETE': 'jobs.purge'}),
+)
+
+
+def operation_name(method, url):
+    """Name a z/OSMF request by what it does, e.g. ``datasets.write``
+
+    Dataset and job names are dropped, so every download is one operation
+    however many datasets it covers.
+    """
+    method = method.upper()
+    # The SDK sends 'JOB/ID' and 'CORRELATOR/files' as one encoded segment
+    path = unquote(urlsplit(url).path).rstrip('/')
+    for pattern, methods in _OPERATIONS:
+        if pattern.search(path):
+            return methods.get(method, f"{method.lower()} {pattern.pattern.strip('$')}")
+    return f"{method.lower()} other"
+
+
+class _Series:
+    """Counters and latency histogram of one (host, operation)"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def observe(self, seconds, bytes_sent, bytes_received, error):
+        index = 0
+        while index < len(LATENCY_BUCKETS) and seconds > LATENCY_BUCKETS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.errors += bool(error)
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+
+    def quantile(self, q):
+        """Estimate a latency quantile from the histogram, like Prometheus does"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(LATENCY_BUCKETS):
+                    return self.max_seconds
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = min(LATENCY_BUCKETS[index], self.max_seconds)
+                return lower + (max(upper, lower) - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max_seconds
+
+
+class MetricsRegistry:
+    """Process-wide timings of z/OSMF calls, by host and operation
+
+    Every request sent through the connection pool is recorded with its
+    latency, bytes in each direction and whether it failed. Streamed
+    responses are recorded when they are closed, so their latency covers
+    the whole body rather than just the headers.
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def observe(self, host, operation, seconds, bytes_sent=0, bytes_received=0, error=False):
+        with self._lock:
+            series = self._series.get((host, operation))
+            if series is None:
+                series = self._series[(host, operation)] = _Series()
+            series.observe(seconds, bytes_sent, bytes_received, error)
+
+    @contextmanager
+    def timed(self, host, operation):
+        """Record the duration of the enclosed block; an exception counts as an error"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(host, operation, time.perf_counter() - start, error=True)
+            raise
+        self.observe(host, operation, time.perf_counter() - start)
+
+    def snapshot(self):
+        """One summary row per (host, operation), slowest total time first"""
+        with self._lock:
+            items = [(key, series) for key, series in self._series.items()]
+            rows = []
+            for (host, operation), series in items:
+                transferred = series.bytes_sent + series.bytes_received
+                rows.append({
+                    'host': host,
+                    'operation': operation,
+                    'calls': series.count,
+                    'errors': series.errors,
+                    'total_s': round(series.seconds, 3),
+                    'mean_ms': round(series.seconds / series.count * 1000, 1),
+                    'p50_ms': round(series.quantile(0.5) * 1000, 1),
+                    'p95_ms': round(series.quantile(0.95) * 1000, 1),
+                    'p99_ms': round(series.quantile(0.99) * 1000, 1),
+                    'max_ms': round(series.max_seconds * 1000, 1),
+                    'bytes_sent': series.bytes_sent,
+                    'bytes_received': series.bytes_received,
+                    'MB/s': round(transferred / (1024 * 1024) / series.seconds, 2) if series.seconds else 0.0
+                })
+        return sorted(rows, key=lambda row: row['total_s'], reverse=True)
+
+    def prometheus_text(self):
+        """All series in the Prometheus text exposition format"""
+        lines = [
+            '# HELP zosmf_request_duration_seconds Latency of z/OSMF calls made by the app',
+            '# TYPE zosmf_request_duration_seconds histogram'
+        ]
+        with self._lock:
+            items = sorted(self._series.items())
+            for (host, operation), series in items:
+                labels = f'host="{_escape(host)}",operation="{_escape(operation)}"'
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS + ('+Inf',), series.buckets):
+                    cumulative += bucket_count
+                    lines.append(f'zosmf_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'zosmf_request_duration_seconds_sum{{{labels}}} {series.seconds}')
+                lines.append(f'zosmf_request_duration_seconds_count{{{labels}}} {series.count}')
+            for name, help_text, attribute in (
+                ('zosmf_request_errors_total', 'Failed z/OSMF calls', 'errors'),
+                ('zosmf_request_bytes_sent_total', 'Request body bytes sent to z/OSMF', 'bytes_sent'),
+                ('zosmf_response_bytes_received_total', 'Response bytes received from z/OSMF', 'bytes_received'),
+            ):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for (host, operation), series in items:
+                    lines.append(f'{name}{{host="{_escape(host)}",operation="{_escape(operation)}"}} '
+                                 f'{getattr(series, attribute)}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path=PROMETHEUS_FILE):
+        """Write the metrics for a node_exporter textfile collector, atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix('.tmp')
+        with open(temporary, 'w') as f:
+            f.write(self.prometheus_text())
+        os.replace(temporary, path)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self.started = time.time()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def start_export(registry, path=PROMETHEUS_FILE, interval=15.0):
+    """Rewrite the Prometheus file every ``interval`` seconds on a daemon thread"""
+    def export():
+        while True:
+            try:
+                registry.write_prometheus(path)
+            except Exception as e:
+                logging.warning(f"Failed to write metrics to {path}: {str(e)}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=export, name='metrics-export', daemon=True)
+    thread.start()
+    logging.info(f"Exporting z/OSMF metrics to {path} every {interval:g}s")
+    return thread
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics():
+    """Get the process-wide metrics registry"""
+    return _registry
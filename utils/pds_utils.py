@@ -0,0 +1,205 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+from utils.batch_utils import per_thread, run_batch
+from utils.resume_utils import CHECKPOINT_INTERVAL, Checkpoint, with_retries
+from utils.sync_utils import hash_file
+from utils.transfer_utils import stream_download, stream_upload
+
+# Valid PDS member name: 1-8 characters, national characters allowed
+MEMBER_NAME_PATTERN = re.compile(r'^[A-Z#@$][A-Z0-9#@$]{0,7}$')
+
+# Members requested per list call
+MEMBER_PAGE_SIZE = 1000
+
+# ISPF statistics that change whenever a member is edited
+MEMBER_STAT_FIELDS = ('vers', 'mod', 'm4date', 'mtime', 'msec', 'mnorc')
+
+def member_name_from_file(filename):
+    """Derive a member name from a file name (e.g. 'payroll.cbl' -> 'PAYROLL')"""
+    name = Path(filename).stem.upper()
+    if not MEMBER_NAME_PATTERN.match(name):
+        raise ValueError(f"'{filename}' is not a valid member name")
+    return name
+
+
+def iter_member_pages(datasets_api, dataset_name, page_size=MEMBER_PAGE_SIZE, attributes='base'):
+    """List the members of a PDS one page at a time
+
+    A generator yielding lists of member items as z/OSMF returns them; the
+    next page is only requested when the caller asks for it.
+    """
+    start = None
+    while True:
+        response = datasets_api.list_members(dataset_name, member_start=start, limit=page_size,
+                                             attributes=attributes)
+        items = response.items or []
+        # The start member is returned again at the top of the next page
+        page = items[1:] if start and items and items[0].member == start else items
+        if page:
+            yield page
+        if len(items) < page_size or not page:
+            return
+        start = items[-1].member
+
+
+def list_all_members(datasets_api, dataset_name, page_size=MEMBER_PAGE_SIZE):
+    """List every member of a PDS with ISPF statistics, paging past the item limit
+
+    Returns a dict of member name to a tuple of its statistics.
+    """
+    members = {}
+    for page in iter_member_pages(datasets_api, dataset_name, page_size):
+        for item in page:
+            members[item.member] = tuple(getattr(item, field, None) for field in MEMBER_STAT_FIELDS)
+    return members
+
+
+def member_sources(uploaded_files=(), directory=None):
+    """Collect (member name, loader) pairs from uploaded files, zips and a directory
+
+    Each loader returns the member content as bytes when called, so
+    content is only read by the worker that sends it.
+    """
+    sources = {}
+
+    def add(filename, loader):
+        member = member_name_from_file(filename)
+        if member in sources:
+            raise ValueError(f"More than one file maps to member {member}")
+        sources[member] = loader
+
+    for uploaded in uploaded_files:
+        if uploaded.name.lower().endswith('.zip'):
+            archive = zipfile.ZipFile(uploaded)
+            for info in archive.infolist():
+                if not info.is_dir():
+                    add(info.filename, lambda info=info, archive=archive: archive.read(info))
+        else:
+            add(uploaded.name, lambda uploaded=uploaded: uploaded.getbuffer())
+
+    if directory:
+        for path in sorted(Path(directory).iterdir()):
+            if path.is_file():
+                add(path.name, lambda path=path: path.read_bytes())
+    return sources
+
+
+def download_members(api_factory, dataset_name, target_dir, host, index, max_workers=8, poll_interval=0.5):
+    """Download every member of a PDS into ``target_dir`` concurrently
+
+    Members whose ISPF statistics match the sync index and whose local
+    copy is unchanged are skipped. Yields result-table snapshots, see
+    ``run_batch``.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    get_api = per_thread(api_factory)
+    remote = list_all_members(get_api(), dataset_name)
+    manifest = index.get_members(host, dataset_name)
+    transferred = {}
+
+    def download(member, status):
+        path = os.path.join(target_dir, member)
+        stats = list(remote[member])
+        known = manifest.get(member)
+        intact = known and os.path.exists(path) and os.path.getsize(path) == known.get('size')
+        if intact and any(stats) and known.get('stats') == stats and hash_file(path) == known.get('sha256'):
+            status['result'] = 'skipped'
+            return
+
+        def track(bytes_written, records, total_bytes):
+            status['bytes'] = bytes_written
+            status['records'] = records
+
+        # Members without ISPF statistics fall back to a conditional request
+        result = with_retries(lambda: stream_download(get_api(), f"{dataset_name}({member})", path,
+                                                      progress_callback=track,
+                                                      etag=known.get('etag') if intact else None),
+                              f"Download of {dataset_name}({member})")
+        if result['not_modified']:
+            status['result'] = 'skipped'
+            return
+        transferred[member] = {'etag': result['etag'], 'stats': stats, 'size': os.path.getsize(path),
+                               'sha256': hash_file(path)}
+
+    try:
+        yield from run_batch(sorted(remote), download, max_workers, host, poll_interval)
+    finally:
+        index.put_many(host, dataset_name, transferred)
+
+
+def upload_members(api_factory, dataset_name, sources, host, index, max_workers=8, poll_interval=0.5):
+    """Upload ``sources`` (member name -> loader) as members of a PDS concurrently
+
+    Members whose content matches what was last transferred, and which
+    were not changed on the host since, are skipped. Each member is the
+    unit of resumption: confirmed members are kept in a checkpoint file,
+    so rerunning an interrupted upload skips them. Yields result-table
+    snapshots, see ``run_batch``.
+    """
+    get_api = per_thread(api_factory)
+    remote = list_all_members(get_api(), dataset_name)
+    manifest = index.get_members(host, dataset_name)
+    transferred = {}
+    finished = set()
+    checkpoint = Checkpoint('upload', host, dataset_name)
+    confirmed = (checkpoint.load() or {}).get('members', {})
+    checkpoint_lock = threading.Lock()
+    last_save = time.monotonic()
+
+    def confirm(member, sha256):
+        nonlocal last_save
+        with checkpoint_lock:
+            confirmed[member] = sha256
+            if time.monotonic() - last_save >= CHECKPOINT_INTERVAL:
+                checkpoint.save(members=dict(confirmed))
+                last_save = time.monotonic()
+
+    def upload(member, status):
+        content = sources[member]()
+        sha256 = hashlib.sha256(content).hexdigest()
+        known = manifest.get(member)
+        if (known and member in remote and known.get('sha256') == sha256
+                and known.get('stats') == list(remote[member])):
+            status['result'] = 'skipped'
+            finished.add(member)
+            return
+        if confirmed.get(member) == sha256:
+            # Uploaded by an earlier run of this upload that was interrupted
+            status['result'] = 'skipped'
+            transferred[member] = {'size': len(memoryview(content)), 'sha256': sha256}
+            finished.add(member)
+            return
+
+        def track(bytes_sent, total_bytes):
+            status['bytes'] = bytes_sent
+
+        with_retries(lambda: stream_upload(get_api(), f"{dataset_name}({member})", content, progress_callback=track),
+                     f"Upload to {dataset_name}({member})")
+        transferred[member] = {'size': len(memoryview(content)), 'sha256': sha256}
+        confirm(member, sha256)
+        finished.add(member)
+
+    try:
+        yield from run_batch(sorted(sources), upload, max_workers, host, poll_interval)
+    finally:
+        with checkpoint_lock:
+            if finished >= set(sources):
+                checkpoint.remove()
+            else:
+                checkpoint.save(members=dict(confirmed))
+        # Record the statistics the host now reports for the uploaded members
+        try:
+            current = list_all_members(get_api(), dataset_name)
+            for member, entry in transferred.items():
+                if member in current:
+                    entry['stats'] = list(current[member])
+        except Exception as e:
+            logging.warning(f"Could not refresh member statistics of {dataset_name}: {str(e)}")
+        index.put_many(host, dataset_name, transferred)
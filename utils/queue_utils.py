@@ -0,0 +1,235 @@
+import streamlit as st
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from zowe.zos_files_for_zowe_sdk import Datasets
+
+from utils.batch_utils import host_slot
+from utils.codec_utils import FIXED_FORMATS, VARIABLE_FORMATS, decode_file, decoded_path
+from utils.resume_utils import resumable_download, resumable_upload, with_retries
+from utils.transfer_utils import (describe_compression, format_bytes, get_record_format, get_transfer_config,
+                                  stream_binary_download)
+
+ACTIVE_STATES = ('queued', 'running')
+
+# Finished transfers are forgotten this long after they end
+TRANSFER_RETENTION_SECONDS = 60 * 60
+
+
+class TransferCancelled(Exception):
+    """Raised inside a transfer once the user cancelled it"""
+
+
+class TransferJob:
+    """State of one background upload or download"""
+
+    def __init__(self, owner, kind, name, target, host):
+        self.id = uuid.uuid4().hex[:8]
+        self.owner = owner
+        self.kind = kind
+        self.name = name
+        self.target = target
+        self.host = host
+        self.state = 'queued'
+        self.bytes = 0
+        self.total_bytes = None
+        self.records = 0
+        self.detail = ''
+        self.error = ''
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = threading.Event()
+        self.future = None
+
+    @property
+    def active(self):
+        return self.state in ACTIVE_STATES
+
+    def report(self, bytes_done, total_bytes=None, records=None):
+        """Record progress; raises TransferCancelled if the job was cancelled
+
+        Used as the progress callback of the streaming helpers, so a cancel
+        takes effect within one progress interval.
+        """
+        if self.cancel_requested.is_set():
+            raise TransferCancelled(f"{self.kind} of {self.name} cancelled")
+        self.bytes = bytes_done
+        if total_bytes:
+            self.total_bytes = total_bytes
+        if records is not None:
+            self.records = records
+
+    def summary(self):
+        elapsed = ((self.finished or time.time()) - self.started) if self.started else 0.0
+        if self.state == 'done':
+            progress = 1.0
+        elif self.total_bytes:
+            progress = min(self.bytes / self.total_bytes, 1.0)
+        else:
+            progress = None
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'dataset': self.name,
+            'local': self.target,
+            'state': self.state,
+            'progress': progress,
+            'transferred': format_bytes(self.bytes),
+            'MB/s': round(self.bytes / (1024 * 1024) / elapsed, 2) if elapsed > 0 else 0.0,
+            'seconds': round(elapsed, 1),
+            'result': self.error or self.detail
+        }
+
+
+class TransferManager:
+    """Background worker pool for uploads and downloads, shared by all sessions
+
+    Transfers run on a process-owned thread pool, so they continue across
+    reruns, widget interactions and browser refreshes, and a session can
+    run several at once. Jobs are keyed by the owning session; requests
+    per host stay within the same limit batch transfers use. Finished
+    transfers are kept for ``retention`` seconds.
+    """
+
+    def __init__(self, max_workers=8, retention=TRANSFER_RETENTION_SECONDS):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='transfer')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, owner, kind, name, target, host, task):
+        """Queue ``task(job)``; its return value becomes the job's result text"""
+        job = TransferJob(owner, kind, name, target, host)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job.future = self._executor.submit(self._run, job, task)
+        logging.info(f"Queued {kind} of {name} as transfer {job.id}")
+        return job
+
+    def _run(self, job, task):
+        with host_slot(job.host):
+            if job.cancel_requested.is_set():
+                job.state = 'cancelled'
+                job.finished = time.time()
+                return
+            job.state = 'running'
+            job.started = time.time()
+            try:
+                job.detail = task(job) or ''
+                job.state = 'done'
+                logging.info(f"Transfer {job.id} ({job.kind} of {job.name}) finished")
+            except TransferCancelled:
+                job.state = 'cancelled'
+                logging.info(f"Transfer {job.id} ({job.kind} of {job.name}) cancelled")
+            except Exception as e:
+                job.state = 'failed'
+                job.error = str(e)
+                logging.error(f"Transfer {job.id} ({job.kind} of {job.name}) failed: {str(e)}", exc_info=True)
+            finally:
+                job.finished = time.time()
+
+    def cancel(self, owner, job_id):
+        """Cancel a queued or running transfer of ``owner``"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.owner != owner or not job.active:
+            return False
+        job.cancel_requested.set()
+        if job.future.cancel():
+            job.state = 'cancelled'
+            job.finished = time.time()
+        return True
+
+    def jobs_for(self, owner):
+        """Transfers of a session, newest first"""
+        with self._lock:
+            self._prune()
+            jobs = [job for job in self._jobs.values() if job.owner == owner]
+        return sorted(jobs, key=lambda job: job.submitted, reverse=True)
+
+    def clear_finished(self, owner):
+        """Forget the finished transfers of a session"""
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job.owner == owner and not job.active]:
+                del self._jobs[job_id]
+
+    def release(self, owner):
+        """Cancel and forget every transfer of a session, e.g. when it logs out"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.owner == owner]
+            for job in jobs:
+                del self._jobs[job.id]
+        for job in jobs:
+            if job.active:
+                job.cancel_requested.set()
+                job.future.cancel()
+
+    def _prune(self):
+        """Drop transfers that finished more than ``retention`` seconds ago; called with the lock held"""
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if not job.active and job.finished and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+
+def download_task(connection, dataset_name, output_path, host, binary=False, code_page='IBM-1047', cache=None):
+    """Build a transfer task downloading a dataset like the download page does"""
+    def run(job):
+        datasets_api = connection.api(Datasets)
+        if binary:
+            recfm, lrecl = get_record_format(datasets_api, dataset_name)
+            result = with_retries(lambda: stream_binary_download(
+                datasets_api, dataset_name, output_path,
+                data_type='record' if recfm in VARIABLE_FORMATS else 'binary',
+                progress_callback=job.report
+            ), f"Download of {dataset_name}")
+            if recfm not in FIXED_FORMATS + VARIABLE_FORMATS:
+                return _with_compression(f"raw RECFM={recfm} content, not decoded", result)
+            decoded = decode_file(output_path, decoded_path(output_path, code_page), recfm, lrecl, code_page)
+            job.records = decoded['records']
+            return _with_compression(f"{decoded['records']:,} records decoded to "
+                                     f"{decoded_path(output_path, code_page)}", result)
+
+        def track(bytes_written, records, total_bytes):
+            job.report(bytes_written, total_bytes, records)
+
+        if cache is not None:
+            result = with_retries(lambda: cache.fetch(datasets_api, host, dataset_name, output_path,
+                                                      progress_callback=track),
+                                  f"Download of {dataset_name}")
+        else:
+            result = resumable_download(datasets_api, host, dataset_name, output_path, progress_callback=track)
+        job.bytes = result['bytes']
+        if result.get('cache_hit'):
+            return "served from cache"
+        if result.get('resumed_from'):
+            return _with_compression(f"{result['records']:,} records, resumed at record "
+                                     f"{result['resumed_from']:,}", result)
+        return _with_compression(f"{result['records']:,} records", result)
+    return run
+
+
+def upload_task(connection, dataset_name, payload, data_type=None, compress=False):
+    """Build a transfer task streaming ``payload`` to a dataset"""
+    def run(job):
+        result = resumable_upload(connection.api(Datasets), dataset_name, payload,
+                                  progress_callback=job.report, data_type=data_type, compress=compress)
+        return _with_compression(f"{result['mb_per_second']:.2f} MB/s", result)
+    return run
+
+
+def _with_compression(detail, result):
+    compression = describe_compression(result)
+    return f"{detail}; {compression}" if compression else detail
+
+
+@st.cache_resource
+def get_transfer_manager():
+    """Get the process-wide background transfer manager"""
+    return TransferManager(max_workers=get_transfer_config()["max_workers"])
@@ -0,0 +1,200 @@
+import codecs
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from pathlib import Path
+
+import requests
+
+from utils.transfer_utils import (DEFAULT_CHUNK_SIZE, PROGRESS_INTERVAL, DecodedBody, compression_stats, error_status,
+                                  open_content, stream_upload)
+
+CHECKPOINT_DIR = Path('.transfers')
+
+# Record count of the ranged GET that resumes a download: everything after the committed record
+REMAINING_RECORDS = 2 ** 31 - 1
+
+# Retry policy for transient failures: full-jitter exponential backoff
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Minimum seconds between two checkpoint writes
+CHECKPOINT_INTERVAL = 2.0
+
+
+def is_transient(error):
+    """Whether a failed request is worth retrying"""
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)):
+        return True
+    return error_status(error) in RETRYABLE_STATUS
+
+
+def with_retries(operation, description, max_attempts=MAX_ATTEMPTS, base_delay=BACKOFF_BASE_SECONDS,
+                 max_delay=BACKOFF_MAX_SECONDS):
+    """Call ``operation()``, retrying transient failures with jittered backoff
+
+    Non-transient errors, and the last transient one, are raised.
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return operation()
+        except Exception as e:
+            if attempt == max_attempts or not is_transient(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+            logging.warning(f"{description} failed: {str(e)}; retry {attempt} of {max_attempts - 1} "
+                            f"in {delay:.1f}s")
+            time.sleep(delay)
+
+
+class Checkpoint:
+    """Progress of one transfer, persisted as a small JSON file
+
+    The file is replaced atomically on every save, so a crash leaves either
+    the previous or the new state, never a torn one.
+    """
+
+    def __init__(self, kind, host, dataset_name, local_path='', directory=CHECKPOINT_DIR):
+        local_path = os.path.abspath(local_path) if local_path else ''
+        key = hashlib.sha256(f"{kind}\0{host}\0{dataset_name}\0{local_path}".encode()).hexdigest()[:16]
+        self.path = Path(directory) / f"{kind}_{key}.json"
+        self._identity = {'kind': kind, 'host': host, 'dataset': dataset_name, 'local': local_path}
+
+    def load(self):
+        """Return the saved state, or None"""
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, **state):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix('.tmp')
+        with open(temporary, 'w') as f:
+            json.dump({**self._identity, **state, 'updated': time.time()}, f)
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def resumable_download(datasets_api, host, dataset_name, output_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                       progress_callback=None, checkpoint_dir=CHECKPOINT_DIR):
+    """Download a dataset as text in one streamed GET that survives failures
+
+    Only whole records are committed to ``output_path``, and the
+    committed record and byte offsets are kept in a checkpoint file. The
+    dataset is fetched in a single GET; only when that breaks, or a later
+    call for the same dataset and path continues an interrupted one, is
+    the rest requested with X-IBM-Record-Range from the last committed
+    record. The dataset's ETag is kept in the checkpoint too; when the
+    resumed range comes with another one, the dataset changed on the host
+    and the download starts over from its first record. The file written is byte for byte what ``stream_download`` writes.
+
+    ``progress_callback`` is called like for ``stream_download``. Returns a
+    dict with the byte and record counts, elapsed seconds, the record the
+    download resumed from and the compression stats.
+    """
+    start = time.monotonic()
+    checkpoint = Checkpoint('download', host, dataset_name, output_path, checkpoint_dir)
+    state = checkpoint.load()
+    committed = {'records': 0, 'bytes': 0, 'etag': None}
+    if state and os.path.exists(output_path) and os.path.getsize(output_path) >= state['bytes']:
+        committed = {'records': state['records'], 'bytes': state['bytes'], 'etag': state.get('etag')}
+        logging.info(f"Resuming download of {dataset_name} at record {committed['records']}")
+    resumed_from = committed['records']
+    transferred = {'wire_bytes': 0, 'body_bytes': 0}
+    content_encoding = 'identity'
+
+    with open(output_path, 'r+b' if resumed_from else 'wb') as f:
+        last_report = 0.0
+        last_save = time.monotonic()
+
+        def commit(text, records):
+            nonlocal last_report, last_save
+            data = text.encode('utf-8')
+            f.write(data)
+            committed['bytes'] += len(data)
+            committed['records'] += records
+            now = time.monotonic()
+            if now - last_save >= CHECKPOINT_INTERVAL:
+                f.flush()
+                checkpoint.save(**committed)
+                last_save = now
+            if progress_callback and now - last_report >= PROGRESS_INTERVAL:
+                progress_callback(committed['bytes'], committed['records'], None)
+                last_report = now
+
+        def fetch_rest():
+            """Fetch the dataset from the last committed record to its end"""
+            nonlocal content_encoding, resumed_from
+            f.seek(committed['bytes'])
+            f.truncate()
+            record_range = (committed['records'], REMAINING_RECORDS) if committed['records'] else None
+            response = open_content(datasets_api, dataset_name, record_range=record_range)
+            etag = response.headers.get('ETag')
+            if record_range and etag != committed['etag']:
+                # The committed records are of an older version of the dataset
+                response.close()
+                logging.warning(f"{dataset_name} changed since record {committed['records']} was read, "
+                                f"downloading it again from the start")
+                committed.update(records=0, bytes=0)
+                resumed_from = 0
+                f.seek(0)
+                f.truncate()
+                response = open_content(datasets_api, dataset_name)
+                etag = response.headers.get('ETag')
+            committed['etag'] = etag
+            body = DecodedBody(response, chunk_size)
+            try:
+                decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+                pending = ''
+                for chunk in body:
+                    text = pending + decoder.decode(chunk)
+                    cut = text.rfind('\n') + 1
+                    if cut:
+                        commit(text[:cut], text.count('\n', 0, cut))
+                    pending = text[cut:]
+                pending += decoder.decode(b'', final=True)
+                if pending:
+                    # The response is complete, so this is a whole last record without its newline
+                    commit(pending, 1)
+            finally:
+                response.close()
+                # Count every attempt, the bytes of a failed one crossed the wire too
+                transferred['wire_bytes'] += body.wire_bytes
+                transferred['body_bytes'] += body.body_bytes
+                content_encoding = body.content_encoding
+
+        with_retries(fetch_rest, f"Download of {dataset_name}")
+
+    checkpoint.remove()
+    if progress_callback:
+        progress_callback(committed['bytes'], committed['records'], None)
+    elapsed = time.monotonic() - start
+    logging.info(f"Downloaded {dataset_name} to {output_path}: {committed['bytes']} bytes, "
+                 f"{committed['records']} records in {elapsed:.2f}s (resumed from record {resumed_from})")
+    return {'bytes': committed['bytes'], 'records': committed['records'], 'seconds': elapsed,
+            'resumed_from': resumed_from, 'content_encoding': content_encoding,
+            **compression_stats(transferred['body_bytes'], transferred['wire_bytes'], elapsed)}
+
+
+def resumable_upload(datasets_api, dataset_name, buffer, progress_callback=None, data_type=None, compress=False):
+    """Stream a buffer to a dataset, retrying transient failures
+
+    z/OSMF cannot append to a dataset, so the dataset is the unit of a
+    retry: each attempt rewrites it from the start.
+    """
+    return with_retries(lambda: stream_upload(datasets_api, dataset_name, buffer,
+                                              progress_callback=progress_callback, data_type=data_type,
+                                              compress=compress),
+                        f"Upload to {dataset_name}")
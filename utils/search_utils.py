@@ -0,0 +1,318 @@
+import streamlit as st
+import logging
+import re
+import threading
+import time
+
+from utils.batch_utils import host_slot, per_thread, run_batch
+from utils.catalog_utils import iter_dataset_pages
+from utils.job_utils import POLL_INITIAL_SECONDS, POLL_MAX_SECONDS, SPOOL_RECORD_BATCH, read_spool_records
+from utils.pds_utils import iter_member_pages
+from utils.resume_utils import with_retries
+
+# Matches reported per member (or sequential dataset) before moving on
+MAX_HITS_PER_MEMBER = 100
+
+# Record count of the range a search continues in; the range only sets where the search starts
+SEARCH_RANGE_RECORDS = 99999999
+
+# Records asked for from each match, the matches among them are found locally
+SEARCH_BLOCK_RECORDS = 1000
+
+# SRCHFOR statements are 80-byte cards
+MAX_SEARCH_LENGTH = 60
+
+DEFAULT_JOB_CARD = "//{jobname} JOB ,'ZOWE SEARCH',CLASS=A,MSGCLASS=X"
+
+# Hosts known to honor (True) or ignore (False) the search query parameter
+_server_search = {}
+_server_search_lock = threading.Lock()
+
+# Record range in a response header, 'first,count' or 'first-last'
+_RECORD_RANGE = re.compile(r'(\d+)\s*([,-])\s*(\d+)')
+
+# SuperC listing: a member header, and a hit line (line number and record)
+_SUPERC_MEMBER = re.compile(r'^\s*([A-Z#@$][A-Z0-9#@$]{0,7})\s+-+\s*STRING\(S\) FOUND')
+_SUPERC_HIT = re.compile(r'^\s*(\d+)\s(.*)$')
+
+
+class SearchUnsupported(Exception):
+    """z/OSMF ignored the search parameter and sent content instead of matches"""
+
+
+def get_search_config():
+    """Get search settings from secrets"""
+    try:
+        return {
+            "job_card": st.secrets["search"].get("job_card", DEFAULT_JOB_CARD),
+            "job_timeout_minutes": st.secrets["search"].get("job_timeout_minutes", 10)
+        }
+    except Exception as e:
+        logging.warning(f"Failed to load search config from secrets: {e}")
+        return {
+            "job_card": DEFAULT_JOB_CARD,
+            "job_timeout_minutes": 10
+        }
+
+
+def _record_matcher(text, regex, case_sensitive):
+    """Local test of a record against the search, for the records following a match in a block"""
+    if regex:
+        pattern = re.compile(text, 0 if case_sensitive else re.IGNORECASE)
+        return lambda record: pattern.search(record) is not None
+    if case_sensitive:
+        return lambda record: text in record
+    folded = text.casefold()
+    return lambda record: folded in record.casefold()
+
+
+def _search_block(datasets_api, dataset_name, text, regex, case_sensitive, start, block_records):
+    """One search request from record ``start``: ``(first record, records)``, or None past the last match"""
+    custom_args = datasets_api._create_custom_request_arguments()
+    custom_args["url"] = "{}ds/{}".format(datasets_api._request_endpoint,
+                                         datasets_api._encode_uri_component(dataset_name))
+    custom_args["params"] = {"research" if regex else "search": text,
+                             "insensitive": "false" if case_sensitive else "true",
+                             "maxreturnsize": str(block_records)}
+    if start:
+        custom_args["headers"]["X-IBM-Record-Range"] = f"{start},{SEARCH_RANGE_RECORDS}"
+    response = datasets_api.request_handler.perform_request("GET", custom_args, expected_code=[200, 204],
+                                                            stream=True)
+    try:
+        chunks = response.iter_content(64 * 1024)
+        body = next(chunks, b'')
+        if not body:
+            return None
+        record_range = _RECORD_RANGE.match(response.headers.get('X-IBM-Record-Range', ''))
+        if record_range is None:
+            # An older z/OSMF sends the whole dataset, so stop after its first block
+            raise SearchUnsupported("z/OSMF answered without a record range, dataset search is not supported")
+        body += b''.join(chunks)
+    finally:
+        response.close()
+    first, separator, last = record_range.groups()
+    count = int(last) if separator == ',' else int(last) - int(first) + 1
+    records = body.decode('utf-8', errors='replace').split('\n')[:count]
+    return int(first), [record.rstrip('\r') for record in records]
+
+
+def search_content(datasets_api, dataset_name, text, regex=False, case_sensitive=False,
+                   max_hits=MAX_HITS_PER_MEMBER, block_records=SEARCH_BLOCK_RECORDS):
+    """Find the records of a dataset or member matching ``text`` on z/OSMF
+
+    z/OSMF (``search``, or ``research`` for a regular expression) answers
+    with the first matching record and up to ``block_records`` records
+    after it; the matches among those are picked out here, and the next
+    request continues after the block. Hits close together thus cost one
+    request, and records before a match never cross the wire.
+
+    A generator yielding ``(line number, record)`` as each block arrives;
+    raises SearchUnsupported when the server sends content without a
+    record range, i.e. it does not know the search parameters.
+    """
+    matches = _record_matcher(text, regex, case_sensitive)
+    start = 0
+    hits = 0
+    while hits < max_hits:
+        block = with_retries(
+            lambda: _search_block(datasets_api, dataset_name, text, regex, case_sensitive, start, block_records),
+            f"Search of {dataset_name}")
+        if block is None:
+            return
+        first, records = block
+        for offset, record in enumerate(records):
+            # The block starts with the match z/OSMF found
+            if offset == 0 or matches(record):
+                yield first + offset + 1, record
+                hits += 1
+                if hits == max_hits:
+                    return
+        if len(records) < block_records:
+            # The block ran to the end of the data
+            return
+        start = first + len(records)
+
+
+def superc_jcl(job_card, jobname, dataset_name, text, case_sensitive=False):
+    """JCL running a SuperC (ISRSUPC) search of one dataset or PDS for ``text``"""
+    # Apostrophes are doubled inside the quoted string, so they count twice against the limit
+    quoted = text.replace("'", "''")
+    if len(quoted) > MAX_SEARCH_LENGTH or '\n' in text:
+        raise ValueError(f"Search strings for a batch search must be one line of at most "
+                         f"{MAX_SEARCH_LENGTH} characters, counting apostrophes twice")
+    options = 'SRCHCMP' if case_sensitive else 'SRCHCMP,ANYC'
+    return '\n'.join([
+        job_card.format(jobname=jobname),
+        f"//SEARCH   EXEC PGM=ISRSUPC,PARM=('{options}')",
+        f"//NEWDD    DD DISP=SHR,DSN={dataset_name}",
+        "//OUTDD    DD SYSOUT=*",
+        "//SYSIN    DD *",
+        f"  SRCHFOR '{quoted}'",
+        "/*",
+        ""
+    ])
+
+
+def parse_superc_listing(listing, dataset_name):
+    """Hits of a SuperC search listing as (dataset, member, line number, record)
+
+    Members of a PDS are introduced by a 'STRING(S) FOUND' header; a
+    sequential dataset lists its hits directly. Records start in the
+    column of 'SOURCE' in the 'LINE-#' heading, so their leading blanks
+    are kept. The summary section at the end is ignored.
+    """
+    hits = []
+    member = ''
+    source_column = 0
+    for line in listing.splitlines():
+        # Skip the ASA carriage control column of the SYSOUT records
+        if line[:1] in (' ', '0', '1', '-', '+'):
+            line = line[1:]
+        if 'SUMMARY SECTION' in line:
+            break
+        if 'LINE-#' in line:
+            source_column = max(line.find('SOURCE'), 0)
+            continue
+        if 'ISRSUPC' in line:
+            continue
+        header = _SUPERC_MEMBER.match(line)
+        if header:
+            member = header.group(1)
+            continue
+        hit = _SUPERC_HIT.match(line)
+        if hit:
+            record = line[source_column:] if source_column > hit.end(1) else hit.group(2)
+            hits.append((dataset_name, member, int(hit.group(1)), record.rstrip()))
+    return hits
+
+
+def search_with_job(jobs_api, host, dataset_name, text, jobname, case_sensitive=False, job_card=DEFAULT_JOB_CARD,
+                    timeout=600):
+    """Search a dataset or PDS with a submitted SuperC job and return its hits
+
+    The job is polled with the job monitor's backoff, then only its
+    OUTDD listing is read from the spool. A ``host_slot`` is held for the
+    submit and the spool reads only, not while the job runs.
+    """
+    with host_slot(host):
+        response = jobs_api.submit_plaintext(superc_jcl(job_card, jobname, dataset_name, text, case_sensitive))
+    logging.info(f"Submitted search job {response.jobname}({response.jobid}) for {dataset_name}")
+    deadline = time.monotonic() + timeout
+    interval = POLL_INITIAL_SECONDS
+    status = response
+    while status.status != 'OUTPUT':
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Search job {response.jobname}({response.jobid}) did not finish in {timeout}s")
+        time.sleep(interval)
+        interval = min(interval * 2, POLL_MAX_SECONDS)
+        status = jobs_api.get_job_status(response.jobname, response.jobid)
+    retcode = status.retcode or ''
+    # SuperC ends with CC 0001 when it found the string and CC 0000 when it did not
+    if retcode not in ('CC 0000', 'CC 0001'):
+        raise RuntimeError(f"Search job {response.jobname}({response.jobid}) ended with {retcode}")
+
+    listing = []
+    with host_slot(host):
+        for item in jobs_api.get_spool_files(response.job_correlator):
+            if item.ddname != 'OUTDD':
+                continue
+            start = 0
+            while start < (item.record_count or 0):
+                records = read_spool_records(jobs_api, response.job_correlator, item.id, start)
+                if not records:
+                    break
+                listing.append(records)
+                start += SPOOL_RECORD_BATCH
+    return parse_superc_listing(''.join(listing), dataset_name)
+
+
+def search_targets(datasets_api, entries):
+    """Expand names and DSN patterns into PDS members ('DSN(MEMBER)') and sequential datasets"""
+    targets = []
+    for entry in entries:
+        entry = entry.strip().upper()
+        if not entry:
+            continue
+        if entry.endswith(')'):
+            targets.append(entry)
+            continue
+        # A plain name is a pattern matching itself, and the listing tells PDSs from sequential datasets
+        for page in iter_dataset_pages(datasets_api, entry):
+            for item in page:
+                if str(item.get('dsorg', '')).startswith('PO'):
+                    targets.extend(f"{item['dsname']}({member.member})"
+                                   for members in iter_member_pages(datasets_api, item['dsname'])
+                                   for member in members)
+                else:
+                    targets.append(item['dsname'])
+    return list(dict.fromkeys(targets))
+
+
+def server_search_supported(datasets_api, host, dataset_name, text):
+    """Whether z/OSMF on ``host`` runs dataset searches, probed once per process"""
+    with _server_search_lock:
+        supported = _server_search.get(host)
+    if supported is None:
+        try:
+            next(search_content(datasets_api, dataset_name, text, max_hits=1, block_records=1), None)
+            supported = True
+        except SearchUnsupported:
+            supported = False
+        logging.info(f"z/OSMF dataset search on {host}: {'available' if supported else 'unavailable'}")
+        with _server_search_lock:
+            _server_search[host] = supported
+    return supported
+
+
+def search_datasets(datasets_factory, jobs_factory, targets, text, host, jobname, regex=False,
+                    case_sensitive=False, max_workers=8, poll_interval=0.5,
+                    job_card=DEFAULT_JOB_CARD, job_timeout=600):
+    """Search the datasets and members from ``search_targets`` for ``text`` on the mainframe
+
+    Members are searched concurrently through z/OSMF where it supports
+    dataset search; otherwise each dataset is searched by a SuperC batch
+    job. This is a generator yielding ``(rows, hits)`` every
+    ``poll_interval`` seconds, the batch rows of ``run_batch`` and the
+    hits so far as dicts, so matches show up while the search runs.
+    """
+    get_datasets_api = per_thread(datasets_factory)
+    hits = []
+    lock = threading.Lock()
+
+    def add_hit(dataset_name, member, line, record, status):
+        with lock:
+            hits.append({'dataset': dataset_name, 'member': member, 'line': line, 'record': record})
+            status['records'] += 1
+
+    server_search = server_search_supported(get_datasets_api(), host, targets[0], text)
+    if server_search:
+        def search(target, status):
+            dataset_name, _, member = target.rstrip(')').partition('(')
+            for line, record in search_content(get_datasets_api(), target, text, regex, case_sensitive):
+                add_hit(dataset_name, member, line, record, status)
+    else:
+        if regex:
+            raise ValueError("Regular expressions need z/OSMF dataset search, this system only offers batch search")
+        get_jobs_api = per_thread(jobs_factory)
+        # One job per dataset, not per member; a job searches the whole PDS, so keep the requested members
+        members = {}
+        for target in targets:
+            dataset_name, _, member = target.rstrip(')').partition('(')
+            if member and members.get(dataset_name, set()) is not None:
+                members.setdefault(dataset_name, set()).add(member)
+            else:
+                # The dataset itself was asked for, every hit in it counts
+                members[dataset_name] = None
+        targets = list(members)
+
+        def search(dataset_name, status):
+            wanted = members[dataset_name]
+            for _, member, line, record in search_with_job(get_jobs_api(), host, dataset_name, text, jobname,
+                                                            case_sensitive, job_card, job_timeout):
+                if wanted is None or member in wanted:
+                    add_hit(dataset_name, member, line, record, status)
+
+    # A batch search job takes the host slot only around its own requests
+    for rows in run_batch(targets, search, max_workers, host, poll_interval, hold_slot=server_search):
+        with lock:
+            yield rows, list(hits)
@@ -1,48 +1,99 @@
-from cryptography.fernet import Fernet
-import base64
+from cryptography.fernet import Fernet, MultiFernet
 import os
+import re
+import threading
 from pathlib import Path
 import logging
 from datetime import datetime, timedelta
+from utils.metrics_utils import LOCAL_HOST, get_metrics
+
+# Profile fields stored encrypted, under '<field>_encrypted'
+SENSITIVE_FIELDS = ('password', 'user', 'certFile')
+
+KEY_FILE = Path('.keys/encryption.key')
 
 class CredentialManager:
-    def __init__(self):
-        self.key_file = Path('.keys/encryption.key')
-        self.key = self._load_or_create_key()
+    """Fernet encryption with one or more keys, safe to share between threads
+
+    ZOWE_ENCRYPTION_KEY or the key file may hold several keys, newest
+    first, separated by commas or newlines: data is encrypted with the
+    first and decrypted with any of them (MultiFernet), so a key can be
+    rotated without losing what the older ones encrypted. Use
+    ``get_credential_manager()`` rather than creating one per login.
+    """
+
+    def __init__(self, key_file=KEY_FILE):
+        self.key_file = Path(key_file)
+        self._lock = threading.Lock()
+        self.keys = self._load_or_create_keys()
+        self.key = self.keys[0]
         self.fernet = None
         self._initialize_fernet()
         
     def _initialize_fernet(self):
-        """Initialize Fernet with error handling"""
+        """Initialize MultiFernet with error handling"""
         try:
-            self.fernet = Fernet(self.key)
+            self.fernet = MultiFernet([Fernet(key) for key in self.keys])
         except Exception as e:
             logging.error(f"Failed to initialize encryption: {str(e)}")
             raise ValueError("Encryption initialization failed")
     
-    def _load_or_create_key(self):
-        """Load existing key or create new one with proper permissions"""
+    @staticmethod
+    def _parse_keys(text):
+        return [key.encode() for key in re.split(r'[,\s]+', text.strip()) if key]
+    
+    def _write_keys(self, keys):
+        """Write the keys to the key file with restricted permissions, replacing it atomically"""
+        self.key_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.key_file.with_name(f".{self.key_file.name}.{os.getpid()}.tmp")
+        with open(os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+            f.write(b'\n'.join(keys) + b'\n')
+        os.replace(temp_file, self.key_file)
+    
+    def _load_or_create_keys(self):
+        """Load the shared keys from the environment, or the local key file, creating it if needed
+
+        Replicas sharing a session store must all set ZOWE_ENCRYPTION_KEY
+        to the same Fernet keys, or they cannot read each other's sessions.
+        """
         try:
+            shared_keys = self._parse_keys(os.getenv('ZOWE_ENCRYPTION_KEY', ''))
+            if shared_keys:
+                return shared_keys
+            
             if not self.key_file.exists():
-                self.key_file.parent.mkdir(parents=True, exist_ok=True)
                 key = Fernet.generate_key()
-                
-                # Save key with restricted permissions
-                with open(self.key_file, 'wb') as f:
-                    f.write(key)
-                
-                # Set file permissions (0600)
-                os.chmod(self.key_file, 0o600)
-                
-                return key
+                self._write_keys([key])
+                return [key]
             
-            # Load existing key
-            with open(self.key_file, 'rb') as f:
-                return f.read()
+            # Load existing keys
+            keys = self._parse_keys(self.key_file.read_text())
+            if not keys:
+                raise ValueError(f"No key in {self.key_file}")
+            return keys
         except Exception as e:
             logging.error(f"Key management failed: {str(e)}")
             raise ValueError("Failed to manage encryption key")
     
+    def rotate(self, new_key=None):
+        """Make a new key the one data is encrypted with, keeping the older ones for decryption
+
+        Only keys from the key file can be rotated here; with
+        ZOWE_ENCRYPTION_KEY, put the new key in front of the old ones on
+        every replica. Returns the new key.
+        """
+        if os.getenv('ZOWE_ENCRYPTION_KEY'):
+            raise ValueError("Keys come from ZOWE_ENCRYPTION_KEY, add the new key in front there")
+        with self._lock:
+            key = new_key or Fernet.generate_key()
+            keys = [key] + [k for k in self.keys if k != key]
+            self._write_keys(keys)
+            self.keys = keys
+            self.key = key
+            self._initialize_fernet()
+        logging.info(f"Encryption key rotated, {len(keys) - 1} older keys kept for decryption")
+        return key
+    
     def encrypt(self, data: str) -> str:
         """Encrypt string data"""
         return self.fernet.encrypt(data.encode()).decode()
@@ -54,75 +105,114 @@ class CredentialManager:
         except Exception as e:
             logging.error(f"Decryption failed: {str(e)}")
             return None
+    
+    def reencrypt(self, encrypted_data: str) -> str:
+        """Encrypt data again with the newest key, e.g. after ``rotate``"""
+        return self.fernet.rotate(encrypted_data.encode()).decode()
+
+_credential_manager = None
+_credential_manager_lock = threading.Lock()
+
+def get_credential_manager():
+    """Get the process-wide credential manager, loading the keys on first use"""
+    global _credential_manager
+    with _credential_manager_lock:
+        if _credential_manager is None:
+            _credential_manager = CredentialManager()
+        return _credential_manager
 
 class SecureProfileManager:
     def __init__(self, profile_manager):
         if not profile_manager:
             raise ValueError("Profile manager cannot be None")
         self.profile_manager = profile_manager
-        self.credential_manager = CredentialManager()
+        self.credential_manager = get_credential_manager()
         self.creation_time = datetime.now()
         self.expiry_duration = timedelta(hours=1)
+        # Config layer of each profile; looking one up re-reads every config file and drops unsaved changes
+        self._profile_layers = {}
+        # Encrypted properties set by this session, by JSON path, with the config layer holding them
+        self._stored = {}
     
     def is_expired(self):
         """Check if the session has expired"""
         return datetime.now() - self.creation_time > self.expiry_duration
     
+    def _layer(self, json_path):
+        """The config layer of a path, looked up once per profile"""
+        profile_path = json_path.rsplit('.', 1)[0]
+        if profile_path not in self._profile_layers:
+            self._profile_layers[profile_path] = self.profile_manager.get_highest_priority_layer(json_path)
+        return self._profile_layers[profile_path]
+    
     def secure_property(self, json_path: str, value: str):
         """Securely store sensitive property using proper JSON path"""
-        sensitive_fields = ['password', 'user', 'certFile']
-        
-        # Check if this is a sensitive field that needs encryption
+        layer = self._layer(json_path)
         field_name = json_path.split('.')[-1]
-        if field_name in sensitive_fields:
-            encrypted_value = self.credential_manager.encrypt(value)
+        if field_name in SENSITIVE_FIELDS:
             # Store encrypted value with a marker
-            self.profile_manager.set_property(f"{json_path}_encrypted", encrypted_value)
+            layer.set_property(f"{json_path}_encrypted", self.credential_manager.encrypt(value))
+            self._stored[f"{json_path}_encrypted"] = layer
         else:
             # Store non-sensitive values directly
-            self.profile_manager.set_property(json_path, value)
+            layer.set_property(json_path, value)
     
     def get_property(self, json_path: str) -> str:
         """Retrieve property using JSON path, decrypting if necessary"""
-        sensitive_fields = ['password', 'user', 'certFile']
+        layer = self._layer(json_path)
+        profile = layer.find_profile(layer.get_profile_name_from_path(json_path), layer.profiles or {}) or {}
+        properties = profile.get("properties", {})
         field_name = json_path.split('.')[-1]
-        
-        if field_name in sensitive_fields:
-            # Try to get encrypted value
-            encrypted_value = self.profile_manager.get_property(f"{json_path}_encrypted")
-            if encrypted_value:
-                return self.credential_manager.decrypt(encrypted_value)
-        
-        # Get regular property
-        return self.profile_manager.get_property(json_path)
+        if field_name in SENSITIVE_FIELDS and properties.get(f"{field_name}_encrypted"):
+            return self.credential_manager.decrypt(properties[f"{field_name}_encrypted"])
+        return properties.get(field_name)
+    
+    @classmethod
+    def _clear_sensitive(cls, profiles):
+        """Clear the sensitive properties, plain or encrypted, of nested profiles; True if any was set"""
+        cleared = False
+        for profile in (profiles or {}).values():
+            if not isinstance(profile, dict):
+                continue
+            properties = profile.get("properties") or {}
+            for field_name in SENSITIVE_FIELDS:
+                for name in (field_name, f"{field_name}_encrypted"):
+                    if properties.get(name) is not None:
+                        properties[name] = None
+                        cleared = True
+            cleared = cls._clear_sensitive(profile.get("profiles")) or cleared
+        return cleared
     
     def cleanup(self):
-        """Securely cleanup sensitive data"""
+        """Securely cleanup sensitive data
+
+        Clears the passwords, users and certificate files, plain or
+        encrypted, of every profile in the config file profiles are
+        written to, and of any other file this session stored into. Only
+        files that held such a value are saved, so a logout with nothing
+        to clear writes no file.
+        """
         try:
             if not self.profile_manager:
                 return
             
-            # Get all profiles
-            profiles = self.profile_manager.config_appname
-            
-            # Clear sensitive properties from all profiles
-            sensitive_paths = [
-                "profiles.*.properties.password",
-                "profiles.*.properties.user",
-                "profiles.*.properties.certFile"
-            ]
-            
-            for path in sensitive_paths:
-                self.profile_manager.set_property(path, None)
-                self.profile_manager.set_property(f"{path}_encrypted", None)
+            # The layer persist_profile writes new profiles to
+            layers = [self.profile_manager.get_highest_priority_layer("profiles")]
+            layers.extend(layer for layer in self._stored.values() if layer not in layers)
+            cleared = [layer for layer in layers if self._clear_sensitive(layer.profiles)]
             
-            # Save cleared profile
-            self.profile_manager.save()
+            # Save cleared profiles
+            if cleared:
+                with get_metrics().timed(LOCAL_HOST, "profile.save"):
+                    for layer in cleared:
+                        layer.save()
             
             # Clear from memory
+            self._stored.clear()
+            self._profile_layers.clear()
             self.profile_manager = None
             logging.info("Profile cleaned up successfully")
             
         except Exception as e:
             logging.error(f"Cleanup failed: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import logging
+import socket
+import sqlite3
+import ssl
+import threading
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+SQLITE_PATH = Path('.sessions/sessions.db')
+
+KEY_PREFIX = 'zowe:session:'
+
+# Seconds a replica reuses a session it already looked up before asking the backend again
+LOCAL_TTL = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires REAL NOT NULL
+)
+"""
+
+
+class MemorySessionBackend:
+    """Sessions in this process only; for a single replica"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            now = time.time()
+            for expired in [k for k, (_, expires) in self._entries.items() if expires <= now]:
+                del self._entries[expired]
+            self._entries[key] = (value, now + ttl)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                return None
+            return entry[0]
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class SQLiteSessionBackend:
+    """Sessions in a SQLite file, shared by replicas on one host or a shared volume"""
+
+    def __init__(self, path=SQLITE_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=10)
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM sessions WHERE expires <= ?", (now,))
+            self._db.execute("INSERT OR REPLACE INTO sessions (key, value, expires) VALUES (?, ?, ?)",
+                             (key, value, now + ttl))
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM sessions WHERE key = ? AND expires > ?",
+                                   (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def delete(self, key):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM sessions WHERE key = ?", (key,))
+
+
+class RedisSessionBackend:
+    """Sessions in any server speaking the Redis protocol (Redis, Valkey, KeyDB, ...)
+
+    Only SET with expiry, GET and DEL are needed, so this talks RESP over
+    one socket per thread instead of depending on a client library.
+    ``url`` is ``redis://[:password@]host[:port][/db]``, or ``rediss://``
+    for TLS.
+    """
+
+    def __init__(self, url, timeout=5.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ('redis', 'rediss'):
+            raise ValueError(f"Unsupported session store URL {url}")
+        self._address = (parts.hostname or 'localhost', parts.port or 6379)
+        self._tls = parts.scheme == 'rediss'
+        self._username = unquote(parts.username) if parts.username else None
+        self._password = unquote(parts.password) if parts.password else None
+        self._db = int(parts.path.strip('/') or 0)
+        self._timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        self._close()
+        sock = socket.create_connection(self._address, timeout=self._timeout)
+        if self._tls:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self._address[0])
+        self._local.sock = sock
+        self._local.reader = sock.makefile('rb')
+        try:
+            if self._password:
+                self._send(*(['AUTH', self._username] if self._username else ['AUTH']), self._password)
+            if self._db:
+                self._send('SELECT', self._db)
+        except Exception:
+            # Never keep a connection that is not logged in or on the wrong database
+            self._close()
+            raise
+
+    def _close(self):
+        """Close this thread's connection, if it has one"""
+        sock = getattr(self._local, 'sock', None)
+        if sock is None:
+            return
+        self._local.sock = None
+        # The reader holds its own reference to the socket, so it is closed too
+        for resource in (self._local.reader, sock):
+            try:
+                resource.close()
+            except OSError:
+                pass
+
+    def _send(self, *args):
+        encoded = [str(arg).encode() if not isinstance(arg, bytes) else arg for arg in args]
+        request = b''.join([b'*%d\r\n' % len(encoded)] + [b'$%d\r\n%s\r\n' % (len(arg), arg) for arg in encoded])
+        self._local.sock.sendall(request)
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Session store closed the connection")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise RuntimeError(f"Session store error: {payload.decode()}")
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)[:-2]
+            return data.decode()
+        raise RuntimeError(f"Unexpected session store reply {line!r}")
+
+    def _command(self, *args):
+        """Send a command, reconnecting once if the socket went stale"""
+        for attempt in range(2):
+            try:
+                if getattr(self._local, 'sock', None) is None:
+                    self._connect()
+                return self._send(*args)
+            except (OSError, ConnectionError):
+                self._close()
+                if attempt:
+                    raise
+
+    def set(self, key, value, ttl):
+        self._command('SET', key, value, 'PX', max(1, int(ttl * 1000)))
+
+    def get(self, key):
+        return self._command('GET', key)
+
+    def delete(self, key):
+        self._command('DEL', key)
+
+
+class SessionStore:
+    """Encrypted login sessions, shared by every replica using the same backend
+
+    A session is a small JSON record (connection properties and z/OSMF
+    token) encrypted with the credential key, so the backend never holds
+    a usable token; replicas must share ``ZOWE_ENCRYPTION_KEY`` to read
+    each other's sessions. Backend keys are a hash of the session ID.
+    Lookups are served from memory for ``local_ttl`` seconds, so a rerun
+    rarely touches the backend while a logout elsewhere still takes effect
+    within seconds.
+    """
+
+    def __init__(self, backend, credential_manager, local_ttl=LOCAL_TTL):
+        self.backend = backend
+        self.credential_manager = credential_manager
+        self.local_ttl = local_ttl
+        self._local = {}
+        self._lock = threading.Lock()
+        self._pruned_at = time.monotonic()
+
+    @staticmethod
+    def _key(session_id):
+        return KEY_PREFIX + hashlib.sha256(session_id.encode()).hexdigest()
+
+    def put(self, session_id, record, ttl):
+        """Store a session for ``ttl`` (a timedelta)"""
+        seconds = ttl.total_seconds()
+        record = {**record, 'expires': time.time() + seconds}
+        self.backend.set(self._key(session_id), self.credential_manager.encrypt(json.dumps(record)), seconds)
+        with self._lock:
+            self._local[session_id] = (record, time.monotonic())
+            self._prune()
+
+    def _prune(self):
+        """Drop cached records of expired sessions, at most once per ``local_ttl``; call with the lock held"""
+        now = time.monotonic()
+        if now - self._pruned_at < self.local_ttl:
+            return
+        self._pruned_at = now
+        expired = time.time()
+        for session_id in [key for key, (record, _) in self._local.items() if record['expires'] <= expired]:
+            del self._local[session_id]
+
+    def get(self, session_id):
+        """Return the session record, or None if unknown, expired or logged out"""
+        if not session_id:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            cached = self._local.get(session_id)
+        if cached and now - cached[1] < self.local_ttl:
+            record = cached[0]
+        else:
+            record = self._load(session_id)
+            with self._lock:
+                if record is None:
+                    self._local.pop(session_id, None)
+                else:
+                    self._local[session_id] = (record, now)
+                self._prune()
+        if record is None or record['expires'] <= time.time():
+            return None
+        return record
+
+    def _load(self, session_id):
+        try:
+            value = self.backend.get(self._key(session_id))
+        except Exception as e:
+            logging.error(f"Session store lookup failed: {str(e)}")
+            return None
+        if value is None:
+            return None
+        decrypted = self.credential_manager.decrypt(value)
+        if decrypted is None:
+            logging.warning("Stored session could not be decrypted, is ZOWE_ENCRYPTION_KEY the same on every replica?")
+            return None
+        return json.loads(decrypted)
+
+    def pop(self, session_id):
+        """Remove a session, returning its record or None"""
+        if not session_id:
+            return None
+        record = self.get(session_id)
+        with self._lock:
+            self._local.pop(session_id, None)
+        self.backend.delete(self._key(session_id))
+        return record
+
+
+def create_backend(config):
+    """Build the session backend named in the ``[sessions]`` config"""
+    backend = config["backend"]
+    if backend == "memory":
+        return MemorySessionBackend()
+    if backend == "sqlite":
+        return SQLiteSessionBackend(config["sqlite_path"])
+    if backend == "redis":
+        return RedisSessionBackend(config["redis_url"])
+    raise ValueError(f"Unknown session backend {backend}")
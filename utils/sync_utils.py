@@ -0,0 +1,101 @@
+import streamlit as st
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+INDEX_PATH = Path('.sync/index.db')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    host TEXT NOT NULL,
+    dsn TEXT NOT NULL,
+    member TEXT NOT NULL DEFAULT '',
+    etag TEXT,
+    stats TEXT,
+    size INTEGER,
+    sha256 TEXT,
+    synced_at REAL,
+    PRIMARY KEY (host, dsn, member)
+)
+"""
+
+
+def hash_file(path):
+    """SHA-256 of a local file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SyncIndex:
+    """On-disk index of what was last transferred for each dataset and member
+
+    One row per (host, DSN, member) records the z/OSMF ETag, the ISPF
+    statistics, and size and content hash of the local copy. Rows are
+    looked up by primary key or by dataset, so the index stays fast with
+    tens of thousands of entries. Sequential datasets use an empty member.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+
+    @staticmethod
+    def _to_dict(row):
+        entry = dict(row)
+        entry['stats'] = json.loads(entry['stats']) if entry['stats'] else None
+        return entry
+
+    def get(self, host, dataset_name, member=''):
+        """Return the entry of a dataset or member, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM entries WHERE host = ? AND dsn = ? AND member = ?",
+                (host, dataset_name, member)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def get_members(self, host, dataset_name):
+        """Return the entries of every member of a PDS, keyed by member name"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM entries WHERE host = ? AND dsn = ? AND member != ''",
+                (host, dataset_name)).fetchall()
+        return {row['member']: self._to_dict(row) for row in rows}
+
+    def put(self, host, dataset_name, member='', etag=None, stats=None, size=None, sha256=None):
+        """Record a transfer of a dataset or member"""
+        self.put_many(host, dataset_name, {member: {'etag': etag, 'stats': stats, 'size': size,
+                                                    'sha256': sha256}})
+
+    def put_many(self, host, dataset_name, entries):
+        """Record transfers of several members of a dataset in one transaction"""
+        now = time.time()
+        rows = [(host, dataset_name, member, entry.get('etag'),
+                 json.dumps(entry['stats']) if entry.get('stats') is not None else None,
+                 entry.get('size'), entry.get('sha256'), now)
+                for member, entry in entries.items()]
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO entries (host, dsn, member, etag, stats, size, sha256, synced_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+@st.cache_resource
+def get_sync_index():
+    """Get the process-wide sync index"""
+    return SyncIndex()
@@ -0,0 +1,489 @@
+import streamlit as st
+import codecs
+import logging
+import os
+import re
+import time
+import zlib
+
+import requests
+import urllib3
+from zowe.core_for_zowe_sdk.exceptions import RequestFailed, UnexpectedStatus
+from zowe.zos_files_for_zowe_sdk import DatasetOption
+
+# Size of each chunk pulled from z/OSMF and written to disk
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Bytes read from each end of a downloaded file for the preview
+PREVIEW_WINDOW_BYTES = 64 * 1024
+
+# Minimum seconds between two progress callbacks
+PROGRESS_INTERVAL = 0.25
+
+# gzip level for compressed uploads; fixed-width text compresses well already at low levels
+GZIP_LEVEL = 6
+
+# Statuses with which a server refuses a compressed request body
+ENCODING_REJECTED_STATUS = (400, 415, 501)
+
+# Space of datasets allocated for an upload; secondary extents let them grow
+ALLOCATION_UNIT = 'CYL'
+PRIMARY_SPACE = 1
+SECONDARY_SPACE = 5
+DIRECTORY_BLOCKS = 10
+
+# z/OSMF endpoints that refused a compressed upload, sent uncompressed from then on
+_identity_only_endpoints = set()
+
+_STATUS_IN_MESSAGE = re.compile(r'status code (?:from z/OSMF was: )?(\d{3})')
+
+
+def get_transfer_config():
+    """Get transfer tuning settings from secrets"""
+    try:
+        return {
+            "max_workers": st.secrets["transfers"]["max_workers"],
+            "max_connections_per_host": st.secrets["transfers"]["max_connections_per_host"],
+            "gzip_uploads": st.secrets["transfers"].get("gzip_uploads", False)
+        }
+    except Exception as e:
+        logging.warning(f"Failed to load transfer config from secrets: {e}")
+        return {
+            "max_workers": 8,
+            "max_connections_per_host": 8,
+            "gzip_uploads": False
+        }
+
+
+def format_bytes(num_bytes: float) -> str:
+    """Format a byte count for display"""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+def dataset_exists(datasets_api, dataset_name):
+    """Whether a dataset is catalogued"""
+    response = datasets_api.list(dataset_name)
+    return any(item.dsname == dataset_name.upper() for item in (response.items or []))
+
+
+def create_dataset(datasets_api, dataset_name, dsorg, recfm, lrecl):
+    """Allocate a dataset to upload to unless it already exists; returns whether it was created
+
+    For a member ('DSN(MEMBER)') its PDS is allocated. Any failure other
+    than the dataset existing already is raised.
+    """
+    dataset_name = dataset_name.strip().upper().split('(', 1)[0]
+    options = DatasetOption(dsorg=dsorg, recfm=recfm, lrecl=lrecl or None, alcunit=ALLOCATION_UNIT,
+                            primary=PRIMARY_SPACE, secondary=SECONDARY_SPACE,
+                            dirblk=DIRECTORY_BLOCKS if dsorg == 'PO' else None)
+    try:
+        datasets_api.create(dataset_name, options)
+    except Exception:
+        if not dataset_exists(datasets_api, dataset_name):
+            raise
+        logging.info(f"{dataset_name} already exists")
+        return False
+    logging.info(f"Allocated {dataset_name} ({dsorg}, {recfm}, LRECL {lrecl})")
+    return True
+
+
+def error_status(error):
+    """HTTP status of a failed SDK request, or None
+
+    The SDK exceptions only carry the status code in their message.
+    """
+    if isinstance(error, (RequestFailed, UnexpectedStatus)):
+        match = _STATUS_IN_MESSAGE.search(str(error))
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def compression_stats(body_bytes, wire_bytes, seconds):
+    """Compression ratio of a transfer and the wall-clock time it saved
+
+    The saving assumes the link is the bottleneck, i.e. that sending the
+    uncompressed body would have taken ``ratio`` times as long.
+    """
+    ratio = body_bytes / wire_bytes if wire_bytes else 1.0
+    return {'wire_bytes': wire_bytes, 'compression_ratio': ratio,
+            'seconds_saved': max(seconds * (ratio - 1), 0.0)}
+
+
+def describe_compression(result):
+    """One-line summary of a transfer's compression, '' when it was not compressed"""
+    if result.get('content_encoding', 'identity') == 'identity':
+        return ''
+    return (f"{result['content_encoding']}: {format_bytes(result['wire_bytes'])} on the wire, "
+            f"{result['compression_ratio']:.1f}x, about {result['seconds_saved']:.1f}s saved")
+
+
+class DecodedBody:
+    """Body of a streamed response, decompressed here chunk by chunk
+
+    Reading the raw stream and inflating it ourselves keeps memory bounded
+    and tells exactly how many bytes crossed the wire. Identity responses
+    pass through unchanged.
+    """
+
+    def __init__(self, response, chunk_size=DEFAULT_CHUNK_SIZE):
+        self._response = response
+        self._chunk_size = chunk_size
+        self.content_encoding = response.headers.get('Content-Encoding', '').strip().lower() or 'identity'
+        self.wire_bytes = 0
+        self.body_bytes = 0
+
+    def __iter__(self):
+        decompressor = None
+        if self.content_encoding in ('gzip', 'x-gzip', 'deflate'):
+            # wbits 47 accepts both gzip and zlib framing
+            decompressor = zlib.decompressobj(47)
+        elif self.content_encoding != 'identity':
+            raise ValueError(f"Unsupported Content-Encoding {self.content_encoding}")
+        for chunk in self._raw_chunks():
+            self.wire_bytes += len(chunk)
+            if decompressor:
+                chunk = decompressor.decompress(chunk)
+            if chunk:
+                self.body_bytes += len(chunk)
+                yield chunk
+        if decompressor:
+            tail = decompressor.flush()
+            if tail:
+                self.body_bytes += len(tail)
+                yield tail
+
+    def _raw_chunks(self):
+        """Raw body chunks; urllib3 errors are raised as the requests ones ``iter_content`` raises"""
+        try:
+            yield from self._response.raw.stream(self._chunk_size, decode_content=False)
+        except urllib3.exceptions.ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except urllib3.exceptions.ReadTimeoutError as e:
+            raise requests.exceptions.ConnectionError(e)
+        except urllib3.exceptions.SSLError as e:
+            raise requests.exceptions.SSLError(e)
+
+    def stats(self, seconds):
+        return {'content_encoding': self.content_encoding,
+                **compression_stats(self.body_bytes, self.wire_bytes, seconds)}
+
+
+def _expected_size(response):
+    """Return the decoded body size if the server announced it, else None"""
+    if response.headers.get('Content-Encoding'):
+        # Content-Length is the compressed size, not what lands on disk
+        return None
+    length = response.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+def open_content(datasets_api, dataset_name, etag=None, data_type=None, record_range=None):
+    """Open a streamed GET of dataset content, conditional on ``etag`` if given
+
+    ``data_type`` is 'binary' or 'record' to receive the raw EBCDIC bytes
+    instead of text converted on the host. ``record_range`` is a
+    ``(first_record, count)`` pair limiting the records returned.
+
+    Returns the response; its status is 304 when the content still matches
+    ``etag``.
+    """
+    custom_args = datasets_api._create_custom_request_arguments()
+    custom_args["url"] = "{}ds/{}".format(datasets_api._request_endpoint,
+                                         datasets_api._encode_uri_component(dataset_name))
+    # Only offer what DecodedBody can inflate
+    custom_args["headers"]["Accept-Encoding"] = "gzip"
+    if etag:
+        custom_args["headers"]["If-None-Match"] = etag
+    if record_range:
+        custom_args["headers"]["X-IBM-Record-Range"] = "{},{}".format(*record_range)
+    if data_type:
+        custom_args["headers"]["Accept"] = "application/octet-stream"
+        custom_args["headers"]["X-IBM-Data-Type"] = data_type
+    return datasets_api.request_handler.perform_request("GET", custom_args, expected_code=[200, 304],
+                                                        stream=True)
+
+
+def stream_download(datasets_api, dataset_name, output_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                    progress_callback=None, etag=None):
+    """Stream a dataset from z/OSMF to disk in fixed-size chunks
+
+    The body is never held in memory as a whole: each chunk is inflated
+    if gzip-encoded, decoded, written and counted before the next one is
+    read. ``progress_callback``
+    is called with ``(bytes_written, records, total_bytes)`` where
+    ``total_bytes`` is None when the server did not announce a size.
+
+    When ``etag`` is given the request is conditional; if the dataset is
+    unchanged nothing is transferred and ``output_path`` is left alone.
+
+    Returns a dict with the byte count, record count, elapsed seconds, the
+    dataset's ETag, whether it was unchanged and the compression stats.
+    """
+    start = time.monotonic()
+    response = open_content(datasets_api, dataset_name, etag)
+    if response.status_code == 304:
+        response.close()
+        logging.info(f"{dataset_name} unchanged since last download")
+        return {'bytes': 0, 'records': 0, 'seconds': time.monotonic() - start, 'etag': etag,
+                'not_modified': True}
+    total_bytes = _expected_size(response)
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    body = DecodedBody(response, chunk_size)
+
+    bytes_written = 0
+    records = 0
+    ends_with_newline = True
+    last_report = 0.0
+    try:
+        with open(output_path, 'wb') as f:
+            for chunk in body:
+                text = decoder.decode(chunk)
+                if not text:
+                    continue
+                data = text.encode('utf-8')
+                f.write(data)
+                bytes_written += len(data)
+                records += text.count('\n')
+                ends_with_newline = text.endswith('\n')
+
+                now = time.monotonic()
+                if progress_callback and now - last_report >= PROGRESS_INTERVAL:
+                    progress_callback(bytes_written, records, total_bytes)
+                    last_report = now
+
+            tail = decoder.decode(b'', final=True)
+            if tail:
+                data = tail.encode('utf-8')
+                f.write(data)
+                bytes_written += len(data)
+                records += tail.count('\n')
+                ends_with_newline = tail.endswith('\n')
+    finally:
+        response.close()
+
+    # A last record without a trailing newline still counts
+    if bytes_written and not ends_with_newline:
+        records += 1
+    if progress_callback:
+        progress_callback(bytes_written, records, total_bytes)
+
+    elapsed = time.monotonic() - start
+    logging.info(f"Streamed {dataset_name} to {output_path}: {bytes_written} bytes, "
+                 f"{records} records, {body.wire_bytes} bytes {body.content_encoding} on the wire in {elapsed:.2f}s")
+    return {'bytes': bytes_written, 'records': records, 'seconds': elapsed,
+            'etag': response.headers.get('ETag'), 'not_modified': False, **body.stats(elapsed)}
+
+
+def get_record_format(datasets_api, dataset_name):
+    """Return ``(recfm, lrecl)`` of a dataset; members report their PDS
+
+    Carriage-control and spanned flags are dropped, so the record format
+    is one of F, FB, V, VB or U.
+    """
+    dsn = dataset_name.split('(', 1)[0].upper()
+    response = datasets_api.list(dsn, return_attributes=True)
+    for item in response.items or []:
+        if item.dsname == dsn:
+            recfm = item.recfm or 'U'
+            recfm = recfm[0] + ('B' if 'B' in recfm[1:] else '')
+            return recfm, int(item.lrecl) if item.lrecl else None
+    raise ValueError(f"Dataset {dsn} not found")
+
+
+def stream_binary_download(datasets_api, dataset_name, output_path, data_type='binary',
+                           chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None):
+    """Stream the raw bytes of a dataset to disk without host-side conversion
+
+    With ``data_type`` 'record' each record is preceded by its 4-byte
+    big-endian length, which keeps variable-length records apart.
+    ``progress_callback`` is called with ``(bytes_written, total_bytes)``.
+
+    Returns a dict with the byte count, elapsed seconds, the ETag and the
+    compression stats.
+    """
+    start = time.monotonic()
+    response = open_content(datasets_api, dataset_name, data_type=data_type)
+    total_bytes = _expected_size(response)
+    body = DecodedBody(response, chunk_size)
+
+    bytes_written = 0
+    last_report = 0.0
+    try:
+        with open(output_path, 'wb') as f:
+            for chunk in body:
+                f.write(chunk)
+                bytes_written += len(chunk)
+
+                now = time.monotonic()
+                if progress_callback and now - last_report >= PROGRESS_INTERVAL:
+                    progress_callback(bytes_written, total_bytes)
+                    last_report = now
+    finally:
+        response.close()
+    if progress_callback:
+        progress_callback(bytes_written, total_bytes)
+
+    elapsed = time.monotonic() - start
+    logging.info(f"Streamed {dataset_name} to {output_path} in {data_type} mode: "
+                 f"{bytes_written} bytes in {elapsed:.2f}s")
+    return {'bytes': bytes_written, 'seconds': elapsed, 'etag': response.headers.get('ETag'), **body.stats(elapsed)}
+
+
+def read_preview(path, window_bytes=PREVIEW_WINDOW_BYTES):
+    """Read a bounded head/tail window of a text file
+
+    Returns ``(head, tail, truncated)``. When the file fits in two windows
+    the whole content is returned as ``head`` and ``tail`` is empty.
+    Raises UnicodeDecodeError for content that is not UTF-8 text.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if size <= 2 * window_bytes:
+            return f.read().decode('utf-8'), '', False
+
+        head = f.read(window_bytes)
+        f.seek(size - window_bytes)
+        tail = f.read(window_bytes)
+
+    # Cut both windows on record boundaries so no record is shown partially
+    newline = head.rfind(b'\n')
+    if newline != -1:
+        head = head[:newline + 1]
+        head_text = head.decode('utf-8')
+    else:
+        head_text = codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+
+    newline = tail.find(b'\n')
+    if newline != -1:
+        tail = tail[newline + 1:]
+    else:
+        # Skip UTF-8 continuation bytes of a character split by the seek
+        while tail and 0x80 <= tail[0] <= 0xBF:
+            tail = tail[1:]
+    return head_text, tail.decode('utf-8'), True
+
+
+class BufferReader:
+    """File-like reader over a memoryview that never copies the buffer
+
+    ``requests`` sends objects with ``read`` and ``__len__`` as a plain body
+    with a Content-Length header, pulling it in small blocks. Each block is
+    a slice of the original buffer, so the upload costs no extra memory.
+    """
+
+    def __init__(self, buffer, chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None):
+        self._view = memoryview(buffer).cast('B')
+        self._position = 0
+        self._chunk_size = chunk_size
+        self._progress_callback = progress_callback
+        self._last_report = 0.0
+
+    def __len__(self):
+        return len(self._view) - self._position
+
+    def read(self, size=-1):
+        """Return the next slice of the buffer, at most one chunk long"""
+        if size is None or size < 0 or size > self._chunk_size:
+            size = self._chunk_size
+        end = min(self._position + size, len(self._view))
+        block = self._view[self._position:end]
+        self._position = end
+
+        now = time.monotonic()
+        if self._progress_callback and (now - self._last_report >= PROGRESS_INTERVAL or not len(self)):
+            self._progress_callback(self._position, len(self._view))
+            self._last_report = now
+        return block
+
+    @property
+    def bytes_sent(self):
+        return self._position
+
+
+def _gzip_chunks(reader, counter, level=GZIP_LEVEL):
+    """Compress a reader block by block, counting the compressed bytes"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    while True:
+        block = reader.read()
+        if not len(block):
+            break
+        data = compressor.compress(block)
+        if data:
+            counter['wire_bytes'] += len(data)
+            yield data
+    data = compressor.flush()
+    counter['wire_bytes'] += len(data)
+    yield data
+
+
+def _put_content(datasets_api, dataset_name, body, data_type=None, content_encoding=None):
+    """PUT a request body to a dataset, as text unless ``data_type`` is given"""
+    custom_args = datasets_api._create_custom_request_arguments()
+    custom_args["url"] = "{}ds/{}".format(datasets_api._request_endpoint,
+                                         datasets_api._encode_uri_component(dataset_name))
+    custom_args["data"] = body
+    if data_type:
+        custom_args["headers"]["Content-Type"] = "application/octet-stream"
+        custom_args["headers"]["X-IBM-Data-Type"] = data_type
+    else:
+        custom_args["headers"]["Content-Type"] = "text/plain; charset=utf-8"
+    if content_encoding:
+        custom_args["headers"]["Content-Encoding"] = content_encoding
+    datasets_api.request_handler.perform_request("PUT", custom_args, expected_code=[204, 201])
+
+
+def stream_upload(datasets_api, dataset_name, buffer, chunk_size=DEFAULT_CHUNK_SIZE,
+                  progress_callback=None, data_type=None, compress=False):
+    """Stream an in-memory buffer to a dataset without a temporary file
+
+    ``buffer`` is anything exposing the buffer protocol, e.g. the result of
+    ``UploadedFile.getbuffer()``. ``progress_callback`` is called with
+    ``(bytes_sent, total_bytes)``. ``data_type`` is 'binary' or 'record'
+    to store bytes already in EBCDIC as they are; by default the buffer is
+    sent as text and converted on the host.
+
+    With ``compress`` the body is gzip-compressed block by block on the way
+    out. If the server refuses the encoding, the upload falls back to an
+    uncompressed body and the endpoint is not offered gzip again.
+
+    Returns a dict with the byte count, elapsed seconds, MB/s and the
+    compression stats.
+    """
+    start = time.monotonic()
+    reader = BufferReader(buffer, chunk_size=chunk_size, progress_callback=progress_callback)
+    total_bytes = len(reader)
+    endpoint = datasets_api._request_endpoint
+    content_encoding = 'identity'
+    counter = {'wire_bytes': total_bytes}
+
+    if compress and endpoint not in _identity_only_endpoints:
+        counter['wire_bytes'] = 0
+        try:
+            _put_content(datasets_api, dataset_name, _gzip_chunks(reader, counter), data_type, 'gzip')
+            content_encoding = 'gzip'
+        except (RequestFailed, UnexpectedStatus) as e:
+            if error_status(e) not in ENCODING_REJECTED_STATUS:
+                raise
+            logging.warning(f"{endpoint} refused a gzip upload, sending uncompressed: {str(e)}")
+            _identity_only_endpoints.add(endpoint)
+            reader = BufferReader(buffer, chunk_size=chunk_size, progress_callback=progress_callback)
+            counter['wire_bytes'] = total_bytes
+
+    if content_encoding == 'identity':
+        if data_type:
+            _put_content(datasets_api, dataset_name, reader, data_type)
+        else:
+            datasets_api.write(dataset_name, reader)
+
+    elapsed = time.monotonic() - start
+    throughput = total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+    logging.info(f"Streamed {total_bytes} bytes to {dataset_name} in {elapsed:.2f}s "
+                 f"({throughput:.2f} MB/s, {counter['wire_bytes']} bytes {content_encoding} on the wire)")
+    return {'bytes': reader.bytes_sent, 'seconds': elapsed, 'mb_per_second': throughput,
+            'content_encoding': content_encoding,
+            **compression_stats(total_bytes, counter['wire_bytes'], elapsed)}